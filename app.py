@@ -2,22 +2,31 @@
 import os
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
-REDIS_URL = os.getenv("REDIS_URL")
-
-import redis
-redis_client = redis.Redis.from_url(REDIS_URL)
 
 #get the logger done also at the top.
 from utils.logger import init_logger
 logger = init_logger(__name__)
 
-import streamlit as st, uuid, json, importlib
-from utils.vector_store import load_pdf_to_qdrant, similarity_search, reset_qdrant_collection
-from utils.memory import remember_short, recall_short, store_long, fetch_summary
+import streamlit as st, uuid
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "1") == "1"
 
-import json
 from utils.timestamp import now_ts, format_ts
 
+# The UI is a thin client of the chat service (utils/chat_service.py): over HTTP when
+# CHAT_SERVICE_URL points at a running service.py, otherwise in this process.
+from utils.chat_client import get_chat_client, CHAT_SERVICE_URL
+client = get_chat_client()
+
+# Heavy clients/models load on first use; optionally start loading them right away
+from utils.startup import warm_up_in_background, WARMUP_ON_START
+if WARMUP_ON_START and not CHAT_SERVICE_URL:
+    warm_up_in_background()
+
+# Per-stage latency metrics (METRICS_ENABLED=1); METRICS_PORT exposes /metrics for Prometheus
+from utils.metrics import start_metrics_server, metrics_enabled, export_json
+if metrics_enabled() and not CHAT_SERVICE_URL:
+    start_metrics_server()
+
 
 # -----------------------------------------------------------------------------
 # Page config
@@ -28,6 +37,14 @@ st.set_page_config(page_title="RAG Chat with PDF", layout="wide")
 # Sidebar: Model provider + model selection
 # -----------------------------------------------------------------------------
 
+# One id per chat: documents, memory and resets are all scoped to it. It lives in the
+# URL (?chat=...) rather than only in the browser session, so a refresh or a bookmark
+# comes back to the same chat and its PDFs instead of starting a new, orphaned tenant.
+chat_id = st.query_params.get("chat") or st.session_state.get("chat_id") or str(uuid.uuid4())
+st.session_state["chat_id"] = chat_id
+if st.query_params.get("chat") != chat_id:
+    st.query_params["chat"] = chat_id
+
 # -----------------------------------------------------------------------------
 # Sidebar: Upload & vectorize
 # -----------------------------------------------------------------------------
@@ -36,10 +53,12 @@ uploaded = st.sidebar.file_uploader("Select PDF", type=["pdf"])
 if uploaded:
     if st.sidebar.button("Vectorize & Index"):
         with st.spinner("Vectorizing… this may take a moment"):
-            reset_qdrant_collection()
-            st.toast('Qdrant has been reset', icon='🧹')
-            load_pdf_to_qdrant(uploaded)
-            st.sidebar.success("✅ Vector store ready!")
+            # Incremental: only new/changed chunks of this PDF are embedded and upserted
+            try:
+                done = client.ingest(uploaded, chat_id)
+                st.sidebar.success(f"✅ Vector store ready! ({done['seconds']} s)")
+            except Exception as e:
+                st.sidebar.error(f"Indexing failed: {e}")
 
 
 
@@ -79,58 +98,24 @@ model_name = st.sidebar.selectbox(
     help="Pick a Gemini model variant for the selected provider."
 )
 
-# Map provider -> python module path
-MODULE_BY_PROVIDER = {
-    "GoogleAI": "utils.google_generativeai_chat",
-    "VertexAI": "utils.vertex_chat_vertexai",
-}
-
-def _init_backend(selected_provider: str, selected_model: str):
-    # Set env variables so backend modules can read the chosen model
-    if selected_provider == "VertexAI":
-        os.environ["VERTEX_MODEL_NAME"] = selected_model
-    elif selected_provider == "GoogleAI":
-        # Set multiple names for compatibility with common patterns
-        os.environ["GOOGLEAI_MODEL_NAME"] = selected_model
-        os.environ["GEMINI_MODEL_NAME"] = selected_model
-    module_name = MODULE_BY_PROVIDER[selected_provider]
-    mod = importlib.import_module(module_name)
-    session = mod.init_chat()
-    return mod, session
-
-# Initialize / switch backend when provider or model changes
-provider_changed = st.session_state.get("provider") != provider
-model_changed = st.session_state.get("model_name") != model_name
-
-if "provider" not in st.session_state or "model_name" not in st.session_state or provider_changed or model_changed:
+# The service keeps one LLM session per (chat, provider, model); switching just picks another
+if st.session_state.get("provider") != provider or st.session_state.get("model_name") != model_name:
     st.session_state["provider"] = provider
     st.session_state["model_name"] = model_name
-    try:
-        chat_module, my_gemini = _init_backend(provider, model_name)
-        st.session_state["chat_module"] = chat_module
-        st.session_state["my_gemini"] = my_gemini
-        st.toast(f"Using {provider} • {model_name}", icon="🤖")
-    except Exception as e:
-        st.session_state["chat_module"] = None
-        st.session_state["my_gemini"] = None
-        st.error(f"Failed to initialize {provider} ({model_name}): {e}")
-
-# Convenience handles
-chat_module = st.session_state.get("chat_module")
-my_gemini = st.session_state.get("my_gemini")
-my_chat = getattr(chat_module, "chat", None) if chat_module else None
+    st.toast(f"Using {provider} • {model_name}", icon="🤖")
 
 # Optional button to reinitialize the session for the selected provider+model
 if st.sidebar.button("Reinitialize Model Session"):
     try:
-        chat_module, my_gemini = _init_backend(st.session_state["provider"], st.session_state["model_name"])
-        st.session_state["chat_module"] = chat_module
-        st.session_state["my_gemini"] = my_gemini
+        client.new_session(chat_id)
         st.toast("Model session reinitialized", icon="🔄")
     except Exception as e:
         st.error(f"Failed to reinitialize session: {e}")
 
 st.sidebar.caption(f"Active: **{st.session_state.get('provider','–')} • {st.session_state.get('model_name','–')}**")
+if metrics_enabled() and not CHAT_SERVICE_URL:
+    with st.sidebar.expander("Stage latencies (this process)"):
+        st.json(export_json())
 
 
 # -----------------------------------------------------------------------------
@@ -139,22 +124,14 @@ st.sidebar.caption(f"Active: **{st.session_state.get('provider','–')} • {st.
 with st.expander("Open Chat Section", expanded=True):
     st.header("Chat with your document")
 
-    chat_id = st.session_state.setdefault("chat_id", str(uuid.uuid4()))
-
     if st.button("Reset"):
-        reset_qdrant_collection()
-        st.toast('Qdrant has been reset', icon='🧹')
-        st.session_state.messages = []
-        redis_client.flushall()   # clear Redis DB
-        redis_client.delete(chat_id)
-        st.toast('Redis has been reset', icon='🧹')
-        # Reinit the model session for current provider+model
         try:
-            chat_module, my_gemini = _init_backend(st.session_state["provider"], st.session_state["model_name"])
-            st.session_state["chat_module"] = chat_module
-            st.session_state["my_gemini"] = my_gemini
+            # Only this chat's documents, memory and model session; other users are untouched
+            client.reset(chat_id)
+            st.toast('Documents and memory for this chat have been reset', icon='🧹')
         except Exception as e:
-            st.error(f"Failed to reinitialize session: {e}")
+            st.error(f"Reset failed: {e}")
+        st.session_state.messages = []
         st.rerun()
 
     if "messages" not in st.session_state:
@@ -162,72 +139,46 @@ with st.expander("Open Chat Section", expanded=True):
 
     user_prompt = st.chat_input("Ask anything about the uploaded PDF…")
 
-    if redis_client is None:
-        st.error("Redis client could not be initialized. Please check your REDIS_URL.")
-        response = "Error: Redis client initialization failed."
-    else:
-        if user_prompt:
-            if not (my_gemini and my_chat):
-                st.error("Model is not initialized. Check the selected provider in the sidebar.")
+    if user_prompt:
+        logger.debug(f"user_prompt: {user_prompt}")
+        turn = None
+        try:
+            # Retrieval and summary fetch overlap; see utils/chat_turn.py
+            if STREAM_RESPONSES:
+                turn = {}
+                def deltas():
+                    for item in client.stream(chat_id, user_prompt, provider, model_name):
+                        if isinstance(item, dict):
+                            turn.update(item)
+                        else:
+                            yield item
+                # Render tokens as they arrive; the finished reply joins the history below
+                live = st.empty()
+                with live.container():
+                    with st.chat_message("assistant"):
+                        st.write_stream(deltas())
+                live.empty()
             else:
-                logger.debug(f"user_prompt: {user_prompt}")
-
-                # Debug: print short-term memory
-                redis_list = redis_client.lrange(chat_id, 0, -1)
-                for li in redis_list:
-                    logger.debug(f"Recall short-term memory: {json.loads(li)}")
-
-                recent, older = recall_short(chat_id)
-
-                if older:
-                    system_prompt = "You are a helpful assistant..."
-                    st.toast('Writing a summary to Firestore ..', icon='🎉')
-                    logger.debug(f"Older messages: {older}")
-                    store_long(my_gemini, chat_id, older)
-                    # free short-term space
-                    # (We briefly set redis_client to None to avoid accidental use; re-create below)
-                    redis_client = None
-                    st.session_state.messages = recent  # keep recent only
-
-                context_snippets = similarity_search(user_prompt)
-                summary_cache = fetch_summary(chat_id)
-                logger.debug(f"Chat ID: {chat_id}")
-                logger.debug(f"Summary Cache: {summary_cache}")
-
-                # Build system prompt with context
-                system_prompt = (
-                    "You are a helpful assistant that answers only from the document.\n\n"
-                    f"Document context:\n• " + "\n• ".join(context_snippets) + "\n\n"
-                    f"Conversation summary: {summary_cache}"
-                )
-
-                gemini_response = my_chat(
-                    my_gemini,
-                    system_prompt,
-                    recent + [{"role": "user", "content": user_prompt}]
-                )
-
-                # Recreate redis client if we nulled it above
-                if redis_client is None:
-                    redis_client = redis.Redis.from_url(REDIS_URL)
-
-                if redis_client is None:
-                    st.error("Redis client could not be initialized. Please check your REDIS_URL.")
-                    response = "Error: Redis client initialization failed."
-                else:
-                    if gemini_response:
-                        st.session_state.messages.append({"role": "user", "content": user_prompt, "ts": now_ts()})
-                        st.session_state.messages.append({"role": "assistant", "content": gemini_response, "ts": now_ts() })
-                        redis_client.expire(chat_id, 1200)
-
-                        remember_short(chat_id, "user", user_prompt, redis_client)
-                        remember_short(chat_id, "assistant", gemini_response, redis_client)
-                        logger.debug(f"ttl= {redis_client.pttl(chat_id)} ms \n")
-
-                        # Debug: print updated short-term memory
-                        redis_list = redis_client.lrange(chat_id, 0, -1)
-                        for li in redis_list:
-                            logger.debug(f"\n {json.loads(li)}  ")
+                turn = client.turn(chat_id, user_prompt, provider, model_name)
+        except Exception as e:
+            st.error(f"Chat turn failed: {e}")
+
+        if turn:
+            gemini_response = turn["answer"]
+            if turn.get("cached"):
+                st.sidebar.caption("♻️ Answered from the semantic answer cache")
+            timings = dict(turn["timings"])
+            ttft = timings.pop("ttft", None)
+            st.sidebar.caption((f"**Time to first token: {ttft} ms**  \n" if ttft is not None else "")
+                               + "Last turn (ms): " + " • ".join(f"{k} {v}" for k, v in timings.items()))
+
+            if turn["summarized"]:
+                st.toast('Summarizing older messages to Firestore in the background ..', icon='🎉')
+                st.session_state.messages = turn["recent"]  # keep recent only
+
+            if gemini_response:
+                st.session_state.messages.append({"role": "user", "content": user_prompt, "ts": now_ts()})
+                st.session_state.messages.append({"role": "assistant", "content": gemini_response, "ts": now_ts() })
 
     # Show chat history in reverse order (latest first)
     for msg in reversed(st.session_state.messages):
@@ -0,0 +1,80 @@
+# Parity + throughput of an alternative embedding backend against float32 torch.
+#   python -m benchmarks.bench_embeddings --backend quantized --chunks 512
+#   python -m benchmarks.bench_embeddings --backend onnx
+import argparse, io, json, random, time
+import numpy as np
+
+from benchmarks.synthetic_pdf import make_synthetic_pdf
+from utils.embeddings import EmbeddingEngine, EMBED_MODEL_NAME
+from utils.ingest import iter_pdf_pages, iter_chunks
+from utils.vector_store import CHUNK_SIZE, CHUNK_OVERLAP
+
+
+def _chunks(n: int) -> list[str]:
+    pages = iter_pdf_pages(io.BytesIO(make_synthetic_pdf(max(4, n // 8))))
+    out = []
+    for c in iter_chunks(pages, CHUNK_SIZE, CHUNK_OVERLAP):
+        out.append(c)
+        if len(out) == n:
+            break
+    return out
+
+
+def _normalize(m):
+    m = np.asarray(m, dtype=np.float32)
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def _throughput(engine: EmbeddingEngine, texts: list[str], batch_size: int) -> tuple:
+    engine.encode_documents(texts[:batch_size], batch_size=batch_size)     # warm-up
+    t0 = time.perf_counter()
+    vecs = engine.encode_documents(texts, batch_size=batch_size)
+    dt = time.perf_counter() - t0
+    return _normalize(vecs), round(len(texts) / dt, 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default="quantized", choices=["quantized", "onnx"])
+    ap.add_argument("--chunks", type=int, default=512)
+    ap.add_argument("--queries", type=int, default=32)
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args()
+
+    texts = _chunks(args.chunks)
+    rng = random.Random(0)
+    queries = [" ".join(rng.choice(texts).split()[:8]) for _ in range(args.queries)]
+
+    ref = EmbeddingEngine(EMBED_MODEL_NAME, backend="torch")
+    cand = EmbeddingEngine(EMBED_MODEL_NAME, backend=args.backend)
+    ref_docs, ref_cps = _throughput(ref, texts, args.batch_size)
+    cand_docs, cand_cps = _throughput(cand, texts, args.batch_size)
+
+    # Parity: same text should embed to (nearly) the same direction, and query->chunk
+    # cosine scores / top-k neighbours should be preserved
+    pair_cos = (ref_docs * cand_docs).sum(axis=1)
+    ref_scores = _normalize(ref.encode_documents(queries)) @ ref_docs.T
+    cand_scores = _normalize(cand.encode_documents(queries)) @ cand_docs.T
+    k = args.k
+    ref_top = np.argsort(-ref_scores, axis=1)[:, :k]
+    cand_top = np.argsort(-cand_scores, axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)])
+
+    print(json.dumps({
+        "model": EMBED_MODEL_NAME,
+        "backend": args.backend,
+        "chunks": len(texts),
+        "throughput_chunks_per_s": {"torch": ref_cps, args.backend: cand_cps,
+                                    "speedup": round(cand_cps / ref_cps, 2)},
+        "parity": {
+            "embedding_cosine_mean": round(float(pair_cos.mean()), 5),
+            "embedding_cosine_min": round(float(pair_cos.min()), 5),
+            "score_abs_diff_max": round(float(np.abs(ref_scores - cand_scores).max()), 5),
+            f"top{k}_overlap": round(float(overlap), 4),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
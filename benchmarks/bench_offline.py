@@ -0,0 +1,329 @@
+# End-to-end benchmark against in-process stand-ins for Qdrant, Redis, Firestore,
+# the embedding model and the LLM (benchmarks/fakes.py), with injected latency.
+#   python -m benchmarks.bench_offline --pages 10,50,200 --out run.json
+#   python -m benchmarks.bench_offline --baseline run.json       # adds ratios vs an earlier run
+#
+# Workloads: ingestion (load_pdf_to_qdrant), retrieval (similarity_search, dense and
+# hybrid), chat memory (remember/recall_short, store_long/fetch_summary) and full chat
+# turns (run_turn / stream_turn). Each reports throughput, p50/p99 latency and peak
+# Python heap (tracemalloc, measured in a separate pass so it does not skew timings),
+# plus the per-stage span histograms from utils.metrics.
+import argparse, asyncio, io, json, os, platform, random, statistics, tempfile, time, tracemalloc
+
+from benchmarks.synthetic_pdf import make_synthetic_pdf, WORDS
+from benchmarks.fakes import (FakeRedis, FakeFirestore, SlowBackend, FakeEncoder, FakeChatSession,
+                              fake_chat, fake_chat_stream)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def _latency(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"n": len(ordered), "mean_ms": _ms(statistics.fmean(ordered)), "p50_ms": _ms(pick(0.50)),
+            "p90_ms": _ms(pick(0.90)), "p99_ms": _ms(pick(0.99)), "max_ms": _ms(ordered[-1])}
+
+
+def _peak_mb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2**20, 2)
+
+
+def _pdf_file(pages: int, seed: int, name: str):
+    f = io.BytesIO(make_synthetic_pdf(pages, seed=seed))
+    f.name = name
+    return f
+
+
+def _queries(n: int, seed: int = 11) -> list[str]:
+    rng = random.Random(seed)
+    return [f"what is the {rng.choice(WORDS)} {rng.choice(WORDS)} for part PN-{rng.randint(10000, 99999)} "
+            f"in section {rng.randint(1, 50)}.{rng.randint(0, 40)}" for _ in range(n)]
+
+
+# -----------------------------------------------------------------------------
+# Environment: every persisted index goes to a throwaway directory, and the fakes are
+# installed through the same accessors the app uses (clients, vector store, engine).
+# -----------------------------------------------------------------------------
+def _configure_env(workdir: str, args):
+    os.environ.update({
+        "VECTOR_BACKEND": "local",
+        "LOCAL_INDEX_DIR": os.path.join(workdir, "local"),
+        "BM25_INDEX_PATH": os.path.join(workdir, "bm25.json"),
+        "MANIFEST_DIR": os.path.join(workdir, "manifests"),
+        "EMBED_CACHE_DIR": os.path.join(workdir, "embeddings"),
+        "OLDER": str(args.older_s),
+        "METRICS_ENABLED": "1",
+        "TENANT_SCOPE": "shared",      # every workload reads the one index it just built
+    })
+
+
+def _install_fakes(args) -> dict:
+    from utils.clients import set_clients
+    from utils.embeddings import get_embedding_engine
+    from utils.vector_backends import get_vector_backend
+    from utils import vector_store
+
+    fakes = {
+        "redis": FakeRedis(args.redis_ms),
+        "firestore": FakeFirestore(args.firestore_ms),
+        "llm": FakeChatSession(args.llm_ttft_ms, args.llm_token_ms, args.reply_tokens),
+    }
+    set_clients(fakes["redis"], fakes["firestore"])
+    vector_store.set_store(SlowBackend(get_vector_backend(vector_store.COLLECTION, "local"), args.vector_ms))
+    if args.embedder == "fake":
+        get_embedding_engine().set_model(FakeEncoder(args.dim, args.embed_batch_ms, args.embed_text_ms))
+    return fakes
+
+
+def _chat_backend():
+    try:
+        from utils.google_generativeai_chat import chat, chat_stream
+        return "google_generativeai_chat", chat, chat_stream
+    except ImportError:
+        return "fakes.fake_chat", fake_chat, fake_chat_stream
+
+
+# -----------------------------------------------------------------------------
+# Workloads
+# -----------------------------------------------------------------------------
+def bench_ingest(sizes: list[int]) -> list[dict]:
+    from utils.vector_store import load_pdf_to_qdrant, reset_qdrant_collection, vector_store_stats
+    from utils.metrics import reset_metrics, export_json
+
+    load_pdf_to_qdrant(_pdf_file(2, seed=1, name="warmup.pdf"))    # lazy imports, model load
+    out = []
+    for pages in sizes:
+        reset_qdrant_collection()
+        reset_metrics()
+        f = _pdf_file(pages, seed=pages, name=f"manual-{pages}.pdf")
+        t0 = time.perf_counter()
+        load_pdf_to_qdrant(f)
+        wall = time.perf_counter() - t0
+        chunks = vector_store_stats().get("points", 0)
+        stages = export_json()
+
+        f.seek(0)
+        t0 = time.perf_counter()
+        load_pdf_to_qdrant(f)          # same document again: incremental path, nothing re-embedded
+        reindex = time.perf_counter() - t0
+
+        reset_qdrant_collection()
+        peak = _peak_mb(lambda: load_pdf_to_qdrant(_pdf_file(pages, seed=pages + 1000, name="mem.pdf")))
+        out.append({
+            "pages": pages, "chunks": chunks, "wall_s": round(wall, 3),
+            "pages_per_s": round(pages / wall, 1), "chunks_per_s": round(chunks / wall, 1),
+            "reindex_unchanged_s": round(reindex, 3), "peak_mb": peak, "stages": stages,
+        })
+    return out
+
+
+def bench_search(pages: int, n_queries: int) -> dict:
+    from utils.vector_store import load_pdf_to_qdrant, reset_qdrant_collection, similarity_search_scored
+    from utils.embeddings import get_embedding_engine
+    from utils.metrics import reset_metrics, export_json
+
+    reset_qdrant_collection()
+    load_pdf_to_qdrant(_pdf_file(pages, seed=pages, name=f"manual-{pages}.pdf"))
+    out = {"pages": pages}
+    for mode in ("dense", "hybrid"):
+        get_embedding_engine().clear_cache()
+        reset_metrics()
+        samples = []
+        for q in _queries(n_queries):
+            t0 = time.perf_counter()
+            similarity_search_scored(q, k=5, mode=mode)
+            samples.append(time.perf_counter() - t0)
+        get_embedding_engine().clear_cache()
+        peak = _peak_mb(lambda: [similarity_search_scored(q, k=5, mode=mode) for q in _queries(50, seed=5)])
+        out[mode] = {**_latency(samples), "qps": round(len(samples) / sum(samples), 1),
+                     "peak_mb": peak, "stages": export_json()}
+    return out
+
+
+def bench_memory(chats: int, turns: int, llm) -> dict:
+    from utils.memory import remember_turn, recall_short, store_long, fetch_summary
+    from utils.summary_cache import summary_cache
+    from utils.metrics import reset_metrics, export_json
+
+    reset_metrics()
+    timings = {"remember_turn": [], "recall_short": [], "store_long": [],
+               "fetch_summary_cold": [], "fetch_summary_warm": []}
+
+    def run():
+        for c in range(chats):
+            chat_id = f"bench-mem-{c}"
+            for t in range(turns):
+                t0 = time.perf_counter()
+                remember_turn(chat_id, f"question {t} about PN-{c}{t}", f"answer {t} " * 20)
+                timings["remember_turn"].append(time.perf_counter() - t0)
+                t0 = time.perf_counter()
+                recall_short(chat_id)
+                timings["recall_short"].append(time.perf_counter() - t0)
+            older = [{"ts": time.time() - 1000 + i, "role": "user", "content": f"old message {i}"}
+                     for i in range(turns)]
+            t0 = time.perf_counter()
+            store_long(llm, chat_id, older)
+            timings["store_long"].append(time.perf_counter() - t0)
+            summary_cache.invalidate(chat_id)        # next read has to go to Firestore
+            t0 = time.perf_counter()
+            fetch_summary(chat_id)
+            timings["fetch_summary_cold"].append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            fetch_summary(chat_id)
+            timings["fetch_summary_warm"].append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    run()
+    wall = time.perf_counter() - t0
+    out = {op: _latency(s) for op, s in timings.items()}
+    out["ops_per_s"] = round(sum(len(s) for s in timings.values()) / wall, 1)
+    out["stages"] = export_json()
+    for s in timings.values():
+        s.clear()
+    out["peak_mb"] = _peak_mb(run)
+    return out
+
+
+def bench_chat(pages: int, chats: int, turns: int, concurrency: int, llm, chat, chat_stream) -> dict:
+    from utils.vector_store import load_pdf_to_qdrant, reset_qdrant_collection
+    from utils.chat_turn import run_turn, stream_turn
+    from utils.clients import get_redis
+    from utils.summarizer import pending_summaries
+    from utils.metrics import reset_metrics, export_json
+
+    reset_qdrant_collection()
+    load_pdf_to_qdrant(_pdf_file(pages, seed=pages, name=f"manual-{pages}.pdf"))
+    redis_client = get_redis()
+    prompts = _queries(chats * turns, seed=23)
+    reset_metrics()
+
+    async def one_chat(c: int, results: list):
+        for t in range(turns):
+            res = await run_turn(f"bench-chat-{c}", prompts[c * turns + t], llm, chat, redis_client)
+            results.append(res["timings"]["total"] / 1000)
+
+    async def run_all(results: list):
+        sem = asyncio.Semaphore(concurrency)
+
+        async def bounded(c):
+            async with sem:
+                await one_chat(c, results)
+        await asyncio.gather(*(bounded(c) for c in range(chats)))
+
+    totals = []
+    t0 = time.perf_counter()
+    asyncio.run(run_all(totals))
+    wall = time.perf_counter() - t0
+    out = {"pages": pages, "chats": chats, "turns": len(totals), "concurrency": concurrency,
+           "turns_per_s": round(len(totals) / wall, 2), "turn": _latency(totals)}
+
+    # Streaming turns, one at a time: time to first token and total
+    ttft, stream_totals = [], []
+    for i, prompt in enumerate(_queries(min(20, len(prompts)), seed=29)):
+        for item in stream_turn(f"bench-stream-{i % chats}", prompt, llm, chat_stream, redis_client):
+            if isinstance(item, dict):
+                ttft.append(item["timings"].get("ttft", 0) / 1000)
+                stream_totals.append(item["timings"]["total"] / 1000)
+    out["stream_ttft"] = _latency(ttft)
+    out["stream_turn"] = _latency(stream_totals)
+    out["summaries_pending"] = pending_summaries()
+    out["stages"] = export_json()
+    out["peak_mb"] = _peak_mb(lambda: asyncio.run(run_all([])))
+    return out
+
+
+# -----------------------------------------------------------------------------
+# Comparison against an earlier run: ratio current / baseline for every latency,
+# throughput and memory figure found at the same path in both documents.
+# -----------------------------------------------------------------------------
+_COMPARABLE = ("_ms", "_per_s", "qps", "wall_s", "peak_mb")
+
+def compare(current, baseline, path: str = "") -> dict:
+    ratios = {}
+    if isinstance(current, dict) and isinstance(baseline, dict):
+        for key, value in current.items():
+            if key in baseline and key != "stages":
+                ratios.update(compare(value, baseline[key], f"{path}.{key}" if path else key))
+    elif isinstance(current, list) and isinstance(baseline, list):
+        for i, (a, b) in enumerate(zip(current, baseline)):
+            ratios.update(compare(a, b, f"{path}[{i}]"))
+    elif (isinstance(current, (int, float)) and isinstance(baseline, (int, float)) and baseline
+          and path.endswith(_COMPARABLE)):
+        ratios[path] = round(current / baseline, 3)
+    return ratios
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", default="10,50,200", help="comma-separated synthetic PDF sizes for ingestion")
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("--chats", type=int, default=8)
+    ap.add_argument("--turns", type=int, default=5, help="turns per chat")
+    ap.add_argument("--concurrency", type=int, default=4, help="chats served at the same time")
+    ap.add_argument("--workloads", default="ingest,search,memory,chat")
+    ap.add_argument("--embedder", choices=("fake", "real"), default="fake",
+                    help="real = the configured SentenceTransformer (EMBED_MODEL_NAME/EMBED_BACKEND)")
+    ap.add_argument("--dim", type=int, default=384)
+    # injected latency, milliseconds
+    ap.add_argument("--redis-ms", type=float, default=0.5)
+    ap.add_argument("--firestore-ms", type=float, default=15.0)
+    ap.add_argument("--vector-ms", type=float, default=3.0)
+    ap.add_argument("--embed-batch-ms", type=float, default=2.0)
+    ap.add_argument("--embed-text-ms", type=float, default=0.2)
+    ap.add_argument("--llm-ttft-ms", type=float, default=150.0)
+    ap.add_argument("--llm-token-ms", type=float, default=2.0)
+    ap.add_argument("--reply-tokens", type=int, default=40)
+    ap.add_argument("--older-s", type=float, default=120, help="OLDER: age at which messages get summarized")
+    ap.add_argument("--out", help="also write the JSON report here")
+    ap.add_argument("--baseline", help="earlier report to compare against")
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-offline-")
+    _configure_env(workdir, args)
+    fakes = _install_fakes(args)
+    backend, chat, chat_stream = _chat_backend()
+    sizes = [int(p) for p in args.pages.split(",") if p]
+    workloads = set(args.workloads.split(","))
+
+    results = {}
+    if "ingest" in workloads:
+        results["ingest"] = bench_ingest(sizes)
+    if "search" in workloads:
+        results["search"] = bench_search(max(sizes), args.queries)
+    if "memory" in workloads:
+        results["memory"] = bench_memory(args.chats, args.turns, fakes["llm"])
+    if "chat" in workloads:
+        results["chat"] = bench_chat(max(sizes), args.chats, args.turns, args.concurrency,
+                                     fakes["llm"], chat, chat_stream)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "chat_backend": backend,
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+            "service_calls": {"redis": fakes["redis"].calls, "firestore_reads": fakes["firestore"].reads,
+                              "firestore_writes": fakes["firestore"].writes, "llm": fakes["llm"].calls},
+        },
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["vs_baseline"] = compare(results, json.load(f)["results"])
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
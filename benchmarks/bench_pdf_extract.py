@@ -0,0 +1,41 @@
+# Serial vs process-pool PDF text extraction on a synthetic manual.
+#   python -m benchmarks.bench_pdf_extract --pages 400 --workers 8
+import argparse, io, json, os, time
+
+from benchmarks.synthetic_pdf import make_synthetic_pdf
+from utils.ingest import iter_pdf_pages, iter_pdf_pages_parallel
+
+
+def _run(label, pages_iter):
+    start = time.perf_counter()
+    first = None
+    n_chars = 0
+    n_pages = 0
+    for text in pages_iter:
+        if first is None:
+            first = time.perf_counter() - start
+        n_chars += len(text)
+        n_pages += 1
+    return {"mode": label, "pages": n_pages, "chars": n_chars,
+            "wall_s": round(time.perf_counter() - start, 4),
+            "first_page_s": round(first or 0.0, 4)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=400)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    ap.add_argument("--pages-per-task", type=int, default=8)
+    args = ap.parse_args()
+
+    data = make_synthetic_pdf(args.pages)
+    serial = _run("serial", iter_pdf_pages(io.BytesIO(data)))
+    parallel = _run(f"parallel[{args.workers}]",
+                    iter_pdf_pages_parallel(data, workers=args.workers, pages_per_task=args.pages_per_task))
+    assert serial["chars"] == parallel["chars"], "parallel extraction changed the text"
+    parallel["speedup"] = round(serial["wall_s"] / parallel["wall_s"], 2) if parallel["wall_s"] else None
+    print(json.dumps({"pdf_bytes": len(data), "results": [serial, parallel]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# Cost and effect of the post-retrieval stage (utils/rerank.py): added search latency
+# vs. prompt size and redundancy of the retrieved context, for
+#   baseline (raw top-k) | mmr | cross-encoder | cross-encoder + mmr
+#   python -m benchmarks.bench_rerank --pages 50 --copies 2
+#   python -m benchmarks.bench_rerank --embedder real --reranker-model cross-encoder/ms-marco-MiniLM-L-6-v2
+#
+# The manual is indexed `--copies` times under different names (revisions of the same
+# document), which with CHUNK_OVERLAP is where near-duplicate hits come from. Offline,
+# the embedder is a bag-of-words fake (overlapping text -> similar vectors) and the
+# cross-encoder a word-overlap fake costing `--cross-ms` per pair.
+import argparse, json, os, statistics, tempfile, time
+
+from benchmarks.bench_offline import _latency, _pdf_file, _queries
+from benchmarks.fakes import SlowBackend, BagOfWordsEncoder, FakeCrossEncoder
+
+
+def _configure_env(workdir: str):
+    os.environ.update({
+        "VECTOR_BACKEND": "local",
+        "LOCAL_INDEX_DIR": os.path.join(workdir, "local"),
+        "BM25_INDEX_PATH": os.path.join(workdir, "bm25.json"),
+        "MANIFEST_DIR": os.path.join(workdir, "manifests"),
+        "EMBED_CACHE_DIR": os.path.join(workdir, "embeddings"),
+        "TENANT_SCOPE": "shared",
+    })
+
+
+def _configs(args) -> dict:
+    from utils.rerank import Reranker
+    if args.reranker_model:
+        cross_model = Reranker(model_name=args.reranker_model).model
+    else:
+        cross_model = FakeCrossEncoder(args.cross_ms)
+    configs = {
+        "baseline": Reranker(mmr=False, model_name=""),
+        "mmr": Reranker(mmr=True, mmr_lambda=args.mmr_lambda, fetch=args.fetch, model_name=""),
+        "cross_encoder": Reranker(mmr=False, fetch=args.fetch, model_name=""),
+        "cross_encoder_mmr": Reranker(mmr=True, mmr_lambda=args.mmr_lambda, fetch=args.fetch, model_name=""),
+    }
+    for name in ("cross_encoder", "cross_encoder_mmr"):
+        configs[name].set_model(cross_model, args.reranker_model or "fake-cross-encoder")
+    return configs
+
+
+# Near-duplicate pairs among the retrieved chunks (cosine >= threshold under the engine)
+def _near_duplicates(engine, texts: list[str], threshold: float) -> int:
+    import numpy as np
+    if len(texts) < 2:
+        return 0
+    v = np.asarray(engine.encode_documents(texts), dtype=np.float32)
+    v = v / np.linalg.norm(v, axis=1, keepdims=True)
+    sims = v @ v.T
+    return int(((sims >= threshold).sum() - len(texts)) // 2)
+
+
+# Share of the query's words found anywhere in the context (does diversification lose facts?)
+def _coverage(query: str, texts: list[str]) -> float:
+    words = set(query.lower().split())
+    found = set(" ".join(texts).lower().split())
+    return len(words & found) / len(words) if words else 0.0
+
+
+def bench(args) -> dict:
+    from utils import vector_store
+    from utils.vector_store import load_pdf_to_qdrant, similarity_search_scored, COLLECTION
+    from utils.vector_backends import get_vector_backend
+    from utils.embeddings import get_embedding_engine
+    from utils.prompt_builder import build_prompt, count_tokens
+    from utils.rerank import set_reranker, MMR_DUP_THRESHOLD
+    from utils.metrics import enable_metrics, reset_metrics, export_json
+
+    engine = get_embedding_engine()
+    if args.embedder == "bow":
+        engine.set_model(BagOfWordsEncoder(args.dim))
+    vector_store.set_store(SlowBackend(get_vector_backend(COLLECTION, "local"), args.vector_ms))
+    for copy in range(args.copies):
+        load_pdf_to_qdrant(_pdf_file(args.pages, seed=args.pages, name=f"manual-rev{copy}.pdf"))
+
+    queries = _queries(args.queries, seed=31)
+    for q in queries:
+        engine.encode_query(q)          # query vectors cached: only retrieval + re-ranking is timed
+    enable_metrics(True)
+
+    out = {}
+    for name, reranker in _configs(args).items():
+        set_reranker(reranker)
+        reset_metrics()
+        latency, retrieved, context, snippets, kept, dups, coverage = [], [], [], [], [], [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            hits = similarity_search_scored(q, k=args.k, mode=args.mode)
+            latency.append(time.perf_counter() - t0)
+            texts = [t for t, _ in hits]
+            _, _, stats = build_prompt(hits, "", [])
+            retrieved.append(sum(count_tokens(t) for t in texts))
+            context.append(stats["context_tokens"])
+            snippets.append(len(texts))
+            kept.append(int(stats["context_snippets"].split("/")[0]))
+            dups.append(_near_duplicates(engine, texts, MMR_DUP_THRESHOLD))
+            coverage.append(_coverage(q, texts))
+        out[name] = {
+            "search": _latency(latency),
+            "retrieved_tokens": round(statistics.fmean(retrieved), 1),
+            "context_tokens": round(statistics.fmean(context), 1),
+            # tokens retrieved only for build_prompt to strip again as overlap/duplicates
+            "wasted_tokens": round(statistics.fmean(retrieved) - statistics.fmean(context), 1),
+            "snippets": round(statistics.fmean(snippets), 2),
+            "distinct_snippets_in_prompt": round(statistics.fmean(kept), 2),
+            "near_duplicate_pairs": round(statistics.fmean(dups), 2),
+            "query_coverage": round(statistics.fmean(coverage), 3),
+            "stages": {k: v for k, v in export_json().items() if k.startswith("rerank.")},
+        }
+
+    base = out["baseline"]
+    for name, row in out.items():
+        row["added_p50_ms"] = round(row["search"]["p50_ms"] - base["search"]["p50_ms"], 3)
+        row["added_p99_ms"] = round(row["search"]["p99_ms"] - base["search"]["p99_ms"], 3)
+        row["retrieved_tokens_saved_pct"] = round(
+            100 * (1 - row["retrieved_tokens"] / base["retrieved_tokens"]), 1) if base["retrieved_tokens"] else 0.0
+        row["context_tokens_saved_pct"] = round(
+            100 * (1 - row["context_tokens"] / base["context_tokens"]), 1) if base["context_tokens"] else 0.0
+        row["wasted_tokens_pct"] = round(100 * row["wasted_tokens"] / row["retrieved_tokens"], 1) \
+            if row["retrieved_tokens"] else 0.0
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=50)
+    ap.add_argument("--copies", type=int, default=2, help="times the manual is indexed (document revisions)")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--mode", choices=("dense", "hybrid"), default="hybrid")
+    ap.add_argument("--fetch", type=int, default=4, help="candidates = k * this")
+    ap.add_argument("--mmr-lambda", type=float, default=0.7)
+    ap.add_argument("--embedder", choices=("bow", "real"), default="bow",
+                    help="real = the configured SentenceTransformer (EMBED_MODEL_NAME/EMBED_BACKEND)")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--vector-ms", type=float, default=0.0, help="injected vector store round-trip")
+    ap.add_argument("--cross-ms", type=float, default=0.5, help="fake cross-encoder cost per pair")
+    ap.add_argument("--reranker-model", default="", help="real CrossEncoder model instead of the fake")
+    ap.add_argument("--out", help="also write the JSON report here")
+    args = ap.parse_args()
+
+    _configure_env(tempfile.mkdtemp(prefix="bench-rerank-"))
+    report = {"args": vars(args), "results": bench(args)}
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
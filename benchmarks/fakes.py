@@ -0,0 +1,399 @@
+# In-process stand-ins for the app's external services, with injected latency, so the
+# pipeline can be benchmarked without Qdrant, Redis, Firestore, Gemini or a GPU.
+# Each fake implements only what utils/ calls, and sleeps `*_ms` per round-trip.
+import hashlib, threading, time, types
+import numpy as np
+
+
+def _sleep_ms(ms: float):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+# -----------------------------------------------------------------------------
+# Redis: strings and sorted sets with TTLs. A pipeline costs one round-trip.
+# -----------------------------------------------------------------------------
+def _score_bound(value):
+    if isinstance(value, str):
+        if value in ("-inf", "+inf", "inf"):
+            return float(value), False
+        if value.startswith("("):
+            return float(value[1:]), True
+    return float(value), False
+
+
+class FakeRedis:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self._data = {}        # key -> str or {member: score}
+        self._expires = {}     # key -> monotonic deadline
+        self._lock = threading.RLock()
+
+    def _roundtrip(self):
+        self.calls += 1
+        _sleep_ms(self.latency_ms)
+
+    def _live(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def _zset(self, key) -> dict:
+        value = self._live(key)
+        if value is None:
+            value = self._data[key] = {}
+        return value
+
+    def _sorted(self, key) -> list:
+        return sorted((self._live(key) or {}).items(), key=lambda kv: (kv[1], kv[0]))
+
+    def _in_range(self, score, lo, hi) -> bool:
+        (lo_v, lo_x), (hi_v, hi_x) = lo, hi
+        return (score > lo_v if lo_x else score >= lo_v) and (score < hi_v if hi_x else score <= hi_v)
+
+    # --- commands (unlocked versions are used by pipelines) ---
+    def _ping(self):
+        return True
+
+    def _get(self, key):
+        value = self._live(key)
+        return value if isinstance(value, str) else None
+
+    def _set(self, key, value, ex=None):
+        self._data[key] = value if isinstance(value, str) else str(value)
+        if ex:
+            self._expires[key] = time.monotonic() + ex
+        else:
+            self._expires.pop(key, None)
+        return True
+
+    def _mget(self, *keys):
+        return [self._get(k) for k in keys]
+
+    def _incr(self, key):
+        value = int(self._get(key) or 0) + 1
+        self._data[key] = str(value)
+        return value
+
+    def _delete(self, *keys):
+        n = 0
+        for key in keys:
+            if self._live(key) is not None:
+                n += 1
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return n
+
+    def _expire(self, key, seconds):
+        if self._live(key) is None:
+            return False
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    def _zadd(self, key, mapping: dict):
+        zset = self._zset(key)
+        added = sum(1 for m in mapping if m not in zset)
+        zset.update({m: float(s) for m, s in mapping.items()})
+        return added
+
+    def _zrangebyscore(self, key, min, max, start=None, num=None):
+        lo, hi = _score_bound(min), _score_bound(max)
+        out = [m for m, s in self._sorted(key) if self._in_range(s, lo, hi)]
+        return out[start:start + num] if start is not None and num is not None else out
+
+    def _zrevrangebyscore(self, key, max, min, start=None, num=None):
+        lo, hi = _score_bound(min), _score_bound(max)
+        out = [m for m, s in reversed(self._sorted(key)) if self._in_range(s, lo, hi)]
+        return out[start:start + num] if start is not None and num is not None else out
+
+    def _zremrangebyscore(self, key, min, max):
+        victims = self._zrangebyscore(key, min, max)
+        zset = self._live(key) or {}
+        for m in victims:
+            zset.pop(m, None)
+        return len(victims)
+
+    def _zremrangebyrank(self, key, start, stop):
+        ordered = self._sorted(key)
+        n = len(ordered)
+        start, stop = (start + n if start < 0 else start), (stop + n if stop < 0 else stop)
+        victims = [m for m, _ in ordered[max(start, 0):stop + 1]]
+        zset = self._live(key) or {}
+        for m in victims:
+            zset.pop(m, None)
+        return len(victims)
+
+    def _hset(self, key, field, value):
+        h = self._zset(key)
+        added = field not in h
+        h[field] = value if isinstance(value, str) else str(value)
+        return int(added)
+
+    def _hdel(self, key, *fields):
+        h = self._live(key) or {}
+        return sum(1 for f in fields if h.pop(f, None) is not None)
+
+    def _hvals(self, key):
+        return list((self._live(key) or {}).values())
+
+    def _zcard(self, key):
+        return len(self._live(key) or {})
+
+    def _scan_iter(self, match=None, count=None):
+        import fnmatch
+        keys = [k for k in list(self._data) if self._live(k) is not None]
+        return iter([k for k in keys if match is None or fnmatch.fnmatchcase(k, match)])
+
+    def __getattr__(self, name):
+        impl = type(self).__dict__.get(f"_{name}")
+        if impl is None or name.startswith("_"):
+            raise AttributeError(name)
+
+        def command(*args, **kwargs):
+            self._roundtrip()
+            with self._lock:
+                return impl(self, *args, **kwargs)
+        return command
+
+    def pipeline(self, transaction: bool = True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+        self._queued = []
+
+    def __getattr__(self, name):
+        impl = type(self._redis).__dict__.get(f"_{name}")
+        if impl is None or name.startswith("_"):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self._queued.append((impl, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        self._redis._roundtrip()
+        with self._redis._lock:
+            out = [impl(self._redis, *args, **kwargs) for impl, args, kwargs in self._queued]
+        self._queued = []
+        return out
+
+
+# -----------------------------------------------------------------------------
+# Firestore: collection(name).document(id).get()/set()/delete()
+# -----------------------------------------------------------------------------
+class FakeFirestore:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.reads = 0
+        self.writes = 0
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name: str):
+        client = self
+
+        class _Doc:
+            def __init__(self, doc_id):
+                self.key = (name, doc_id)
+
+            def get(self):
+                _sleep_ms(client.latency_ms)
+                with client._lock:
+                    client.reads += 1
+                    data = client._docs.get(self.key)
+                return types.SimpleNamespace(exists=data is not None,
+                                             to_dict=lambda: dict(data) if data is not None else None)
+
+            def set(self, data: dict):
+                _sleep_ms(client.latency_ms)
+                with client._lock:
+                    client.writes += 1
+                    client._docs[self.key] = dict(data)
+
+            def delete(self):
+                _sleep_ms(client.latency_ms)
+                with client._lock:
+                    client.writes += 1
+                    client._docs.pop(self.key, None)
+
+        return types.SimpleNamespace(document=_Doc)
+
+
+# -----------------------------------------------------------------------------
+# Vector store: wraps a real backend (normally LocalBackend) and adds a network
+# round-trip to every call that would hit Qdrant.
+# -----------------------------------------------------------------------------
+class SlowBackend:
+    REMOTE = {"exists", "create", "drop", "upsert", "delete_ids", "delete_where", "scan", "search"}
+
+    def __init__(self, backend, latency_ms: float = 0.0):
+        self._backend = backend
+        self.latency_ms = latency_ms
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if name not in self.REMOTE or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            _sleep_ms(self.latency_ms)
+            return attr(*args, **kwargs)
+        return call
+
+
+# -----------------------------------------------------------------------------
+# Embedding model: deterministic pseudo-random unit vectors from a hash of the text.
+# Costs `batch_ms` per encode() call plus `text_ms` per text.
+# -----------------------------------------------------------------------------
+class FakeEncoder:
+    def __init__(self, dim: int = 384, batch_ms: float = 0.0, text_ms: float = 0.0):
+        self.dim = dim
+        self.batch_ms = batch_ms
+        self.text_ms = text_ms
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _vector(self, text: str):
+        seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+        v = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+        return v / np.linalg.norm(v)
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, **kwargs):
+        one = isinstance(texts, str)
+        items = [texts] if one else list(texts)
+        _sleep_ms(self.batch_ms + self.text_ms * len(items))
+        out = np.stack([self._vector(t) for t in items]) if items else np.zeros((0, self.dim), np.float32)
+        return out[0] if one else out
+
+
+# Bag-of-words variant: a text's vector is the sum of fixed random vectors of its words,
+# so chunks that share text (CHUNK_OVERLAP, re-uploaded pages) get similar vectors and
+# retrieval quality / diversification can be measured offline.
+class BagOfWordsEncoder(FakeEncoder):
+    def __init__(self, dim: int = 384, batch_ms: float = 0.0, text_ms: float = 0.0):
+        super().__init__(dim, batch_ms, text_ms)
+        self._words = {}
+
+    def _word(self, word: str):
+        v = self._words.get(word)
+        if v is None:
+            v = self._words[word] = FakeEncoder._vector(self, word)
+        return v
+
+    def _vector(self, text: str):
+        words = text.lower().split()
+        if not words:
+            return FakeEncoder._vector(self, text)
+        v = np.sum([self._word(w) for w in words], axis=0)
+        return (v / np.linalg.norm(v)).astype(np.float32)
+
+
+# -----------------------------------------------------------------------------
+# Cross-encoder re-ranker: word-overlap relevance, `pair_ms` per (query, text) pair.
+# -----------------------------------------------------------------------------
+class FakeCrossEncoder:
+    def __init__(self, pair_ms: float = 0.0):
+        self.pair_ms = pair_ms
+        self.calls = 0
+
+    def predict(self, pairs, batch_size: int = 32, show_progress_bar: bool = False, **kwargs):
+        self.calls += 1
+        _sleep_ms(self.pair_ms * len(pairs))
+        out = []
+        for query, text in pairs:
+            q, t = set(query.lower().split()), set(text.lower().split())
+            out.append(len(q & t) / (len(q) ** 0.5 * len(t) ** 0.5) if q and t else 0.0)
+        return np.asarray(out, dtype=np.float32)
+
+
+# -----------------------------------------------------------------------------
+# LLM: a chat session with the surface the GoogleAI backend and the summarizer use.
+# First token after `ttft_ms`, then one token every `token_ms`.
+# -----------------------------------------------------------------------------
+_REPLY_WORDS = ("the", "valve", "assembly", "is", "torqued", "to", "specification", "per", "section",
+                "before", "inspection", "of", "the", "pump", "housing", "and", "seal")
+
+
+class _Response:
+    def __init__(self, tokens: list[str], prompt_chars: int):
+        self._tokens = tokens
+        self.usage_metadata = types.SimpleNamespace(
+            prompt_token_count=prompt_chars // 4,
+            candidates_token_count=len(tokens),
+            total_token_count=prompt_chars // 4 + len(tokens),
+        )
+
+    @property
+    def text(self) -> str:
+        return "".join(self._tokens)
+
+
+class _StreamChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _StreamResponse(_Response):
+    def __init__(self, tokens, prompt_chars, ttft_ms, token_ms):
+        super().__init__(tokens, prompt_chars)
+        self._ttft_ms, self._token_ms = ttft_ms, token_ms
+
+    def __iter__(self):
+        _sleep_ms(self._ttft_ms)
+        for i, tok in enumerate(self._tokens):
+            if i:
+                _sleep_ms(self._token_ms)
+            yield _StreamChunk(tok)
+
+
+class FakeChatSession:
+    def __init__(self, ttft_ms: float = 0.0, token_ms: float = 0.0, reply_tokens: int = 40):
+        self.ttft_ms = ttft_ms
+        self.token_ms = token_ms
+        self.reply_tokens = reply_tokens
+        self.calls = 0
+        self.model = self      # summaries call my_gemini.model.generate_content
+
+    def _tokens(self, content: str) -> list[str]:
+        start = len(content) % len(_REPLY_WORDS)
+        return [_REPLY_WORDS[(start + i) % len(_REPLY_WORDS)] + " " for i in range(self.reply_tokens)]
+
+    def send_message(self, content=None, stream: bool = False, **kwargs):
+        self.calls += 1
+        content = content if isinstance(content, str) else str(content)
+        tokens = self._tokens(content)
+        if stream:
+            return _StreamResponse(tokens, len(content), self.ttft_ms, self.token_ms)
+        _sleep_ms(self.ttft_ms + self.token_ms * max(len(tokens) - 1, 0))
+        return _Response(tokens, len(content))
+
+    def generate_content(self, content, generation_config=None, stream: bool = False, **kwargs):
+        return self.send_message(content, stream=stream)
+
+
+# Same contract as utils.google_generativeai_chat.chat / chat_stream, for trees where
+# google-generativeai is not installed: flatten the prompt and call the session's model.
+def flatten_prompt(system_prompt: str, messages: list[dict]) -> str:
+    history = "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages[:-1])
+    return f"{system_prompt}\n{history}\nUser: {messages[-1]['content']}\nAssistant:"
+
+
+def fake_chat(my_gemini, system_prompt: str, messages: list[dict], **kwargs) -> str:
+    return my_gemini.model.generate_content(flatten_prompt(system_prompt, messages)).text.strip()
+
+
+def fake_chat_stream(my_gemini, system_prompt: str, messages: list[dict], **kwargs):
+    response = my_gemini.model.generate_content(flatten_prompt(system_prompt, messages), stream=True)
+    parts = []
+    for chunk in response:
+        parts.append(chunk.text)
+        yield chunk.text
+    yield {"text": "".join(parts).strip(), "usage": {}}
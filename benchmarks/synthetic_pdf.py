@@ -0,0 +1,61 @@
+# Build synthetic text PDFs for benchmarks without any extra dependencies.
+# Every page gets `lines_per_page` lines of pseudo-manual text in Helvetica.
+import io, random
+
+WORDS = (
+    "pump valve assembly torque bolt gasket pressure sensor calibrate flange "
+    "inspection housing bearing seal clearance lubricate rotor shaft coupling "
+    "procedure warning caution section figure table specification tolerance"
+).split()
+
+
+def _page_text(page_no: int, lines_per_page: int, rng: random.Random) -> list[str]:
+    lines = [f"Section {page_no}.{i} part no. PN-{rng.randint(10000, 99999)}" if i % 10 == 0
+             else " ".join(rng.choice(WORDS) for _ in range(12))
+             for i in range(lines_per_page)]
+    return lines
+
+
+def _escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_synthetic_pdf(num_pages: int = 300, lines_per_page: int = 45, seed: int = 7) -> bytes:
+    rng = random.Random(seed)
+    objects = []  # index i holds the body of object number i+1
+
+    # 1: catalog, 2: pages tree, 3: font; pages/contents follow
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(b"")  # filled in once the page objects are known
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_refs = []
+    for p in range(num_pages):
+        stream = ["BT /F1 10 Tf 12 TL 50 780 Td"]
+        for line in _page_text(p + 1, lines_per_page, rng):
+            stream.append(f"({_escape(line)}) Tj T*")
+        stream.append("ET")
+        body = "\n".join(stream).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(body) + body + b"\nendstream")
+        content_no = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_no
+        )
+        page_refs.append(len(objects))
+
+    kids = " ".join(f"{n} 0 R" for n in page_refs).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % num_pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % i + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for off in offsets:
+        out.write(b"%010d 00000 n \n" % off)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
@@ -0,0 +1,191 @@
+## Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+SERVICE_HOST = os.getenv("SERVICE_HOST", "0.0.0.0")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_MAX_BODY_MB = float(os.getenv("SERVICE_MAX_BODY_MB", "100"))       # largest accepted PDF upload
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import asyncio, json, re
+from urllib.parse import parse_qs
+from utils.chat_service import get_chat_service, ServiceOverloaded
+from utils.metrics import export_prometheus, export_json
+from utils.startup import warm_up, WARMUP_ON_START
+from utils.clients import redis_healthy
+
+# -----------------------------------------------------------------------------
+# Headless HTTP entry point for the chat service (plain ASGI, no web framework).
+#
+#   POST /v1/chats/{chat_id}/turn     {"prompt", "provider"?, "model"?, "stream"?, "tenant"?}
+#        -> JSON result, or with "stream": true NDJSON lines {"delta": ...} ... {"result": {...}}
+#   POST /v1/chats/{chat_id}/reset   {"tenant"?}   (this chat's documents and memory only)
+#   POST /v1/chats/{chat_id}/new-session     (next turn starts a fresh LLM session)
+#   POST /v1/documents?name=manual.pdf&chat_id=...&tenant=...&doc_id=...   (body: the PDF bytes)
+#        doc_id defaults to the file name: a same-named upload replaces that document
+#
+# Without "tenant" the chat's tenant follows TENANT_SCOPE (see utils/tenants.py).
+#   POST /v1/warmup
+#   GET  /v1/stats   /metrics   /metrics.json
+#   GET  /healthz    200 when Redis answers PING, else 503 (and the Redis client is rebuilt)
+#
+# Overload answers 503 with Retry-After; run with e.g.
+#   uvicorn service:app --host 0.0.0.0 --port 8000
+# -----------------------------------------------------------------------------
+service = get_chat_service()
+
+_TURN = re.compile(r"^/v1/chats/([^/]+)/turn$")
+_RESET = re.compile(r"^/v1/chats/([^/]+)/reset$")
+_SESSION = re.compile(r"^/v1/chats/([^/]+)/new-session$")
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: list = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or []
+
+
+async def _read_body(receive) -> bytes:
+    limit = int(SERVICE_MAX_BODY_MB * 2**20)
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(400, "client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            raise HTTPError(413, f"body larger than {SERVICE_MAX_BODY_MB} MB")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def _json_body(raw: bytes) -> dict:
+    try:
+        body = json.loads(raw or b"{}")
+    except ValueError:
+        raise HTTPError(400, "body is not valid JSON")
+    if not isinstance(body, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    return body
+
+
+async def _send(send, status: int, body: bytes, content_type: str, headers: list = None):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", content_type.encode()),
+                            (b"content-length", str(len(body)).encode())] + (headers or [])})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, status: int, payload, headers: list = None):
+    await _send(send, status, json.dumps(payload, default=str).encode(), "application/json", headers)
+
+
+# NDJSON stream of {"delta": text} lines, closed by {"result": {...}}
+async def _send_stream(send, chat_id: str, body: dict):
+    items = service.stream(chat_id, body["prompt"], body.get("provider"), body.get("model"), body.get("tenant"))
+    # Take the first item before committing to a 200, so overload/failures still get a status
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        first = None
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson"), (b"cache-control", b"no-cache")]})
+    try:
+        item = first
+        while item is not None:
+            line = {"result": item} if isinstance(item, dict) else {"delta": item}
+            await send({"type": "http.response.body", "body": json.dumps(line, default=str).encode() + b"\n",
+                        "more_body": True})
+            item = await items.__anext__()
+    except StopAsyncIteration:
+        pass
+    except Exception as e:
+        logger.exception(f"service: stream failed for chat {chat_id}: {e}")
+        await send({"type": "http.response.body", "body": json.dumps({"error": str(e)}).encode() + b"\n",
+                    "more_body": True})
+    finally:
+        await items.aclose()
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _route(scope, receive, send):
+    method, path = scope["method"], scope["path"]
+
+    if path == "/healthz" and method == "GET":
+        redis_ok = await asyncio.to_thread(redis_healthy)
+        return await _send_json(send, 200 if redis_ok else 503, {"ok": redis_ok, "redis": redis_ok})
+    if path == "/v1/stats" and method == "GET":
+        return await _send_json(send, 200, service.stats())
+    if path == "/metrics" and method == "GET":
+        return await _send(send, 200, export_prometheus().encode(), "text/plain; version=0.0.4")
+    if path == "/metrics.json" and method == "GET":
+        return await _send_json(send, 200, export_json())
+    if method != "POST":
+        raise HTTPError(404 if method == "GET" else 405, f"no route for {method} {path}")
+
+    if m := _TURN.match(path):
+        body = _json_body(await _read_body(receive))
+        if not str(body.get("prompt") or "").strip():
+            raise HTTPError(400, "prompt is required")
+        if body.get("stream"):
+            return await _send_stream(send, m.group(1), body)
+        result = await service.turn(m.group(1), body["prompt"], body.get("provider"), body.get("model"),
+                                    body.get("tenant"))
+        return await _send_json(send, 200, result)
+    if m := _RESET.match(path):
+        body = _json_body(await _read_body(receive))
+        return await _send_json(send, 200, await service.reset(m.group(1), body.get("tenant")))
+    if m := _SESSION.match(path):
+        service.drop_sessions(m.group(1))
+        return await _send_json(send, 200, {"new_session": True})
+    if path == "/v1/documents":
+        data = await _read_body(receive)
+        if not data:
+            raise HTTPError(400, "empty upload")
+        query = parse_qs(scope.get("query_string", b"").decode())
+        name, chat_id, tenant, doc_id = (query.get(k, [None])[0] for k in ("name", "chat_id", "tenant", "doc_id"))
+        return await _send_json(send, 200, await service.ingest(data, name, chat_id, tenant, doc_id))
+    if path == "/v1/warmup":
+        return await _send_json(send, 200, await asyncio.to_thread(warm_up))
+    raise HTTPError(404, f"no route for {method} {path}")
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await service.start()
+            if WARMUP_ON_START:
+                asyncio.get_running_loop().run_in_executor(None, warm_up)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await service.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    try:
+        await _route(scope, receive, send)
+    except HTTPError as e:
+        await _send_json(send, e.status, {"error": str(e)}, e.headers)
+    except ServiceOverloaded as e:
+        await _send_json(send, 503, {"error": str(e)}, [(b"retry-after", str(int(e.retry_after) or 1).encode())])
+    except Exception as e:
+        logger.exception(f"service: {scope['method']} {scope['path']} failed: {e}")
+        await _send_json(send, 500, {"error": str(e)})
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("service:app", host=SERVICE_HOST, port=SERVICE_PORT)
@@ -0,0 +1,64 @@
+# Offline test setup: every module reads its settings from the environment at import,
+# so the environment is fixed here, before anything under utils/ is imported. Redis,
+# Firestore, the embedding model and the LLM are the stand-ins from benchmarks/fakes.py;
+# the vector store is the in-process local backend.
+import os, pathlib, sys, tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+WORKDIR = pathlib.Path(tempfile.mkdtemp(prefix="pdfrag-tests-"))
+os.environ.update({
+    "VECTOR_BACKEND": "local",
+    "LOCAL_INDEX_DIR": "",
+    "BM25_INDEX_PATH": str(WORKDIR / "bm25.json"),
+    "MANIFEST_DIR": str(WORKDIR / "manifests"),
+    "EMBED_CACHE_DIR": str(WORKDIR / "embeddings"),
+    "TENANT_SCOPE": "chat",
+    "METRICS_ENABLED": "0",
+    "ANSWER_CACHE_ENABLED": "1",
+    "RERANKER_MODEL": "",
+})
+
+import io
+import pytest
+from benchmarks.fakes import FakeRedis, FakeFirestore, BagOfWordsEncoder
+from benchmarks.synthetic_pdf import make_synthetic_pdf
+
+
+@pytest.fixture(scope="session", autouse=True)
+def encoder():
+    from utils.embeddings import get_embedding_engine
+    get_embedding_engine().set_model(BagOfWordsEncoder(64))
+
+
+@pytest.fixture
+def redis():
+    from utils.clients import set_clients
+    client = FakeRedis()
+    set_clients(client, FakeFirestore())
+    return client
+
+
+# Empty collection, BM25 indexes, manifests, index versions and answer cache per test
+@pytest.fixture
+def store(redis):
+    from utils import vector_store
+    from utils.vector_backends import get_vector_backend
+    vector_store.set_store(get_vector_backend(vector_store.COLLECTION, "local"))
+    vector_store.reset_qdrant_collection()
+    with vector_store._init_lock:
+        vector_store._lexical.clear()
+    vector_store._versions.clear()
+    vector_store._contents.clear()
+    return vector_store.get_store()
+
+
+# make_pdf(pages, seed, name) -> an uploaded-file-like synthetic manual
+@pytest.fixture
+def make_pdf():
+    def make(pages: int = 3, seed: int = 1, name: str = "manual.pdf"):
+        f = io.BytesIO(make_synthetic_pdf(pages, seed=seed))
+        f.name = name
+        return f
+    return make
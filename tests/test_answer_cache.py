@@ -0,0 +1,41 @@
+import numpy as np
+from utils.answer_cache import AnswerCache
+
+
+def test_lookup_needs_a_close_question_and_the_same_version():
+    cache = AnswerCache(threshold=0.95, ttl=60, size=8)
+    cache.store([1.0, 0.0, 0.0], "pdf_chunks/alice:0.1", "answer")
+    assert cache.lookup([1.0, 0.01, 0.0], "pdf_chunks/alice:0.1") == "answer"
+    assert cache.lookup([0.0, 1.0, 0.0], "pdf_chunks/alice:0.1") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "pdf_chunks/alice:0.2") is None
+
+
+def test_expired_entries_are_ignored():
+    cache = AnswerCache(threshold=0.95, ttl=-1, size=8)
+    cache.store([1.0, 0.0], "v", "answer")
+    assert cache.lookup([1.0, 0.0], "v") is None
+
+
+def test_full_cache_replaces_least_recently_used():
+    cache = AnswerCache(threshold=0.99, ttl=60, size=2)
+    cache.store([1.0, 0.0, 0.0], "v", "first")
+    cache.store([0.0, 1.0, 0.0], "v", "second")
+    assert cache.lookup([1.0, 0.0, 0.0], "v") == "first"
+    cache.store([0.0, 0.0, 1.0], "v", "third")
+    assert cache.lookup([0.0, 1.0, 0.0], "v") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "v") == "first"
+
+
+def test_invalidate_prefix_only_drops_that_tenant():
+    cache = AnswerCache(threshold=0.95, ttl=60, size=8)
+    q = np.ones(4)
+    cache.store(q, "pdf_chunks/alice:0.1", "A")
+    cache.store(q, "pdf_chunks/alice-2:0.1", "A2")
+    cache.store(q, "pdf_chunks/bob:0.1", "B")
+    cache.invalidate(prefix="pdf_chunks/alice:")
+    assert cache.lookup(q, "pdf_chunks/alice:0.1") is None
+    assert cache.lookup(q, "pdf_chunks/alice-2:0.1") == "A2"
+    assert cache.lookup(q, "pdf_chunks/bob:0.1") == "B"
+    cache.invalidate()
+    assert cache.lookup(q, "pdf_chunks/bob:0.1") is None
+    assert cache.stats()["invalidations"] == 2
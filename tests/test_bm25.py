@@ -0,0 +1,39 @@
+import pytest
+from utils.bm25 import BM25Index, rrf_fuse, tokenize
+
+
+def test_tokenize_keeps_identifiers_whole_and_split():
+    assert tokenize("See PN-10432") == ["see", "pn-10432", "pn", "10432"]
+
+
+def test_bm25_ranks_exact_terms_and_removes_documents(tmp_path):
+    index = BM25Index(tmp_path / "bm25.json")
+    index.add(["p1", "p2", "p3"], ["pump valve PN-10432", "torque the flange bolts", "pump housing"], "a.pdf")
+    index.add(["p4"], ["valve seat PN-55555"], "b.pdf")
+    assert [pid for pid, _, _ in index.search("PN-10432", 2)][0] == "p1"
+    assert {pid for pid, _, _ in index.search("pump", 5)} == {"p1", "p3"}
+
+    index.remove_doc("a.pdf")
+    assert [pid for pid, _, _ in index.search("valve", 5)] == ["p4"]
+    assert index.search("pump", 5) == []
+
+
+def test_bm25_flush_and_reload_keeps_version(tmp_path):
+    index = BM25Index(tmp_path / "bm25.json")
+    index.rebuild([("p1", "pump valve", "a.pdf")], version=[3, 7])
+    index.flush()
+    reloaded = BM25Index(tmp_path / "bm25.json")
+    assert reloaded.version == [3, 7]
+    assert [pid for pid, _, _ in reloaded.search("valve", 1)] == ["p1"]
+
+
+def test_rrf_fuse_rewards_agreement():
+    fused = rrf_fuse([["a", "b", "c"], ["c", "a", "d"]], [1.0, 1.0], k=60)
+    assert [pid for pid, _ in fused][:2] == ["a", "c"]
+    assert dict(fused)["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert dict(fused)["d"] == pytest.approx(1 / 63)
+
+
+def test_rrf_fuse_weights():
+    fused = rrf_fuse([["a"], ["b"]], [1.0, 2.0], k=60)
+    assert [pid for pid, _ in fused] == ["b", "a"]
@@ -0,0 +1,148 @@
+# Chat service (user-023): admission control, streaming turns, the in-process client
+# and the HTTP routes of service.py, with the fake LLM provider below.
+import asyncio, json, sys, types
+
+import pytest
+
+from benchmarks.fakes import FakeChatSession, fake_chat, fake_chat_stream
+from utils import chat_service
+from utils.chat_client import LocalChatClient
+from utils.chat_service import ChatService, ServiceOverloaded
+from utils.chat_turn import astream_turn
+from utils.memory import recall_short
+from utils.vector_store import load_pdf_to_qdrant
+
+
+# "Fake" provider: every session answers after provider.ttft_ms
+@pytest.fixture
+def provider(monkeypatch):
+    fake = types.SimpleNamespace(ttft_ms=0.0)
+    module = types.ModuleType("fake_provider")
+    module.init_chat = lambda model_name=None: FakeChatSession(ttft_ms=fake.ttft_ms, reply_tokens=5)
+    module.chat, module.chat_stream = fake_chat, fake_chat_stream
+    monkeypatch.setitem(sys.modules, "fake_provider", module)
+    monkeypatch.setitem(chat_service.MODULE_BY_PROVIDER, "Fake", "fake_provider")
+    return fake
+
+
+def _service(**kwargs) -> ChatService:
+    return ChatService(provider="Fake", model_name="fake", **kwargs)
+
+
+async def _outcomes(service, n):
+    turns = [service.turn(f"chat-{i}", f"question {i}") for i in range(n)]
+    return await asyncio.gather(*turns, return_exceptions=True)
+
+
+def test_turns_beyond_the_wait_queue_are_rejected(store, redis, provider):
+    provider.ttft_ms = 200
+    service = _service(max_turns=1, max_waiting=1, queue_timeout=5)
+    results = asyncio.run(_outcomes(service, 3))
+    rejected = [r for r in results if isinstance(r, ServiceOverloaded)]
+    assert len(rejected) == 1 and "waiting" in str(rejected[0])
+    assert service.stats()["turns"] == 2 and service.stats()["rejected"] == 1
+    assert service.stats()["in_flight"] == 0 and service.stats()["waiting"] == 0
+
+
+def test_turns_waiting_past_the_queue_timeout_are_rejected(store, redis, provider):
+    provider.ttft_ms = 300
+    service = _service(max_turns=1, max_waiting=4, queue_timeout=0.05)
+    results = asyncio.run(_outcomes(service, 2))
+    rejected = [r for r in results if isinstance(r, ServiceOverloaded)]
+    assert len(rejected) == 1 and rejected[0].retry_after == 0.05
+    assert service.stats()["turns"] == 1
+
+
+def test_astream_turn_yields_deltas_then_the_result(store, redis, make_pdf):
+    load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="chat-1")
+    session = FakeChatSession(reply_tokens=5)
+
+    async def collect():
+        return [item async for item in astream_turn("chat-1", "how do I torque the pump valve?",
+                                                    session, fake_chat_stream, redis)]
+    items = asyncio.run(collect())
+    deltas, result = items[:-1], items[-1]
+    assert len(deltas) == 5 and all(isinstance(d, str) for d in deltas)
+    assert result["answer"] == "".join(deltas).strip()
+    assert not result["cached"] and "ttft" in result["timings"]
+    recent, _ = recall_short("chat-1", redis)
+    assert [m["role"] for m in recent] == ["user", "assistant"]
+
+
+def test_local_client_streams_and_releases_the_slot_when_closed_early(store, redis, provider):
+    client = LocalChatClient(_service(max_turns=1))
+    items = list(client.stream("chat-1", "what is the rotor torque?"))
+    assert isinstance(items[-1], dict) and items[-1]["answer"] == "".join(items[:-1]).strip()
+
+    stream = client.stream("chat-2", "and the stator?")
+    assert isinstance(next(stream), str)
+    stream.close()
+    assert client.stats()["in_flight"] == 0
+    assert client.turn("chat-3", "anything else?")["answer"]      # the only slot is free again
+
+
+# ---- service.py over ASGI ----------------------------------------------------------
+@pytest.fixture
+def app(store, redis, provider, monkeypatch):
+    import service
+    monkeypatch.setattr(service, "service", _service(max_turns=1, max_waiting=0, queue_timeout=0.05))
+    return service
+
+
+async def _request(app, method, path, body=b"", query=b""):
+    scope = {"type": "http", "method": method, "path": path, "query_string": query}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    out = {"status": None, "headers": {}, "body": b""}
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            out["status"], out["headers"] = message["status"], dict(message.get("headers", []))
+        else:
+            out["body"] += message.get("body", b"")
+
+    await app.app(scope, receive, send)
+    return out
+
+
+def _call(app, method, path, body=b"", query=b""):
+    return asyncio.run(_request(app, method, path, body, query))
+
+
+def test_service_routes(app, make_pdf):
+    pdf = make_pdf(seed=1, name="a.pdf").getvalue()
+    r = _call(app, "POST", "/v1/documents", pdf, b"name=a.pdf&chat_id=chat-1")
+    assert r["status"] == 200 and json.loads(r["body"])["tenant"] == "chat-1"
+
+    r = _call(app, "POST", "/v1/chats/chat-1/turn", json.dumps({"prompt": "pump valve torque?"}).encode())
+    assert r["status"] == 200 and json.loads(r["body"])["answer"]
+
+    r = _call(app, "POST", "/v1/chats/chat-1/turn", json.dumps({"prompt": "rotor?", "stream": True}).encode())
+    lines = [json.loads(line) for line in r["body"].splitlines()]
+    assert r["status"] == 200 and r["headers"][b"content-type"] == b"application/x-ndjson"
+    assert all("delta" in line for line in lines[:-1]) and "result" in lines[-1]
+
+    assert _call(app, "POST", "/v1/chats/chat-1/reset", b"{}")["status"] == 200
+    assert _call(app, "POST", "/v1/chats/chat-1/new-session")["status"] == 200
+    assert json.loads(_call(app, "GET", "/v1/stats")["body"])["turns"] == 2
+
+
+def test_service_rejects_bad_requests(app):
+    assert _call(app, "POST", "/v1/chats/chat-1/turn", b"{bad")["status"] == 400
+    assert _call(app, "POST", "/v1/chats/chat-1/turn", b'{"prompt": " "}')["status"] == 400
+    assert _call(app, "POST", "/v1/documents")["status"] == 400
+    assert _call(app, "GET", "/nope")["status"] == 404
+    assert _call(app, "PUT", "/v1/stats")["status"] == 405
+
+
+def test_service_answers_503_with_retry_after_when_overloaded(app, provider):
+    provider.ttft_ms = 300
+    body = json.dumps({"prompt": "question"}).encode()
+
+    async def both():
+        return await asyncio.gather(*(_request(app, "POST", f"/v1/chats/chat-{i}/turn", body) for i in range(2)))
+    responses = sorted(asyncio.run(both()), key=lambda r: r["status"])
+    assert [r["status"] for r in responses] == [200, 503]
+    assert responses[1]["headers"][b"retry-after"] == b"1"
@@ -0,0 +1,61 @@
+import asyncio
+from benchmarks.fakes import FakeChatSession, fake_chat
+from utils import vector_store as vs
+from utils.answer_cache import answer_cache
+from utils.chat_turn import run_turn
+
+QUESTION = "how do I torque the pump valve?"
+
+
+def _turn(chat_id, prompt, session, redis, tenant=None):
+    return asyncio.run(run_turn(chat_id, prompt, session, fake_chat, redis, tenant))
+
+
+def test_chats_with_the_same_document_share_answers(store, redis, make_pdf):
+    # default TENANT_SCOPE=chat: every chat is its own tenant
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="chat-1")
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="manual.pdf"), tenant="chat-2")
+    session = FakeChatSession(reply_tokens=5)
+
+    first = _turn("chat-1", QUESTION, session, redis)
+    second = _turn("chat-2", QUESTION, session, redis)
+    assert not first["cached"] and second["cached"]
+    assert second["answer"] == first["answer"]
+    assert session.calls == 1
+
+
+def test_chats_with_other_documents_do_not_share_answers(store, redis, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="chat-1")
+    vs.load_pdf_to_qdrant(make_pdf(seed=2, name="a.pdf"), tenant="chat-2")
+    session = FakeChatSession(reply_tokens=5)
+
+    _turn("chat-1", QUESTION, session, redis)
+    assert not _turn("chat-2", QUESTION, session, redis)["cached"]
+    assert session.calls == 2
+
+
+def test_follow_up_questions_skip_the_answer_cache(store, redis, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="team")
+    session = FakeChatSession(reply_tokens=5)
+
+    _turn("chat-1", QUESTION, session, redis, "team")
+    _turn("chat-2", "what is the flange tolerance?", session, redis, "team")
+    lookups = answer_cache.stats()
+    # chat-2 now has history: the same words may refer to something else
+    again = _turn("chat-2", QUESTION, session, redis, "team")
+    assert not again["cached"]
+    assert session.calls == 3
+    after = answer_cache.stats()
+    assert (after["hits"], after["misses"]) == (lookups["hits"], lookups["misses"])
+
+
+def test_cached_answers_are_dropped_when_the_documents_change(store, redis, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="team")
+    session = FakeChatSession(reply_tokens=5)
+
+    _turn("chat-1", QUESTION, session, redis, "team")
+    vs.load_pdf_to_qdrant(make_pdf(seed=2, name="b.pdf"), tenant="team")
+    assert not _turn("chat-2", QUESTION, session, redis, "team")["cached"]
+    vs.delete_document("b.pdf", tenant="team")
+    assert _turn("chat-3", QUESTION, session, redis, "team")["cached"]
+    assert session.calls == 2
@@ -0,0 +1,45 @@
+# Client health (user-010): a failed Redis ping drops the client so the next call
+# reconnects, and /healthz and warm_up report it.
+import asyncio, json
+
+from benchmarks.fakes import FakeRedis
+from utils import clients
+from utils.startup import warm_up
+
+
+class _DeadRedis(FakeRedis):
+    def ping(self):
+        raise ConnectionError("connection refused")
+
+
+def _healthz():
+    import service
+    out = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            out["status"] = message["status"]
+        else:
+            out["body"] = json.loads(message["body"])
+    asyncio.run(service.app({"type": "http", "method": "GET", "path": "/healthz"}, receive, send))
+    return out
+
+
+def test_healthz_checks_redis(redis):
+    assert _healthz() == {"status": 200, "body": {"ok": True, "redis": True}}
+
+
+def test_failed_ping_drops_the_redis_client(redis):
+    clients.set_clients(_DeadRedis())
+    firestore = clients.get_firestore()
+    assert _healthz() == {"status": 503, "body": {"ok": False, "redis": False}}
+    assert clients._redis is None and clients.get_firestore() is firestore
+
+
+def test_warm_up_reports_a_dead_redis(redis):
+    clients.set_clients(_DeadRedis())
+    assert str(warm_up()["redis"]).startswith("failed:")
+    assert clients._redis is None
@@ -0,0 +1,61 @@
+import numpy as np
+from utils.embedding_cache import EmbeddingCache
+
+
+def _vectors(n: int, start: int = 0, dim: int = 4):
+    return np.arange(start, start + n, dtype=np.float32)[:, None].repeat(dim, axis=1)
+
+
+def test_round_trip_and_reopen(tmp_path):
+    cache = EmbeddingCache("model", 4, root=tmp_path, max_rows=100)
+    cache.put_many(["a", "b"], _vectors(2))
+    got = cache.get_many(["a", "b", "c"])
+    assert set(got) == {"a", "b"}
+    assert np.allclose(got["b"], 1.0)
+
+    reopened = EmbeddingCache("model", 4, root=tmp_path, max_rows=100)
+    assert np.allclose(reopened.get_many(["a"])["a"], 0.0)
+    # another model or dimension never sees these vectors
+    assert EmbeddingCache("other", 4, root=tmp_path).get_many(["a"]) == {}
+    assert EmbeddingCache("model", 8, root=tmp_path).get_many(["a"]) == {}
+
+
+def test_grows_then_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache("model", 4, root=tmp_path, max_rows=1500)
+    hashes = [f"h{i}" for i in range(1500)]
+    cache.put_many(hashes[:1000], _vectors(1000))
+    assert cache.capacity == 1024
+    cache.put_many(hashes[1000:], _vectors(500, 1000))
+    assert cache.capacity == 1500 and len(cache) == 1500
+
+    cache.get_many(hashes[:10])                 # recently used: must survive
+    cache.put_many(["new1", "new2"], _vectors(2, 5000))
+    assert len(cache) == 1500
+    assert set(cache.get_many(hashes[:10])) == set(hashes[:10])
+    assert len(cache.get_many(hashes[10:])) == 1488
+    assert np.allclose(cache.get_many(["new2"])["new2"], 5001.0)
+
+
+def test_instances_share_entries_and_rows(tmp_path):
+    # two caches on one directory behave like two worker processes
+    one = EmbeddingCache("model", 4, root=tmp_path, max_rows=100)
+    two = EmbeddingCache("model", 4, root=tmp_path, max_rows=100)
+    one.put_many(["a"], _vectors(1, 1))
+    two.put_many(["b"], _vectors(1, 2))
+    assert np.allclose(two.get_many(["a"])["a"], 1.0)
+    assert np.allclose(one.get_many(["b"])["b"], 2.0)
+    assert one.index["a"] != one.index["b"]
+
+
+def test_journal_is_compacted_into_a_snapshot(tmp_path):
+    cache = EmbeddingCache("model", 4, root=tmp_path, max_rows=64)
+    other = EmbeddingCache("model", 4, root=tmp_path, max_rows=64)
+    for i in range(200):                        # every put past 64 rows evicts one
+        cache.put_many([f"h{i}" for i in range(i * 30, i * 30 + 30)], _vectors(30, i * 30))
+    assert cache.generation > 0
+    assert (tmp_path / "model-4" / "index.json").exists()
+    assert not (tmp_path / "model-4" / "journal-0.log").exists()
+    last = [f"h{i}" for i in range(199 * 30, 200 * 30)]
+    got = other.get_many(last)
+    assert set(got) == set(last)
+    assert np.allclose(got[last[-1]], 5999.0)
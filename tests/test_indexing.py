@@ -0,0 +1,50 @@
+from utils import vector_store as vs
+
+
+def _doc_ids(store, tenant: str) -> set:
+    return {p["doc_id"] for _, p in store.scan({"tenant": tenant}, ["doc_id"])}
+
+
+def test_reuploading_an_unchanged_document_upserts_nothing(store, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="alice")
+    before = {pid for pid, _ in store.scan({"tenant": "alice"}, [])}
+    counts = []
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), lambda stage, n: counts.append((stage, n)),
+                          tenant="alice")
+    assert not [n for stage, n in counts if stage == "upserted"]      # nothing re-embedded
+    assert {pid for pid, _ in store.scan({"tenant": "alice"}, [])} == before
+
+
+def test_explicit_doc_id_keeps_same_named_files_apart(store, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="manual.pdf"), tenant="alice", doc_id="a/manual.pdf")
+    vs.load_pdf_to_qdrant(make_pdf(seed=2, name="manual.pdf"), tenant="alice", doc_id="b/manual.pdf")
+    assert _doc_ids(store, "alice") == {"a/manual.pdf", "b/manual.pdf"}
+    vs.load_pdf_to_qdrant(make_pdf(seed=3, name="manual.pdf"), tenant="alice")
+    vs.load_pdf_to_qdrant(make_pdf(seed=4, name="manual.pdf"), tenant="alice")
+    assert _doc_ids(store, "alice") == {"a/manual.pdf", "b/manual.pdf", "manual.pdf"}
+
+
+def _upserted(pdf, tenant: str) -> int:
+    counts = []
+    vs.load_pdf_to_qdrant(pdf, lambda stage, n: counts.append((stage, n)), tenant=tenant)
+    return max([n for stage, n in counts if stage == "upserted"], default=0)
+
+
+def test_switching_the_embedding_re_embeds_every_chunk(store, make_pdf, monkeypatch):
+    first = _upserted(make_pdf(seed=1, name="a.pdf"), "alice")
+    assert first > 0
+    assert _upserted(make_pdf(seed=1, name="a.pdf"), "alice") == 0
+
+    # same model, another EMBED_BACKEND: the manifest no longer vouches for the vectors
+    monkeypatch.setattr(vs.ENGINE, "cache_tag", f"{vs.ENGINE.model_name}@onnx")
+    assert _upserted(make_pdf(seed=1, name="a.pdf"), "alice") == first
+    assert vs.load_manifest("a.pdf", "alice")["model"] == vs.ENGINE.cache_tag
+    assert _upserted(make_pdf(seed=1, name="a.pdf"), "alice") == 0
+
+
+def test_switching_the_embedding_drops_chunks_the_new_version_lacks(store, make_pdf, monkeypatch):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="alice")
+    monkeypatch.setattr(vs.ENGINE, "cache_tag", f"{vs.ENGINE.model_name}@onnx")
+    vs.load_pdf_to_qdrant(make_pdf(seed=2, name="a.pdf"), tenant="alice")
+    points = {pid for pid, _ in store.scan({"tenant": "alice"}, [])}
+    assert points == set(vs.load_manifest("a.pdf", "alice")["chunks"].values())
@@ -0,0 +1,45 @@
+import importlib, sys, types
+import pytest
+
+
+class _Model:
+    def __init__(self):
+        self.requests = []
+
+    def generate_content(self, content, generation_config=None, stream=False):
+        self.requests.append((content, generation_config))
+        reply = types.SimpleNamespace(text="ok", usage_metadata=None)
+        return iter([reply]) if stream else reply
+
+
+class _Session:
+    def __init__(self):
+        self.model = _Model()
+
+    def send_message(self, *args, **kwargs):
+        raise AssertionError("ChatSession.send_message resends the whole session history")
+
+
+@pytest.fixture
+def googleai(monkeypatch):
+    genai = types.ModuleType("google.generativeai")
+    genai.GenerationConfig = lambda **kw: kw
+    google = types.ModuleType("google")
+    google.generativeai = genai
+    monkeypatch.setitem(sys.modules, "google", google)
+    monkeypatch.setitem(sys.modules, "google.generativeai", genai)
+    monkeypatch.delitem(sys.modules, "utils.google_generativeai_chat", raising=False)
+    return importlib.import_module("utils.google_generativeai_chat")
+
+
+def test_googleai_sends_only_the_budgeted_prompt(googleai):
+    session = _Session()
+    messages = [{"role": "user", "content": "q1"}, {"role": "assistant", "content": "a1"},
+                {"role": "user", "content": "q2"}]
+    assert googleai.chat(session, "system", messages, max_output_tokens=64, temperature=0.2) == "ok"
+    assert list(googleai.chat_stream(session, "system", messages[:1]))[-1]["text"] == "ok"
+
+    (first, config), (second, _) = session.model.requests
+    assert first == "system\nUser: q1\nAssistant: a1\nUser: q2\nAssistant:"
+    assert config == {"max_output_tokens": 64, "temperature": 0.2}
+    assert "a1" not in second
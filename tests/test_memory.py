@@ -0,0 +1,47 @@
+# Rolling summaries (user-012): store_long builds on the stored summary in Firestore,
+# not on the hot-path summary cache.
+import types
+
+from utils.clients import get_firestore
+from utils.memory import store_long, fetch_summary, SUMMARY_COLLECTION
+
+
+class _Summarizer:
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+        self.model = self
+
+    def generate_content(self, content, **kwargs):
+        self.prompts.append(content)
+        return types.SimpleNamespace(text=self.text)
+
+
+def _msgs(*stamps):
+    return [{"ts": ts, "role": "user", "content": f"message at {ts}"} for ts in stamps]
+
+
+def test_store_long_reads_prior_summary_from_firestore(redis):
+    chat = "chat-rolling"
+    store_long(_Summarizer("first summary"), chat, _msgs(1.0, 2.0))
+    assert fetch_summary(chat) == "first summary"       # cache now holds this doc
+
+    # another instance folds in more messages; this process still has the old copy cached
+    get_firestore().collection(SUMMARY_COLLECTION).document(chat).set(
+        {"summary": "second summary", "hwm_ts": 3.0, "last_ts": 0.0})
+    assert fetch_summary(chat) == "first summary"
+
+    llm = _Summarizer("third summary")
+    store_long(llm, chat, _msgs(1.0, 2.0, 3.0, 4.0))
+    assert len(llm.prompts) == 1
+    assert "Running summary: second summary" in llm.prompts[0]
+    assert "message at 4.0" in llm.prompts[0] and "message at 3.0" not in llm.prompts[0]
+    assert fetch_summary(chat) == "third summary"
+
+
+def test_store_long_skips_messages_already_summarized(redis):
+    chat = "chat-caught-up"
+    store_long(_Summarizer("summary"), chat, _msgs(1.0, 2.0))
+    llm = _Summarizer("unused")
+    store_long(llm, chat, _msgs(1.0, 2.0))
+    assert llm.prompts == []
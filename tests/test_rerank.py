@@ -0,0 +1,31 @@
+import numpy as np
+from utils.rerank import Reranker, mmr_select
+
+
+def test_mmr_drops_near_duplicates():
+    vectors = [[1, 0, 0], [1, 0.01, 0], [0, 1, 0], [0, 0, 1]]
+    picked = mmr_select(vectors, [1.0, 0.99, 0.5, 0.4], k=3, lam=0.7, dup_threshold=0.95)
+    assert picked == [0, 2, 3]
+
+
+def test_mmr_prefers_diverse_over_slightly_more_relevant():
+    vectors = [[1, 0], [0.9, 0.44], [0, 1]]
+    picked = mmr_select(vectors, [1.0, 0.9, 0.8], k=2, lam=0.5, dup_threshold=1.01)
+    assert picked == [0, 2]
+    # relevance only: plain top-k
+    assert mmr_select(vectors, [1.0, 0.9, 0.8], k=2, lam=1.0, dup_threshold=1.01) == [0, 1]
+
+
+def test_reranker_passes_through_when_disabled():
+    reranker = Reranker(mmr=False, model_name="")
+    candidates = [("a", 0.9, None), ("b", 0.8, None), ("c", 0.7, None)]
+    assert reranker.fetch_k(2) == 2
+    assert reranker.select("q", candidates, 2) == [("a", 0.9), ("b", 0.8)]
+
+
+def test_reranker_mmr_keeps_scores_of_picked_candidates():
+    reranker = Reranker(mmr=True, mmr_lambda=0.7, dup_threshold=0.95, fetch=3, model_name="")
+    candidates = [("a", 0.9, np.array([1.0, 0.0])), ("a'", 0.89, np.array([1.0, 0.001])),
+                  ("b", 0.5, np.array([0.0, 1.0]))]
+    assert reranker.fetch_k(2) == 6
+    assert reranker.select("q", candidates, 2) == [("a", 0.9), ("b", 0.5)]
@@ -0,0 +1,87 @@
+import pathlib
+import numpy as np
+from utils import vector_store as vs
+from utils.answer_cache import answer_cache
+from utils.tenants import resolve_tenant, tenant_key
+
+
+def _doc_ids(store, tenant: str) -> set:
+    return {p["doc_id"] for _, p in store.scan({"tenant": tenant}, ["doc_id"])}
+
+
+def test_tenant_ids_are_safe_and_follow_scope():
+    assert tenant_key("alice") == "alice"
+    assert tenant_key("../etc") != "../etc" and tenant_key("../etc").startswith("t-")
+    assert resolve_tenant("chat-1") == "chat-1"                # TENANT_SCOPE=chat
+    assert resolve_tenant("chat-1", "team") == "team"
+
+
+def test_tenants_only_search_their_own_documents(store, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="alice")
+    vs.load_pdf_to_qdrant(make_pdf(seed=2, name="b.pdf"), tenant="bob")
+    alice = {p["text"] for _, p in store.scan({"tenant": "alice"}, ["text"])}
+    bob = {p["text"] for _, p in store.scan({"tenant": "bob"}, ["text"])}
+
+    for mode in ("dense", "hybrid"):
+        assert set(vs.similarity_search("pump valve torque", 5, tenant="alice")) <= alice
+        hits = vs.similarity_search_scored("pump valve torque", 5, mode=mode, tenant="bob")
+        assert hits and {t for t, _ in hits} <= bob
+    assert vs.similarity_search("pump valve", 5, tenant="carol") == []
+
+
+def test_same_file_in_two_tenants_does_not_share_points(store, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="alice")
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="bob")
+    alice = {pid for pid, _ in store.scan({"tenant": "alice"}, [])}
+    bob = {pid for pid, _ in store.scan({"tenant": "bob"}, [])}
+    assert alice and len(alice) == len(bob) and not alice & bob
+
+
+def test_reset_tenant_leaves_other_tenants_intact(store, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="alice")
+    vs.load_pdf_to_qdrant(make_pdf(seed=2, name="b.pdf"), tenant="bob")
+    q = np.ones(64)
+    answer_cache.store(q, vs.content_version("alice"), "A")
+    answer_cache.store(q * 2, vs.content_version("bob"), "B")
+    bob_version = vs.index_version("bob")
+
+    vs.reset_tenant("bob")
+
+    assert _doc_ids(store, "bob") == set()
+    assert vs.similarity_search("pump valve", 5, tenant="bob") == []
+    assert vs.index_version("bob") != bob_version
+    assert answer_cache.lookup(q * 2, vs.content_version("bob")) is None
+    assert _doc_ids(store, "alice") == {"a.pdf"}
+    assert vs.similarity_search("pump valve", 5, tenant="alice")
+    assert answer_cache.lookup(q, vs.content_version("alice")) == "A"
+
+
+def test_delete_document_keeps_the_tenants_other_documents(store, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="alice")
+    vs.load_pdf_to_qdrant(make_pdf(seed=2, name="b.pdf"), tenant="alice")
+    vs.delete_document("a.pdf", tenant="alice")
+    assert _doc_ids(store, "alice") == {"b.pdf"}
+    assert all(d == "b.pdf" for d in vs.get_lexical("alice").docs.values())
+
+
+def test_change_made_by_another_instance_rebuilds_the_lexical_index(store, redis, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="alice")
+    assert vs.similarity_search_scored("pump valve", 5, mode="hybrid", tenant="alice")
+
+    # another instance resets alice: points gone from the shared store, version bumped in Redis
+    store.delete_where({"tenant": "alice"})
+    redis.incr(vs._version_key("alice"))
+    vs._versions.clear()                        # this instance's cached version has expired
+
+    assert vs.similarity_search_scored("pump valve", 5, mode="hybrid", tenant="alice") == []
+    assert len(vs.get_lexical("alice")) == 0
+
+
+def test_reset_collection_removes_every_tenants_files(store, make_pdf):
+    vs.load_pdf_to_qdrant(make_pdf(seed=1, name="a.pdf"), tenant="alice")
+    vs.load_pdf_to_qdrant(make_pdf(seed=2, name="b.pdf"), tenant="bob")
+    bm25_files = lambda: list((pathlib.Path(vs.BM25_INDEX_PATH).parent / "tenants").glob("*/bm25.json"))
+    assert len(bm25_files()) == 2
+    vs.reset_qdrant_collection()
+    assert bm25_files() == []
+    assert vs.similarity_search("pump valve", 5, tenant="alice") == []
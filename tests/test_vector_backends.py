@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from utils.vector_backends import LocalBackend, VectorBackend, CollectionMissing
+
+
+@pytest.fixture
+def backend():
+    b = LocalBackend("test", root=None)
+    b.create(4)
+    b.upsert(["a1", "a2", "b1"],
+             [[1, 0, 0, 0], [0.9, 0.1, 0, 0], [1, 0, 0, 0]],
+             [{"tenant": "alice", "doc_id": "x.pdf"}, {"tenant": "alice", "doc_id": "y.pdf"},
+              {"tenant": "bob", "doc_id": "x.pdf"}])
+    return b
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        VectorBackend("test")
+
+
+def test_matching_rows_filters_on_every_field(backend):
+    assert sorted(backend.ids[r] for r in backend._matching_rows({"tenant": "alice"})) == ["a1", "a2"]
+    assert [backend.ids[r] for r in backend._matching_rows({"tenant": "alice", "doc_id": "x.pdf"})] == ["a1"]
+    assert len(backend._matching_rows({"tenant": "carol"})) == 0
+
+
+def test_search_only_returns_the_tenants_points(backend):
+    hits = backend.search([1, 0, 0, 0], 10, where={"tenant": "bob"})
+    assert [h.id for h in hits] == ["b1"]
+    hits = backend.search([1, 0, 0, 0], 10, where={"tenant": "alice"})
+    assert [h.id for h in hits] == ["a1", "a2"]
+    assert hits[0].score == pytest.approx(1.0)
+    assert backend.search([1, 0, 0, 0], 10, where={"tenant": "carol"}) == []
+
+
+def test_row_cache_is_dropped_on_write(backend):
+    assert len(backend.search([1, 0, 0, 0], 10, where={"tenant": "bob"})) == 1
+    backend.upsert(["b2"], [[0, 1, 0, 0]], [{"tenant": "bob", "doc_id": "z.pdf"}])
+    assert {h.id for h in backend.search([1, 0, 0, 0], 10, where={"tenant": "bob"})} == {"b1", "b2"}
+    backend.delete_where({"tenant": "alice"})
+    assert backend.search([1, 0, 0, 0], 10, where={"tenant": "alice"}) == []
+    assert {pid for pid, _ in backend.scan({"tenant": "bob"}, ["doc_id"])} == {"b1", "b2"}
+
+
+def test_search_with_vectors(backend):
+    hit = backend.search([1, 0, 0, 0], 1, with_vectors=True, where={"tenant": "bob"})[0]
+    assert np.allclose(hit.vector, [1, 0, 0, 0])
+
+
+def test_search_on_missing_collection_raises():
+    with pytest.raises(CollectionMissing):
+        LocalBackend("missing", root=None).search([1, 0], 3)
+
+
+# Minimal qdrant_client stand-in: a collection registry shared by several "instances"
+class _UnexpectedResponse(Exception):
+    def __init__(self, status_code):
+        super().__init__(status_code)
+        self.status_code = status_code
+
+
+class _FakeQdrant:
+    collections = {}
+
+    def __init__(self, url=None, api_key=None):
+        pass
+
+    def get_collections(self):
+        from types import SimpleNamespace
+        return SimpleNamespace(collections=[SimpleNamespace(name=n) for n in self.collections])
+
+    def collection_exists(self, name):
+        return name in self.collections
+
+    def create_collection(self, name, vectors_config=None):
+        if name in self.collections:
+            raise _UnexpectedResponse(409)
+        self.collections[name] = {"points": {}}
+
+    def recreate_collection(self, name, vectors_config=None):
+        raise AssertionError("recreate_collection drops every tenant's points")
+
+    def create_payload_index(self, name, field, schema):
+        pass
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    import sys, types
+    from types import SimpleNamespace
+    models = SimpleNamespace(
+        VectorParams=lambda size, distance: (size, distance), Distance=SimpleNamespace(COSINE="cosine"),
+        PayloadSchemaType=SimpleNamespace(KEYWORD="keyword"),
+        KeywordIndexParams=lambda type, is_tenant: (type, is_tenant), KeywordIndexType=SimpleNamespace(KEYWORD="keyword"))
+    exceptions = types.ModuleType("qdrant_client.http.exceptions")
+    exceptions.UnexpectedResponse = _UnexpectedResponse
+    monkeypatch.setitem(sys.modules, "qdrant_client", SimpleNamespace(QdrantClient=_FakeQdrant, models=models))
+    monkeypatch.setitem(sys.modules, "qdrant_client.http", SimpleNamespace(exceptions=exceptions))
+    monkeypatch.setitem(sys.modules, "qdrant_client.http.exceptions", exceptions)
+    monkeypatch.setattr(_FakeQdrant, "collections", {})
+    return _FakeQdrant
+
+
+def test_create_with_a_stale_registry_keeps_existing_points(qdrant):
+    from utils.vector_backends import QdrantBackend
+    a, b = QdrantBackend("shared"), QdrantBackend("shared")
+    assert not a.exists()                       # cached as missing for `ttl` seconds
+    b.create(4)
+    qdrant.collections["shared"]["points"]["p1"] = "tenant b's point"
+    a.create(4)
+    assert qdrant.collections["shared"]["points"] == {"p1": "tenant b's point"}
+    assert a.exists()
+
+
+def test_create_treats_a_concurrent_create_as_success(qdrant, monkeypatch):
+    from utils.vector_backends import QdrantBackend
+    backend = QdrantBackend("shared")
+    qdrant.collections["shared"] = {"points": {}}
+    monkeypatch.setattr(_FakeQdrant, "collection_exists", lambda self, name: False)   # lost the race
+    backend.create(4)
+    assert "shared" in qdrant.collections
@@ -0,0 +1,107 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # cosine similarity
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))              # seconds
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2048"))              # entries
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import threading, time
+import numpy as np
+
+
+class AnswerCache:
+    """
+    Semantic response cache for repeated / paraphrased questions.
+    Entries are (normalized query embedding, index version, answer). A lookup is one
+    vectorized dot product over the stored embeddings; the best entry for the current
+    index version wins if its cosine similarity is >= threshold. Entries expire after
+    `ttl` seconds and the least recently used entry is replaced when full.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, ttl: float = ANSWER_CACHE_TTL,
+                 size: int = ANSWER_CACHE_SIZE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.size = size
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+        self._clear()
+
+    def _clear(self):
+        self.matrix = None                         # (size, dim) float32
+        self.answers = [None] * self.size
+        self.versions = [None] * self.size
+        self.expires = np.zeros(self.size)         # 0 = empty slot
+        self.last_used = np.zeros(self.size)
+
+    @staticmethod
+    def _normalize(vec):
+        v = np.asarray(vec, dtype=np.float32)
+        return v / (np.linalg.norm(v) or 1.0)
+
+    def lookup(self, qvec, version: str):
+        q = self._normalize(qvec)
+        now = time.time()
+        with self._lock:
+            if self.matrix is None:
+                self.counters["misses"] += 1
+                return None
+            live = self.expires > now
+            if live.any():
+                sims = np.where(live, self.matrix @ q, -1.0)
+                for row in np.argsort(-sims)[:4]:
+                    if sims[row] < self.threshold:
+                        break
+                    if self.versions[row] == version:
+                        self.last_used[row] = now
+                        self.counters["hits"] += 1
+                        logger.debug(f"AnswerCache: hit (cos={sims[row]:.3f})")
+                        return self.answers[row]
+            self.counters["misses"] += 1
+            return None
+
+    def store(self, qvec, version: str, answer: str):
+        q = self._normalize(qvec)
+        now = time.time()
+        with self._lock:
+            if self.matrix is None:
+                self.matrix = np.zeros((self.size, q.shape[0]), dtype=np.float32)
+            # an expired/empty slot if there is one, else the least recently used
+            free = np.flatnonzero(self.expires <= now)
+            row = int(free[0]) if free.size else int(np.argmin(self.last_used))
+            self.matrix[row] = q
+            self.answers[row] = answer
+            self.versions[row] = version
+            self.expires[row] = now + self.ttl
+            self.last_used[row] = now
+            self.counters["stores"] += 1
+
+    # Drop everything, e.g. when the collection is reset or re-indexed; with `prefix`
+    # only the entries whose index version starts with it (one tenant's answers)
+    def invalidate(self, prefix: str = None):
+        with self._lock:
+            if prefix is None:
+                self._clear()
+            else:
+                for row, version in enumerate(self.versions):
+                    if version is not None and version.startswith(prefix):
+                        self.versions[row] = None
+                        self.expires[row] = 0
+            self.counters["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            c["size"] = int((self.expires > time.time()).sum())
+        lookups = c["hits"] + c["misses"]
+        c["hit_rate"] = (c["hits"] / lookups) if lookups else 0.0
+        return c
+
+
+answer_cache = AnswerCache()
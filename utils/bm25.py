@@ -0,0 +1,165 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", ".index/bm25.json")
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import heapq, json, math, pathlib, re, threading
+from collections import Counter
+
+# Words, numbers and identifiers such as "PN-10432", "4.2.1" or "SEC_7A"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+
+# Lowercased tokens; compound identifiers are kept whole *and* split into their parts,
+# so "PN-10432" matches a query for "PN-10432" as well as one for "10432".
+def tokenize(text: str) -> list[str]:
+    out = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        out.append(tok)
+        if not tok.isalnum():
+            out.extend(p for p in re.split(r"[-_./]", tok) if p)
+    return out
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring, kept next to the vector store.
+    Postings are {term: {point id: term frequency}}, so chunks can be added and removed
+    by point id as documents are incrementally re-indexed.
+    `version` records which index version of the vector store this copy matches
+    (set by utils/vector_store.py, saved with the index).
+    """
+
+    def __init__(self, path: str | None = BM25_INDEX_PATH, k1: float = BM25_K1, b: float = BM25_B):
+        self.path = pathlib.Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.postings = {}      # term -> {pid: tf}
+        self.lengths = {}       # pid -> token count
+        self.texts = {}         # pid -> chunk text
+        self.docs = {}          # pid -> document id
+        self.total_len = 0
+        self.version = None
+
+    def _load(self):
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except Exception as e:
+            logger.warning(f"BM25Index: unreadable index {self.path}, starting empty: {e}")
+            return
+        self.postings = data["postings"]
+        self.lengths = data["lengths"]
+        self.texts = data["texts"]
+        self.docs = data["docs"]
+        self.version = data.get("version")
+        self.total_len = sum(self.lengths.values())
+        logger.debug(f"BM25Index: loaded {len(self.lengths)} chunks from {self.path}")
+
+    def __contains__(self, pid) -> bool:
+        return pid in self.lengths
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, ids: list, texts: list[str], doc_id: str):
+        with self._lock:
+            for pid, text in zip(ids, texts):
+                if pid in self.lengths:
+                    self._remove(pid)
+                tf = Counter(tokenize(text))
+                for term, n in tf.items():
+                    self.postings.setdefault(term, {})[pid] = n
+                n_tokens = sum(tf.values())
+                self.lengths[pid] = n_tokens
+                self.total_len += n_tokens
+                self.texts[pid] = text
+                self.docs[pid] = doc_id
+
+    def _remove(self, pid):
+        text = self.texts.pop(pid, None)
+        if text is None:
+            return
+        for term in set(tokenize(text)):
+            plist = self.postings.get(term)
+            if plist is not None:
+                plist.pop(pid, None)
+                if not plist:
+                    del self.postings[term]
+        self.total_len -= self.lengths.pop(pid)
+        self.docs.pop(pid, None)
+
+    def remove(self, ids: list):
+        with self._lock:
+            for pid in ids:
+                self._remove(pid)
+
+    def remove_doc(self, doc_id: str):
+        with self._lock:
+            for pid in [p for p, d in self.docs.items() if d == doc_id]:
+                self._remove(pid)
+
+    # Replace the whole index with (pid, text, doc_id) entries, e.g. re-read from the vector store
+    def rebuild(self, entries, version=None):
+        with self._lock:
+            self._reset()
+            for pid, text, doc_id in entries:
+                self.add([pid], [text], doc_id)
+            self.version = version
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            if self.path:
+                self.path.unlink(missing_ok=True)
+
+    # Top-k (pid, text, score), best first
+    def search(self, query: str, k: int = 5) -> list[tuple]:
+        with self._lock:
+            n = len(self.lengths)
+            if not n:
+                return []
+            avg_len = self.total_len / n
+            scores = {}
+            for term in set(tokenize(query)):
+                plist = self.postings.get(term)
+                if not plist:
+                    continue
+                idf = math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+                for pid, tf in plist.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[pid] / avg_len)
+                    scores[pid] = scores.get(pid, 0.0) + idf * tf * (self.k1 + 1) / norm
+            top = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+            return [(pid, self.texts[pid], score) for pid, score in top]
+
+    def flush(self):
+        if not self.path:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"postings": self.postings, "lengths": self.lengths,
+                                       "texts": self.texts, "docs": self.docs, "version": self.version}))
+            tmp.replace(self.path)
+
+
+# Reciprocal rank fusion of several ranked id lists: sum(weight / (k + rank))
+def rrf_fuse(rankings: list[list], weights: list[float], k: int = 60) -> list[tuple]:
+    fused = {}
+    for ranking, w in zip(rankings, weights):
+        for rank, pid in enumerate(ranking, start=1):
+            fused[pid] = fused.get(pid, 0.0) + w / (k + rank)
+    return sorted(fused.items(), key=lambda kv: kv[1], reverse=True)
@@ -0,0 +1,148 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+CHAT_SERVICE_URL = os.getenv("CHAT_SERVICE_URL", "")                    # empty = run the service in-process
+CHAT_SERVICE_TIMEOUT = float(os.getenv("CHAT_SERVICE_TIMEOUT", "300"))  # seconds per HTTP request
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import asyncio, json, threading
+import urllib.error, urllib.parse, urllib.request
+
+# -----------------------------------------------------------------------------
+# What the Streamlit UI talks to. Both clients expose the same blocking calls:
+#   turn(chat_id, prompt, provider, model, tenant)   -> result dict (see chat_turn.run_turn)
+#   stream(chat_id, prompt, provider, model, tenant) -> text deltas, then the result dict
+#   ingest(file, chat_id, tenant, doc_id) / reset(chat_id, tenant) / new_session(chat_id) / stats()
+# Retrieval, documents and resets are scoped to `tenant`, or to the chat's tenant
+# under TENANT_SCOPE when it is omitted (utils/tenants.py).
+# HTTPChatClient calls a separately deployed service.py; LocalChatClient runs the
+# same ChatService on a background event loop inside the Streamlit process.
+# -----------------------------------------------------------------------------
+
+
+class ChatServiceError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class HTTPChatClient:
+    def __init__(self, url: str = CHAT_SERVICE_URL, timeout: float = CHAT_SERVICE_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def _open(self, path: str, data: bytes = None, content_type: str = "application/json", method: str = "POST"):
+        req = urllib.request.Request(self.url + path, data=data, method=method,
+                                     headers={"Content-Type": content_type})
+        try:
+            return urllib.request.urlopen(req, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ChatServiceError(e.code, message) from None
+        except urllib.error.URLError as e:
+            raise ChatServiceError(503, f"chat service unreachable at {self.url}: {e.reason}") from None
+
+    def _json(self, path: str, payload=None, method: str = "POST"):
+        data = json.dumps(payload).encode() if payload is not None else (b"" if method == "POST" else None)
+        with self._open(path, data, method=method) as resp:
+            return json.loads(resp.read())
+
+    def _turn_path(self, chat_id: str) -> str:
+        return f"/v1/chats/{urllib.parse.quote(chat_id, safe='')}/turn"
+
+    def turn(self, chat_id: str, prompt: str, provider: str = None, model: str = None, tenant: str = None) -> dict:
+        return self._json(self._turn_path(chat_id), {"prompt": prompt, "provider": provider, "model": model,
+                                                     "tenant": tenant})
+
+    def stream(self, chat_id: str, prompt: str, provider: str = None, model: str = None, tenant: str = None):
+        body = json.dumps({"prompt": prompt, "provider": provider, "model": model, "tenant": tenant,
+                           "stream": True}).encode()
+        with self._open(self._turn_path(chat_id), body) as resp:
+            for line in resp:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if "error" in item:
+                    raise ChatServiceError(500, item["error"])
+                yield item["result"] if "result" in item else item["delta"]
+
+    def ingest(self, file, chat_id: str = None, tenant: str = None, doc_id: str = None) -> dict:
+        data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+        query = urllib.parse.urlencode({k: v for k, v in (("name", getattr(file, "name", "") or ""),
+                                                          ("chat_id", chat_id), ("tenant", tenant),
+                                                          ("doc_id", doc_id)) if v})
+        with self._open(f"/v1/documents?{query}", data, "application/pdf") as resp:
+            return json.loads(resp.read())
+
+    def reset(self, chat_id: str, tenant: str = None) -> dict:
+        return self._json(f"/v1/chats/{urllib.parse.quote(chat_id, safe='')}/reset", {"tenant": tenant})
+
+    def new_session(self, chat_id: str) -> dict:
+        return self._json(f"/v1/chats/{urllib.parse.quote(chat_id, safe='')}/new-session")
+
+    def stats(self) -> dict:
+        return self._json("/v1/stats", method="GET")
+
+
+class LocalChatClient:
+    def __init__(self, service=None):
+        from utils.chat_service import get_chat_service
+        self.service = service or get_chat_service()
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="chat-service-loop", daemon=True).start()
+        self._call(self.service.start())
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def turn(self, chat_id: str, prompt: str, provider: str = None, model: str = None, tenant: str = None) -> dict:
+        return self._call(self.service.turn(chat_id, prompt, provider, model, tenant))
+
+    def stream(self, chat_id: str, prompt: str, provider: str = None, model: str = None, tenant: str = None):
+        items = self.service.stream(chat_id, prompt, provider, model, tenant)
+
+        async def _next():
+            return await items.__anext__()
+        try:
+            while True:
+                try:
+                    item = self._call(_next())
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            self._call(items.aclose())
+
+    def ingest(self, file, chat_id: str = None, tenant: str = None, doc_id: str = None) -> dict:
+        data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+        return self._call(self.service.ingest(data, getattr(file, "name", None), chat_id, tenant, doc_id))
+
+    def reset(self, chat_id: str, tenant: str = None) -> dict:
+        return self._call(self.service.reset(chat_id, tenant))
+
+    def new_session(self, chat_id: str):
+        self.service.drop_sessions(chat_id)
+
+    def stats(self) -> dict:
+        return self.service.stats()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+# HTTP client when CHAT_SERVICE_URL is set, otherwise the in-process service (one per process)
+def get_chat_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPChatClient() if CHAT_SERVICE_URL else LocalChatClient()
+                logger.info(f"Chat client: {type(_client).__name__} {CHAT_SERVICE_URL}")
+    return _client
@@ -0,0 +1,234 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+SERVICE_PROVIDER = os.getenv("SERVICE_PROVIDER", "GoogleAI")                 # GoogleAI | VertexAI
+SERVICE_MODEL = os.getenv("SERVICE_MODEL", "gemini-2.0-flash")
+SERVICE_MAX_TURNS = int(os.getenv("SERVICE_MAX_TURNS", "32"))                # turns in flight
+SERVICE_MAX_WAITING = int(os.getenv("SERVICE_MAX_WAITING", "64"))            # turns queued for a slot
+SERVICE_QUEUE_TIMEOUT = float(os.getenv("SERVICE_QUEUE_TIMEOUT", "5"))       # seconds a turn may wait
+SERVICE_IO_WORKERS = int(os.getenv("SERVICE_IO_WORKERS", "64"))              # threads for blocking I/O
+SERVICE_INGEST_WORKERS = int(os.getenv("SERVICE_INGEST_WORKERS", "1"))       # PDFs indexed at once
+SERVICE_MAX_PENDING_INGESTS = int(os.getenv("SERVICE_MAX_PENDING_INGESTS", "4"))
+SERVICE_SESSION_CACHE = int(os.getenv("SERVICE_SESSION_CACHE", "1024"))      # LLM chat sessions kept
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import asyncio, functools, importlib, io, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.clients import get_redis
+from utils.chat_turn import run_turn, astream_turn
+from utils.memory import forget_chat
+from utils.vector_store import load_pdf_to_qdrant, reset_tenant
+from utils.manifest import document_id
+from utils.tenants import resolve_tenant
+
+
+# Map provider -> python module path
+MODULE_BY_PROVIDER = {
+    "GoogleAI": "utils.google_generativeai_chat",
+    "VertexAI": "utils.vertex_chat_vertexai",
+}
+
+
+# Import the provider's chat module and start a chat session for `model_name`
+def init_backend(provider: str, model_name: str):
+    if provider not in MODULE_BY_PROVIDER:
+        raise ValueError(f"Unknown provider {provider!r}, expected one of {list(MODULE_BY_PROVIDER)}")
+    mod = importlib.import_module(MODULE_BY_PROVIDER[provider])
+    session = mod.init_chat(model_name)
+    return mod, session
+
+
+# Raised when a request cannot get a slot in time; the HTTP layer answers 503
+class ServiceOverloaded(Exception):
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ChatService:
+    """
+    Headless chat-turn service: everything app.py used to do per rerun, for many chats
+    at once on one event loop.
+    - Admission control: at most `max_turns` turns run at once and at most `max_waiting`
+      wait for a slot (for up to `queue_timeout` s); beyond that ServiceOverloaded is
+      raised instead of letting latency grow without bound.
+    - Blocking work (Redis, Firestore, vector search, LLM) runs on a bounded thread
+      pool installed as the loop's default executor; embedding is additionally capped
+      by EMBED_CONCURRENCY inside the engine.
+    - PDF ingestion has its own small pool so indexing never starves chat turns.
+    - One LLM chat session per (chat, provider, model), kept in an LRU.
+    """
+
+    def __init__(self, provider: str = SERVICE_PROVIDER, model_name: str = SERVICE_MODEL,
+                 max_turns: int = SERVICE_MAX_TURNS, max_waiting: int = SERVICE_MAX_WAITING,
+                 queue_timeout: float = SERVICE_QUEUE_TIMEOUT, io_workers: int = SERVICE_IO_WORKERS,
+                 ingest_workers: int = SERVICE_INGEST_WORKERS,
+                 max_pending_ingests: int = SERVICE_MAX_PENDING_INGESTS,
+                 session_cache: int = SERVICE_SESSION_CACHE):
+        self.provider = provider
+        self.model_name = model_name
+        self.max_turns = max_turns
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self.max_pending_ingests = max_pending_ingests
+        self.session_cache = session_cache
+        self._io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="service-io")
+        self._ingest_pool = ThreadPoolExecutor(max_workers=ingest_workers, thread_name_prefix="service-ingest")
+        self._slots = None              # asyncio.Semaphore, created on the serving loop in start()
+        self._sessions: OrderedDict = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        self.counters = {"turns": 0, "rejected": 0, "failed": 0, "in_flight": 0, "waiting": 0,
+                         "ingests": 0, "pending_ingests": 0}
+
+    # Bind to the running loop: bounded default executor + turn semaphore
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(self._io_pool)
+        self._slots = asyncio.Semaphore(self.max_turns)
+        logger.info(f"ChatService: {self.provider} • {self.model_name} | max turns {self.max_turns} "
+                    f"| max waiting {self.max_waiting}")
+
+    async def stop(self):
+        self._ingest_pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---- LLM sessions --------------------------------------------------------
+    def _session(self, chat_id: str, provider: str, model_name: str):
+        key = (chat_id, provider, model_name)
+        with self._sessions_lock:
+            entry = self._sessions.get(key)
+            if entry is not None:
+                self._sessions.move_to_end(key)
+                return entry
+        entry = init_backend(provider, model_name)      # outside the lock: may do network I/O
+        with self._sessions_lock:
+            self._sessions[key] = entry
+            while len(self._sessions) > self.session_cache:
+                self._sessions.popitem(last=False)
+        return entry
+
+    def drop_sessions(self, chat_id: str):
+        with self._sessions_lock:
+            for key in [k for k in self._sessions if k[0] == chat_id]:
+                del self._sessions[key]
+
+    # ---- admission control ---------------------------------------------------
+    async def _acquire(self):
+        if self._slots is None:
+            await self.start()
+        if not self._slots.locked():
+            # a free slot is taken right here; going through wait_for would hand it to a
+            # task first, and a burst would all see "not locked" and skip the wait limit
+            await self._slots.acquire()
+            self.counters["in_flight"] += 1
+            return
+        if self.counters["waiting"] >= self.max_waiting:
+            self.counters["rejected"] += 1
+            raise ServiceOverloaded("Too many chat turns waiting", retry_after=self.queue_timeout)
+        self.counters["waiting"] += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counters["rejected"] += 1
+            raise ServiceOverloaded(f"No turn slot within {self.queue_timeout}s", retry_after=self.queue_timeout)
+        finally:
+            self.counters["waiting"] -= 1
+        self.counters["in_flight"] += 1
+
+    def _release(self, ok: bool):
+        self.counters["in_flight"] -= 1
+        self.counters["turns" if ok else "failed"] += 1
+        self._slots.release()
+
+    # ---- turns ---------------------------------------------------------------
+    # Blocking turn: the run_turn result dict
+    async def turn(self, chat_id: str, prompt: str, provider: str = None, model_name: str = None,
+                   tenant: str = None) -> dict:
+        await self._acquire()
+        ok = False
+        try:
+            mod, session = await asyncio.to_thread(self._session, chat_id, provider or self.provider,
+                                                   model_name or self.model_name)
+            result = await run_turn(chat_id, prompt, session, mod.chat, get_redis(), tenant)
+            ok = True
+            return result
+        finally:
+            self._release(ok)
+
+    # Streaming turn: text deltas, then the result dict. The slot is held until the
+    # stream is finished or the consumer stops iterating.
+    async def stream(self, chat_id: str, prompt: str, provider: str = None, model_name: str = None,
+                     tenant: str = None):
+        await self._acquire()
+        ok = False
+        try:
+            mod, session = await asyncio.to_thread(self._session, chat_id, provider or self.provider,
+                                                   model_name or self.model_name)
+            chat_stream = getattr(mod, "chat_stream", None)
+            if chat_stream is None:
+                result = await run_turn(chat_id, prompt, session, mod.chat, get_redis(), tenant)
+                yield result["answer"] or ""
+                yield result
+            else:
+                async for item in astream_turn(chat_id, prompt, session, chat_stream, get_redis(), tenant):
+                    yield item
+            ok = True
+        finally:
+            self._release(ok)
+
+    # ---- documents -----------------------------------------------------------
+    # Index a PDF (bytes) into the chat's tenant on the ingest pool; `doc_id` defaults to
+    # the file name, so a same-named upload replaces the earlier document.
+    # Returns {"doc_id", "tenant", "indexed", "seconds"}
+    async def ingest(self, data: bytes, name: str = None, chat_id: str = None, tenant: str = None,
+                     doc_id: str = None) -> dict:
+        if self.counters["pending_ingests"] >= self.max_pending_ingests:
+            self.counters["rejected"] += 1
+            raise ServiceOverloaded("Too many documents being indexed", retry_after=10)
+        f = io.BytesIO(data)
+        f.name = name or ""           # unnamed uploads are identified by content hash
+        doc_id = doc_id or document_id(f)
+        tenant = resolve_tenant(chat_id, tenant)
+        self.counters["pending_ingests"] += 1
+        t0 = time.perf_counter()
+        try:
+            indexed = await asyncio.get_running_loop().run_in_executor(
+                self._ingest_pool, functools.partial(load_pdf_to_qdrant, f, tenant=tenant, doc_id=doc_id))
+        finally:
+            self.counters["pending_ingests"] -= 1
+        self.counters["ingests"] += 1
+        return {"doc_id": doc_id, "tenant": tenant, "indexed": indexed, "seconds": round(time.perf_counter() - t0, 3)}
+
+    # Reset one chat: its tenant's documents, its Redis memory and its LLM sessions.
+    # Other chats and tenants are untouched.
+    async def reset(self, chat_id: str, tenant: str = None) -> dict:
+        tenant = resolve_tenant(chat_id, tenant)
+        def _reset():
+            reset_tenant(tenant)
+            forget_chat(chat_id)
+        await asyncio.to_thread(_reset)
+        self.drop_sessions(chat_id)
+        return {"reset": True, "tenant": tenant}
+
+    def stats(self) -> dict:
+        with self._sessions_lock:
+            sessions = len(self._sessions)
+        return {**self.counters, "sessions": sessions, "max_turns": self.max_turns,
+                "provider": self.provider, "model": self.model_name}
+
+
+_service = None
+_service_lock = threading.Lock()
+
+# Return the single ChatService for this process
+def get_chat_service() -> ChatService:
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ChatService()
+    return _service
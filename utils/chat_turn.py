@@ -0,0 +1,239 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import asyncio, functools, threading, time
+from utils.vector_store import similarity_search_scored, content_version
+from utils.prompt_builder import build_prompt
+from utils.embeddings import get_embedding_engine
+from utils.answer_cache import answer_cache, ANSWER_CACHE_ENABLED
+from utils.memory import remember_turn, recall_short, fetch_summary
+from utils.summarizer import schedule_summary
+from utils.metrics import observe, metrics_enabled
+from utils.tenants import resolve_tenant
+
+
+# Run a blocking call on a worker thread and record its wall time (ms) under `name`
+async def _timed(timings: dict, name: str, fn, *args):
+    t0 = time.perf_counter()
+    try:
+        return await asyncio.to_thread(fn, *args)
+    finally:
+        timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+
+# -----------------------------------------------------------------------------
+# One chat turn. Independent I/O runs concurrently:
+#
+#   recall_short ──┐
+#   fetch_summary ─┴─ answer cache (standalone turns) ─┬─ LLM ─ remember
+#   similarity_search ─────────────────────────────────┘
+#
+# Older messages are handed to the background summarizer and never block the turn;
+# this turn uses the last stored summary.
+#
+# A semantic answer cache is checked once recall_short and fetch_summary are back: a
+# close enough earlier question against the same documents skips the LLM, and the
+# retrieval already in flight is dropped. Only standalone turns (no recent messages,
+# no summary) read or fill it — a follow-up like "what about the second one?" depends
+# on its own conversation. Answers are keyed by content_version, so chats (tenants)
+# that uploaded the same documents share them.
+#
+# Retrieval is scoped to the chat's tenant (see utils/tenants.py); `tenant=None` lets
+# TENANT_SCOPE decide.
+# -----------------------------------------------------------------------------
+
+# (query embedding, content version, cached answer or None) — the embedding is
+# LRU-cached by the engine, so retrieval and the lookup encode the query once
+def _lookup_answer(user_prompt: str, tenant: str):
+    qvec = get_embedding_engine().encode_query(user_prompt)
+    version = content_version(tenant)
+    return qvec, version, answer_cache.lookup(qvec, version)
+
+
+# Everything before the LLM call. Returns the turn state used by run_turn/stream_turn.
+async def prepare_turn(chat_id: str, user_prompt: str, my_gemini, redis_client, tenant: str = None) -> dict:
+    timings = {}
+    t0 = time.perf_counter()
+    tenant = resolve_tenant(chat_id, tenant)
+
+    search = asyncio.ensure_future(_timed(timings, "similarity_search",
+                                          functools.partial(similarity_search_scored, tenant=tenant), user_prompt))
+    try:
+        (recent, older), summary = await asyncio.gather(
+            _timed(timings, "recall_short", recall_short, chat_id, redis_client),
+            _timed(timings, "fetch_summary", fetch_summary, chat_id))
+        standalone = not recent and not older and not summary
+        qvec, version, cached = None, None, None
+        if ANSWER_CACHE_ENABLED and standalone:
+            qvec, version, cached = await _timed(timings, "answer_cache", _lookup_answer, user_prompt, tenant)
+    except BaseException:
+        search.cancel()
+        raise
+
+    state = {
+        "t0": t0,
+        "timings": timings,
+        "recent": recent,
+        "qvec": qvec,
+        "version": version,
+        "cached_answer": cached,
+        "cacheable": False,
+    }
+
+    summarized = False
+    if older:
+        logger.debug(f"Older messages: {older}")
+        summarized = schedule_summary(my_gemini, chat_id, older)
+    state["summarized"] = summarized
+    if cached is not None:
+        search.cancel()             # the worker thread finishes on its own; its result is unused
+        return state
+
+    context_snippets = await search
+    logger.debug(f"Chat ID: {chat_id}")
+    logger.debug(f"Summary Cache: {summary}")
+
+    # Token-budgeted prompt: overlapping chunks deduped, lowest scores / oldest history dropped first
+    system_prompt, history, prompt_stats = build_prompt(context_snippets, summary, recent)
+    state["system_prompt"] = system_prompt
+    state["messages"] = history + [{"role": "user", "content": user_prompt}]
+    state["prompt_stats"] = prompt_stats
+    # only standalone answers grounded in retrieved context are worth reusing
+    state["cacheable"] = version is not None and bool(context_snippets)
+    return state
+
+
+# Remember the turn and, when allowed, cache the answer for similar questions
+def _complete(chat_id, user_prompt, state, answer, redis_client):
+    remember_turn(chat_id, user_prompt, answer, redis_client)
+    if state["cacheable"]:
+        answer_cache.store(state["qvec"], state["version"], answer)
+
+
+def _result(chat_id, state, answer, usage=None) -> dict:
+    timings = state["timings"]
+    timings["total"] = round((time.perf_counter() - state["t0"]) * 1000, 1)
+    if metrics_enabled():
+        # per-stage wall time as the turn saw it (stages overlap), next to the finer spans
+        for name, ms in timings.items():
+            observe(f"turn.{name}", ms / 1000)
+    logger.info(f"run_turn: chat {chat_id} | timings ms {timings} | usage {usage or {}}")
+    return {"answer": answer, "recent": state["recent"], "summarized": state["summarized"],
+            "timings": timings, "usage": usage or {}, "cached": state["cached_answer"] is not None,
+            "prompt_stats": state.get("prompt_stats", {})}
+
+
+# Blocking (non-streaming) turn.
+# Returns {"answer", "recent", "summarized", "timings", "usage", "cached", "prompt_stats"};
+# timings are per-stage ms plus "total". "summarized" is True when a background
+# summary was queued.
+async def run_turn(chat_id: str, user_prompt: str, my_gemini, my_chat, redis_client, tenant: str = None) -> dict:
+    state = await prepare_turn(chat_id, user_prompt, my_gemini, redis_client, tenant)
+    timings = state["timings"]
+
+    answer = state["cached_answer"]
+    if answer is None:
+        answer = await _timed(timings, "llm", my_chat, my_gemini, state["system_prompt"], state["messages"])
+
+    if answer:
+        await _timed(timings, "remember_turn", _complete, chat_id, user_prompt, state, answer, redis_client)
+    return _result(chat_id, state, answer)
+
+
+# Streaming turn: a generator of text deltas from `my_chat_stream`, ending with the
+# same result dict run_turn returns. timings["ttft"] is time-to-first-token measured
+# from the start of the turn — the latency the user actually feels.
+def stream_turn(chat_id: str, user_prompt: str, my_gemini, my_chat_stream, redis_client, tenant: str = None):
+    state = asyncio.run(prepare_turn(chat_id, user_prompt, my_gemini, redis_client, tenant))
+    timings = state["timings"]
+
+    t_llm = time.perf_counter()
+    final = {}
+    if state["cached_answer"] is not None:
+        final = {"text": state["cached_answer"]}
+        timings["ttft"] = round((time.perf_counter() - state["t0"]) * 1000, 1)
+        yield state["cached_answer"]
+    deltas = () if final else my_chat_stream(my_gemini, state["system_prompt"], state["messages"])
+    for delta in deltas:
+        if isinstance(delta, dict):
+            final = delta
+            continue
+        if "ttft" not in timings:
+            timings["ttft"] = round((time.perf_counter() - state["t0"]) * 1000, 1)
+        yield delta
+    timings["llm"] = round((time.perf_counter() - t_llm) * 1000, 1)
+
+    answer = final.get("text")
+    if answer:
+        t = time.perf_counter()
+        _complete(chat_id, user_prompt, state, answer, redis_client)
+        timings["remember_turn"] = round((time.perf_counter() - t) * 1000, 1)
+    yield _result(chat_id, state, answer, final.get("usage"))
+
+
+# Drive a blocking generator on a worker thread and hand its items to the event loop.
+# Closing the async generator early (client went away) stops the producer at its next item.
+async def _iterate_in_thread(gen_fn, *args):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def pump():
+        try:
+            for item in gen_fn(*args):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (None, e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+    producer = loop.run_in_executor(None, pump)
+    try:
+        while True:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+        await producer
+
+
+# Async twin of stream_turn for callers that already run an event loop (the chat
+# service): same deltas and final result dict, without a nested asyncio.run per turn.
+async def astream_turn(chat_id: str, user_prompt: str, my_gemini, my_chat_stream, redis_client,
+                      tenant: str = None):
+    state = await prepare_turn(chat_id, user_prompt, my_gemini, redis_client, tenant)
+    timings = state["timings"]
+
+    t_llm = time.perf_counter()
+    final = {}
+    if state["cached_answer"] is not None:
+        final = {"text": state["cached_answer"]}
+        timings["ttft"] = round((time.perf_counter() - state["t0"]) * 1000, 1)
+        yield state["cached_answer"]
+    else:
+        async for delta in _iterate_in_thread(my_chat_stream, my_gemini, state["system_prompt"], state["messages"]):
+            if isinstance(delta, dict):
+                final = delta
+                continue
+            if "ttft" not in timings:
+                timings["ttft"] = round((time.perf_counter() - state["t0"]) * 1000, 1)
+            yield delta
+    timings["llm"] = round((time.perf_counter() - t_llm) * 1000, 1)
+
+    answer = final.get("text")
+    if answer:
+        await _timed(timings, "remember_turn", _complete, chat_id, user_prompt, state, answer, redis_client)
+    yield _result(chat_id, state, answer, final.get("usage"))
@@ -0,0 +1,92 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+REDIS_URL = os.getenv("REDIS_URL")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))  # seconds
+GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID") or os.getenv("GCP_CLOUD_PROJECT")
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import threading
+
+# -----------------------------------------------------------------------------
+# Process-wide client registry.
+# Clients are created on first use and shared by every module, Streamlit rerun
+# and session in the process. Redis connections come from one pool.
+# -----------------------------------------------------------------------------
+_lock = threading.Lock()
+_redis = None
+_firestore = None
+
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        with _lock:
+            if _redis is None:
+                import redis
+                if not REDIS_URL:
+                    raise ValueError("Please set the REDIS_URL environment variable.")
+                pool = redis.ConnectionPool.from_url(
+                    REDIS_URL,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+                )
+                _redis = redis.Redis(connection_pool=pool)
+                logger.info("Redis connection pool created")
+    return _redis
+
+
+def get_firestore():
+    global _firestore
+    if _firestore is None:
+        with _lock:
+            if _firestore is None:
+                import google.cloud.firestore as fs
+                _firestore = fs.Client(project=GCP_PROJECT_ID)
+                if not _firestore:
+                    raise Exception("Firestore client not initialized. Check GCP_PROJECT_ID.")
+                logger.info("Firestore client created")
+    return _firestore
+
+
+# Ping Redis; False (and a logged error) instead of raising. A failed ping drops the
+# Redis client, so the next get_redis() builds a fresh pool instead of reusing dead
+# connections (used by /healthz and warm_up).
+def redis_healthy() -> bool:
+    try:
+        return bool(get_redis().ping())
+    except Exception as e:
+        logger.error(f"Redis health check failed: {e}")
+        reset_clients(firestore=False)
+        return False
+
+
+# Use the given clients instead of connecting (benchmarks with in-process stand-ins)
+def set_clients(redis_client=None, firestore_client=None):
+    global _redis, _firestore
+    with _lock:
+        if redis_client is not None:
+            _redis = redis_client
+        if firestore_client is not None:
+            _firestore = firestore_client
+
+
+# Drop the cached clients (e.g. after a failed health check) so the next call reconnects
+def reset_clients(redis: bool = True, firestore: bool = True):
+    global _redis, _firestore
+    with _lock:
+        if redis and _redis is not None:
+            pool = getattr(_redis, "connection_pool", None)
+            if pool is not None:
+                try:
+                    pool.disconnect()
+                except Exception as e:
+                    logger.warning(f"reset_clients: Redis pool not closed cleanly: {e}")
+            _redis = None
+        if firestore:
+            _firestore = None
@@ -0,0 +1,246 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", ".index/embeddings")
+EMBED_CACHE_MAX_ROWS = int(os.getenv("EMBED_CACHE_MAX_ROWS", "500000"))  # ~750MB at dim 384
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import heapq, json, pathlib, re, threading
+from contextlib import contextmanager
+import numpy as np
+try:
+    import fcntl
+except ImportError:        # Windows: no cross-process locking, use one writer per directory
+    fcntl = None
+
+
+class EmbeddingCache:
+    """
+    On-disk chunk-embedding store keyed by chunk hash, shareable by several processes
+    (uvicorn workers, service instances on one volume).
+    - Vectors live in a memory-mapped float32 matrix (vectors.f32). hash -> row is a
+      snapshot (index.json) plus an append-only journal (journal-<generation>.log with
+      lines "+ <hash> <row>" / "- <hash>"), so a put only appends its new entries. Once
+      the journal is much longer than the index it is folded into a new snapshot.
+    - Writers hold an exclusive fcntl lock on the directory's lock file while they
+      replay other processes' journal entries, allocate rows, write vectors and append;
+      readers hold a shared lock while replaying and copying rows. A row is therefore
+      never read while another process reuses it, and two processes never allocate the
+      same free row.
+    - The store is versioned by (model name, dimension): each pair gets its own
+      directory, so switching models never returns vectors from another model.
+    - When `max_rows` is reached the rows least recently used by this process are reused.
+    """
+
+    def __init__(self, model_name: str, dim: int, root: str = EMBED_CACHE_DIR, max_rows: int = EMBED_CACHE_MAX_ROWS):
+        self.model_name = model_name
+        self.dim = dim
+        self.max_rows = max_rows
+        self.dir = pathlib.Path(root) / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)}-{dim}"
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._vec_path = self.dir / "vectors.f32"
+        self._index_path = self.dir / "index.json"
+        self._lock = threading.Lock()
+        self._lock_file = open(self.dir / "lock", "a+")
+        self.index = {}            # hash -> row
+        self.used = {}             # hash -> last-used tick (this process)
+        self.free = set()
+        self.tick = 0
+        self.capacity = 0
+        self.generation = 0
+        self._mm = None
+        self._snapshot_sig = None
+        self._offset = 0           # bytes of the journal already applied
+        self._journal_lines = 0
+        with self._locked(shared=True):
+            self._catch_up()
+        logger.debug(f"EmbeddingCache: {len(self.index)} vectors in {self.dir}")
+
+    # --- storage -------------------------------------------------------------
+    @contextmanager
+    def _locked(self, shared: bool = False):
+        with self._lock:
+            if fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _journal_path(self) -> pathlib.Path:
+        return self.dir / f"journal-{self.generation}.log"
+
+    def _load_snapshot(self, sig):
+        meta = {}
+        if sig is not None:
+            try:
+                meta = json.loads(self._index_path.read_text())
+            except Exception as e:
+                logger.warning(f"EmbeddingCache: unreadable index, starting empty: {e}")
+        if meta.get("model") != self.model_name or meta.get("dim") != self.dim or not self._vec_path.exists():
+            meta = {}
+        # entries were [row, tick] before the journal existed
+        self.index = {h: (e[0] if isinstance(e, list) else e) for h, e in meta.get("index", {}).items()}
+        self.used = dict.fromkeys(self.index, 0)
+        self.generation = meta.get("generation", 0)
+        self.capacity = 0
+        self.free = set()
+        self._mm = None
+        self._snapshot_sig = sig
+        self._offset = 0
+        self._journal_lines = 0
+
+    # Pick up the vectors file size and journal entries written by other processes
+    def _catch_up(self):
+        try:
+            st = self._index_path.stat()
+            sig = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            sig = None
+        if sig != self._snapshot_sig or (sig is None and self._mm is None):
+            self._load_snapshot(sig)
+        self._remap()
+        try:
+            with open(self._journal_path(), "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        data = data[:data.rfind(b"\n") + 1]        # a line still being written is read next time
+        self._offset += len(data)
+        for line in data.decode().splitlines():
+            self._apply(line.split())
+
+    def _apply(self, entry: list):
+        self._journal_lines += 1
+        if entry[0] == "+":
+            h, row = entry[1], int(entry[2])
+            self.index[h] = row
+            self.used.setdefault(h, self.tick)
+            self.free.discard(row)
+        elif entry[0] == "-":
+            row = self.index.pop(entry[1], None)
+            self.used.pop(entry[1], None)
+            if row is not None:
+                self.free.add(row)
+
+    def _remap(self):
+        size = self._vec_path.stat().st_size if self._vec_path.exists() else 0
+        capacity = size // (self.dim * 4)
+        if capacity == self.capacity and (self._mm is not None or not capacity):
+            return
+        if self._mm is not None:
+            self._mm.flush()
+        self._mm = np.memmap(self._vec_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)) \
+            if capacity else None
+        taken = set(self.index.values())
+        self.free = {r for r in range(capacity) if r not in taken}
+        self.capacity = capacity
+
+    def _grow(self, needed: int):
+        new_cap = min(self.max_rows, max(needed, self.capacity * 2, 1024))
+        if new_cap <= self.capacity:
+            return
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm = None
+        with open(self._vec_path, "ab") as f:
+            f.truncate(new_cap * self.dim * 4)
+        self._remap()
+
+    def _evict(self, n: int, keep: set) -> list[str]:
+        victims = heapq.nsmallest(n, ((t, h) for h, t in self.used.items() if h not in keep))
+        lines = []
+        for _, h in victims:
+            self._apply(["-", h])
+            lines.append(f"- {h}\n")
+        logger.debug(f"EmbeddingCache: evicted {len(victims)} vectors")
+        return lines
+
+    def _append(self, lines: list[str]):
+        with open(self._journal_path(), "ab") as f:
+            f.write("".join(lines).encode())
+            self._offset = f.tell()
+
+    # Fold the journal into a new snapshot generation; other processes notice the new
+    # snapshot on their next call and reload it
+    def _compact(self):
+        self.generation += 1
+        tmp = self._index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"model": self.model_name, "dim": self.dim,
+                                   "generation": self.generation, "index": self.index}))
+        tmp.replace(self._index_path)
+        (self.dir / f"journal-{self.generation - 1}.log").unlink(missing_ok=True)
+        st = self._index_path.stat()
+        self._snapshot_sig = (st.st_mtime_ns, st.st_size)
+        self._offset = 0
+        self._journal_lines = 0
+        logger.debug(f"EmbeddingCache: compacted {len(self.index)} entries into generation {self.generation}")
+
+    # --- public API ----------------------------------------------------------
+    def get_many(self, hashes: list[str]) -> dict:
+        """Return {hash: vector} for the hashes that are cached."""
+        out = {}
+        with self._locked(shared=True):
+            self._catch_up()
+            self.tick += 1
+            for h in hashes:
+                row = self.index.get(h)
+                if row is not None:
+                    self.used[h] = self.tick
+                    out[h] = np.array(self._mm[row])
+        return out
+
+    def put_many(self, hashes: list[str], vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._locked():
+            self._catch_up()
+            self.tick += 1
+            new, seen = [], set()
+            for i, h in enumerate(hashes):
+                if h not in self.index and h not in seen:
+                    new.append(i)
+                    seen.add(h)
+            if not new:
+                return
+            if len(self.free) < len(new):
+                self._grow(len(self.index) + len(new))
+            lines = []
+            if len(self.free) < len(new):
+                lines = self._evict(len(new) - len(self.free), keep=set(hashes))
+            for i in new[:len(self.free)]:
+                row = self.free.pop()
+                self._mm[row] = vectors[i]
+                self.index[hashes[i]] = row
+                self.used[hashes[i]] = self.tick
+                lines.append(f"+ {hashes[i]} {row}\n")
+            self._mm.flush()            # vectors are on disk before the journal points at them
+            self._append(lines)
+            self._journal_lines += len(lines)
+            if self._journal_lines > max(4096, 2 * len(self.index)):
+                self._compact()
+
+    def flush(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    def __len__(self):
+        return len(self.index)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+# One cache per (model, dim) per process
+def get_embedding_cache(model_name: str, dim: int) -> EmbeddingCache:
+    key = (model_name, dim)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = EmbeddingCache(model_name, dim)
+        return _caches[key]
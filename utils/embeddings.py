@@ -0,0 +1,149 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+EMBED_MODEL_NAME = os.getenv("EMBED_MODEL_NAME", "all-MiniLM-L6-v2")
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+# torch (float32) | quantized (torch dynamic int8) | onnx (ONNX Runtime, int8 export by default)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_ONNX_FILE = os.getenv("EMBED_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+# Concurrent encode() calls allowed; the model already uses every core per call, so
+# more than a couple at once only adds contention (extra callers wait their turn)
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "2"))
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import re, threading
+from collections import OrderedDict
+from utils.metrics import span
+
+
+EMBED_BACKENDS = ("torch", "quantized", "onnx")
+
+
+# Build a SentenceTransformer for the requested inference backend.
+# - quantized: Linear layers converted to int8 with torch dynamic quantization (CPU only)
+# - onnx: sentence-transformers' ONNX Runtime backend, loading an exported (by default
+#   int8-quantized) graph from the model repo
+# sentence-transformers (and torch) are imported here, on first use, not at module import.
+def load_sentence_transformer(model_name: str, backend: str = EMBED_BACKEND) -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer
+    if backend not in EMBED_BACKENDS:
+        raise ValueError(f"Unknown EMBED_BACKEND {backend!r}, expected one of {EMBED_BACKENDS}")
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": EMBED_ONNX_FILE})
+    model = SentenceTransformer(model_name, device="cpu" if backend == "quantized" else None)
+    if backend == "quantized":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+# Collapse whitespace and case so "What is X?" and "what  is x? " share a cache slot
+def normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class EmbeddingEngine:
+    """
+    Process-wide wrapper around a SentenceTransformer.
+    - The model is loaded once, on first use, behind a lock.
+    - Query embeddings are kept in a bounded LRU keyed on (model name, normalized text).
+    - `backend` picks float32 torch, int8 dynamic-quantized torch or ONNX Runtime;
+      `cache_tag` (model@backend) versions anything that stores vectors.
+    - At most `concurrency` encode() calls run at once (EMBED_CONCURRENCY).
+    Safe to share between concurrent Streamlit sessions and service requests.
+    """
+
+    def __init__(self, model_name: str = EMBED_MODEL_NAME, cache_size: int = QUERY_CACHE_SIZE,
+                 backend: str = EMBED_BACKEND, concurrency: int = EMBED_CONCURRENCY):
+        self.model_name = model_name
+        self.backend = backend
+        self.cache_tag = model_name if backend == "torch" else f"{model_name}@{backend}"
+        self.cache_size = cache_size
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._cache: OrderedDict = OrderedDict()
+        self._encode_slots = threading.BoundedSemaphore(max(1, concurrency))
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self) -> "SentenceTransformer":
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    logger.info(f"Loading embedding model {self.model_name} ({self.backend})")
+                    self._model = load_sentence_transformer(self.model_name, self.backend)
+        return self._model
+
+    # Use an already-built encoder (anything with encode/get_sentence_embedding_dimension)
+    def set_model(self, model):
+        with self._load_lock:
+            self._model = model
+        self.clear_cache()
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode_documents(self, texts: list[str], batch_size: int = 32, show_progress_bar: bool = False):
+        """Encode a batch of chunks. Not cached — chunks are rarely repeated verbatim."""
+        model = self.model
+        with self._encode_slots, span("embed.documents"):
+            return model.encode(texts, batch_size=batch_size, show_progress_bar=show_progress_bar)
+
+    def encode_query(self, query: str) -> list[float]:
+        """Encode a user question, consulting the LRU first."""
+        key = (self.cache_tag, normalize_query(query))
+        with self._cache_lock:
+            vec = self._cache.get(key)
+            if vec is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vec
+            self.misses += 1
+
+        # Encode outside the cache lock so other sessions can still hit the cache meanwhile
+        model = self.model
+        with self._encode_slots, span("embed.query"):
+            vec = model.encode(key[1]).tolist()
+
+        with self._cache_lock:
+            self._cache[key] = vec
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vec
+
+    def cache_stats(self) -> dict:
+        with self._cache_lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# Return the single EmbeddingEngine for this process
+def get_embedding_engine() -> EmbeddingEngine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = EmbeddingEngine()
+    return _engine
@@ -6,19 +6,23 @@ load_dotenv(find_dotenv())
 from utils.logger import init_logger
 logger = init_logger(__name__)
 
+from utils.metrics import span, token_usage
 
-def init_chat():
+
+def init_chat(model_name: str = "gemini-2.0-flash"):
     try:
         geminiai.configure(api_key=os.getenv("GOOGLE_GEMINI_API_KEY")) 
     except AttributeError:
         raise ValueError("Please set the GOOGLE_GEMINI_API_KEY environment variable.")
         exit()
-    model = geminiai.GenerativeModel(model_name="gemini-2.0-flash")     
+    model = geminiai.GenerativeModel(model_name=model_name or "gemini-2.0-flash")     
     my_gemini= model.start_chat()
     return my_gemini
 
 
-def chat(my_gemini, system_prompt: str, messages: list[dict], max_output_tokens=512, temperature=0.7) -> str:
+# Validate the inputs and flatten system prompt + history into one message.
+# Returns None (after logging why) when the turn cannot be sent.
+def _build_content(my_gemini, system_prompt: str, messages: list[dict]):
     if not my_gemini:
         logger.error("chat:my_gemini is not initialized. Please call init_chat() first.")
         return None
@@ -38,9 +42,48 @@ def chat(my_gemini, system_prompt: str, messages: list[dict], max_output_tokens=
         logger.warning("User message is empty.")
         return None
 
-    content=context + "\nUser: " + user_message + "\nAssistant:"
+    return context + "\nUser: " + user_message + "\nAssistant:"
+
+
+def _generation_config(max_output_tokens: int, temperature: float):
+    return geminiai.GenerationConfig(max_output_tokens=max_output_tokens, temperature=temperature)
+
+
+# The flattened content already carries the budgeted history, so it is sent statelessly
+# through the session's model: ChatSession.send_message would resend every earlier turn
+# (each with its full system prompt and context) on top of it.
+def chat(my_gemini, system_prompt: str, messages: list[dict], max_output_tokens=512, temperature=0.7) -> str:
+    content = _build_content(my_gemini, system_prompt, messages)
+    if content is None:
+        return None
 
     logger.info(f"chat:Sending message to Gemini chat model with content: {content}")
 
-    response = my_gemini.send_message(content=content,)        
-    return (response.text.strip() if response and response.text else "")    
\ No newline at end of file
+    with span("llm.chat"):
+        response = my_gemini.model.generate_content(
+            content, generation_config=_generation_config(max_output_tokens, temperature))
+    return (response.text.strip() if response and response.text else "")    
+
+
+# Streaming variant of chat(): yields text deltas as they arrive, then one final
+# dict {"text": full reply, "usage": token counts}.
+def chat_stream(my_gemini, system_prompt: str, messages: list[dict], max_output_tokens=512, temperature=0.7):
+    content = _build_content(my_gemini, system_prompt, messages)
+    if content is None:
+        return
+
+    logger.info(f"chat_stream:Streaming message from Gemini chat model with content: {content}")
+
+    parts = []
+    with span("llm.chat"):
+        response = my_gemini.model.generate_content(
+            content, generation_config=_generation_config(max_output_tokens, temperature), stream=True)
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:      # chunk without text parts (e.g. finish/safety only)
+                text = ""
+            if text:
+                parts.append(text)
+                yield text
+    yield {"text": "".join(parts).strip(), "usage": token_usage(getattr(response, "usage_metadata", None))}
@@ -0,0 +1,152 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+PAGE_BATCH_SIZE = int(os.getenv("PAGE_BATCH_SIZE", "16"))      # pages split together
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))    # encoder mini-batch
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "256")) # points per upsert request
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))     # 0/1 = serial, N = process pool
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))      # page range sent to one worker
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import io, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from itertools import islice
+from utils.metrics import span
+
+
+# pypdf and langchain are imported where they are used, keeping cold start cheap
+def _pdf_reader(file):
+    from pypdf import PdfReader
+    return PdfReader(file)
+
+
+# -----------------------------------------------------------------------------
+# Streaming ingestion stages: page extract -> chunk -> batch.
+# Each stage is a generator so only a few pages / one batch live in memory.
+# -----------------------------------------------------------------------------
+
+# Yield the text of each page, one at a time
+def iter_pdf_pages(file):
+    reader = _pdf_reader(file)
+    for page in reader.pages:
+        with span("pdf.extract"):
+            text = page.extract_text() or ""
+        yield text
+
+
+# -----------------------------------------------------------------------------
+# Parallel page extraction.
+# pypdf parsing is CPU bound, so page ranges are fanned out to a process pool.
+# Each worker receives the PDF bytes once (pool initializer) and re-opens its own
+# PdfReader; ranges come back and are yielded in page order as soon as the head
+# range is ready, so chunking/embedding starts before the last page is parsed.
+# -----------------------------------------------------------------------------
+_worker_reader = None
+
+def _init_extract_worker(data: bytes):
+    global _worker_reader
+    _worker_reader = _pdf_reader(io.BytesIO(data))
+
+
+def _extract_page_range(start: int, stop: int) -> list[str]:
+    return [_worker_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+# Read an upload (Streamlit UploadedFile, file object, path or bytes) into bytes
+def _read_pdf_bytes(file) -> bytes:
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return f.read()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+def iter_pdf_pages_parallel(file, workers: int = PDF_EXTRACT_WORKERS, pages_per_task: int = PDF_PAGES_PER_TASK):
+    data = _read_pdf_bytes(file)
+    num_pages = len(_pdf_reader(io.BytesIO(data)).pages)
+    ranges = [(s, min(s + pages_per_task, num_pages)) for s in range(0, num_pages, pages_per_task)]
+    logger.debug(f"ingest: extracting {num_pages} pages in {len(ranges)} ranges on {workers} workers")
+
+    # Spawned, not forked: the service forks from a process holding thread pools, Redis
+    # connections and the loaded encoder, and a forked child can inherit a held lock.
+    # Workers only import this module (pypdf is loaded lazily), so spawning stays cheap.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_extract_worker, initargs=(data,)) as pool:
+        # Keep a bounded number of ranges in flight so finished-but-unconsumed text
+        # can't pile up when the embedder is the slower stage.
+        pending = deque()
+        todo = iter(ranges)
+        for start, stop in islice(todo, workers * 2):
+            pending.append(pool.submit(_extract_page_range, start, stop))
+        while pending:
+            with span("pdf.extract_wait"):
+                texts = pending.popleft().result()
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append(pool.submit(_extract_page_range, *nxt))
+            yield from texts
+
+
+# Pick serial or process-pool extraction
+def iter_pages(file, workers: int = PDF_EXTRACT_WORKERS):
+    if workers and workers > 1:
+        return iter_pdf_pages_parallel(file, workers=workers)
+    return iter_pdf_pages(file)
+
+
+# Split a stream of page texts into chunks.
+# Pages are split `page_batch` at a time; the last chunk of every window is carried
+# into the next window so chunks spanning a page boundary come out the same as
+# splitting the joined document.
+def iter_chunks(pages, chunk_size: int, chunk_overlap: int, page_batch: int = PAGE_BATCH_SIZE):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    carry = ""
+    window = []
+    for text in pages:
+        window.append(text)
+        if len(window) < page_batch:
+            continue
+        with span("pdf.chunk"):
+            chunks = splitter.split_text("\n".join([carry] + window) if carry else "\n".join(window))
+        window = []
+        if chunks:
+            yield from chunks[:-1]
+            carry = chunks[-1]
+
+    tail = "\n".join([carry] + window) if carry else "\n".join(window)
+    if tail:
+        with span("pdf.chunk"):
+            chunks = splitter.split_text(tail)
+        yield from chunks
+
+
+# Group any iterable into lists of `size`
+def iter_batches(items, size: int):
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+# Count items as they flow through a generator and report them to `progress`
+# (batches count as len(batch) items)
+def track(items, stage: str, progress=None):
+    n = 0
+    for item in items:
+        n += len(item) if isinstance(item, list) else 1
+        if progress:
+            progress(stage, n)
+        yield item
+    logger.debug(f"ingest: stage {stage} done, {n} items")
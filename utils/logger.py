@@ -1,11 +1,14 @@
 # ---- Logging setup ----
-import logging 
+import logging, os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+LOG_LEVEL = os.getenv("LOG_LEVEL", "ERROR").upper()     # DEBUG | INFO | WARNING | ERROR
 
 def init_logger(name:str) -> logging.Logger:
     logging.basicConfig(
-        level=logging.ERROR,                # or DEBUG for more detail
+        level=getattr(logging, LOG_LEVEL, logging.ERROR),
         format='%(asctime)s %(levelname)s %(message)s',
         handlers=[logging.StreamHandler()]  # outputs to console
     )
     logger = logging.getLogger(name)
-    return logger
\ No newline at end of file
+    return logger
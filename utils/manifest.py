@@ -0,0 +1,92 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+MANIFEST_DIR = os.getenv("MANIFEST_DIR", ".index/manifests")
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import hashlib, json, pathlib, time, uuid
+from utils.tenants import DEFAULT_TENANT, tenant_key, tenant_path
+
+# Fixed namespace so the same (document, chunk) always maps to the same point id
+POINT_NAMESPACE = uuid.UUID("6f1c1d1e-3a5b-4c1e-9a57-2f0d7c9b8e41")
+
+
+# -----------------------------------------------------------------------------
+# Content addressing: every chunk is identified by the hash of its text, and its
+# Qdrant point id is derived from (tenant, document id, chunk hash). Re-indexing a
+# document therefore produces the same ids for unchanged chunks, and two tenants
+# uploading the same file never share points.
+# -----------------------------------------------------------------------------
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id(doc_id: str, c_hash: str, tenant: str = DEFAULT_TENANT) -> str:
+    scoped = doc_id if tenant_key(tenant) == DEFAULT_TENANT else f"{tenant_key(tenant)}/{doc_id}"
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{scoped}:{c_hash}"))
+
+
+# What a document contains, independent of its name and tenant: identical uploads match
+def document_fingerprint(chunk_hashes) -> str:
+    return hashlib.sha256("\n".join(sorted(chunk_hashes)).encode()).hexdigest()
+
+
+# Stable id for an uploaded document: its file name when there is one, else a content hash
+def document_id(file) -> str:
+    name = getattr(file, "name", None)
+    if isinstance(file, (str, os.PathLike)):
+        name = os.fspath(file)
+    if name:
+        return pathlib.Path(name).name
+    data = file.getvalue() if hasattr(file, "getvalue") else bytes(file)
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+# -----------------------------------------------------------------------------
+# Per-document manifest: {chunk hash -> point id} plus the embedding it was built
+# with (the engine's cache_tag, model@backend), stored as one small JSON file per
+# document (per tenant directory).
+# -----------------------------------------------------------------------------
+def _manifest_dir(tenant: str = DEFAULT_TENANT) -> pathlib.Path:
+    return tenant_path(MANIFEST_DIR, tenant, default_path=MANIFEST_DIR)
+
+
+def _manifest_path(doc_id: str, tenant: str = DEFAULT_TENANT) -> pathlib.Path:
+    safe = hashlib.sha1(doc_id.encode("utf-8")).hexdigest()
+    return _manifest_dir(tenant) / f"{safe}.json"
+
+
+# The stored manifest, or None when there is none (or it is unreadable). Whether it was
+# built with the current embedding (manifest["model"]) is for the caller to check.
+def load_manifest(doc_id: str, tenant: str = DEFAULT_TENANT):
+    path = _manifest_path(doc_id, tenant)
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except Exception as e:
+        logger.warning(f"load_manifest: unreadable manifest for {doc_id}: {e}")
+        return None
+
+
+def save_manifest(doc_id: str, cache_tag: str, chunks: dict, tenant: str = DEFAULT_TENANT):
+    path = _manifest_path(doc_id, tenant)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"doc_id": doc_id, "model": cache_tag, "updated": time.time(), "chunks": chunks}))
+    tmp.replace(path)
+
+
+def delete_manifest(doc_id: str, tenant: str = DEFAULT_TENANT):
+    _manifest_path(doc_id, tenant).unlink(missing_ok=True)
+
+
+# One tenant's manifests, or with tenant=None every tenant's
+def delete_all_manifests(tenant: str = None):
+    root = pathlib.Path(MANIFEST_DIR) if tenant is None else _manifest_dir(tenant)
+    for p in (root.rglob("*.json") if tenant is None else root.glob("*.json")):
+        p.unlink(missing_ok=True)
@@ -3,9 +3,11 @@
 import os
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
-GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID") or os.getenv("GCP_CLOUD_PROJECT")
-OLDER = os.getenv("OLDER")  #seconds
-REDIS_URL = os.getenv("REDIS_URL")
+OLDER = int(os.getenv("OLDER", "120"))  #seconds
+SHORT_TTL = int(os.getenv("SHORT_TTL", "1200"))            # seconds a chat's short-term memory lives
+SHORT_MAX_MESSAGES = int(os.getenv("SHORT_MAX_MESSAGES", "200"))  # hard cap per chat
+SHORT_WINDOW = int(os.getenv("SHORT_WINDOW", "20"))          # recent messages sent to the LLM
+ROLLING_SUMMARY = os.getenv("ROLLING_SUMMARY", "1") == "1"   # fold new messages into the prior summary
 
 
 #get the logger done also at the top.
@@ -13,22 +15,35 @@ from utils.logger import init_logger
 logger = init_logger(__name__)
 
 
-import time, json, redis, google.cloud.firestore as fs
-from utils.google_generativeai_chat import chat as my_chat
+import time, json
+from utils.clients import get_redis, get_firestore
+from utils.summary_cache import summary_cache
+from utils.metrics import span
+from utils.tenants import redis_key
 
-# --- short-term memory (≤5 min) in Redis ---
-redis_client = redis.Redis.from_url(REDIS_URL)
+# --- short-term memory (≤5 min) in Redis, long-term summaries in GCloud Firestore ---
+# Both clients come from the shared registry in utils/clients.py and are created on first use.
+SUMMARY_COLLECTION = "chat_summaries"
 
+def summary_col():
+    return get_firestore().collection(SUMMARY_COLLECTION)
 
-# --- long-term memory (> 60 secs, summarized) and stored in GCloud Firestore ---
-db = fs.Client(project=GCP_PROJECT_ID) 
-if not db:
-    raise Exception("Firestore client not initialized. Check GCP_PROJECT_ID.")  
-summary_col = db.collection("chat_summaries")
-# Retrieve all documents in the collection
-docs = summary_col.stream()
-for doc in docs:
-    logger.debug(f"Document ID: {doc.id}, Data: {doc.to_dict()}")
+
+# Read-through: summary cache first, Firestore only on a miss (the result, even
+# "no summary yet", is then cached). Returns the summary doc as a dict.
+# fresh=True skips the cache and reads Firestore, the source of truth: store_long
+# builds on the prior summary and hwm_ts, and a copy up to SUMMARY_LOCAL_TTL old
+# (another instance may have summarized since) would fold messages in twice or drop
+# that instance's summary.
+def load_summary_doc(chat_id, fresh: bool = False) -> dict:
+    doc = None if fresh else summary_cache.get(chat_id)
+    if doc is not None:
+        return doc
+    with span("firestore.get_summary"):
+        snap = summary_col().document(chat_id).get()
+    doc = snap.to_dict() if snap.exists else {"summary": "", "hwm_ts": 0.0}
+    summary_cache.put(chat_id, doc)
+    return doc
 
 
 
@@ -45,61 +60,161 @@ def extract_text_from_response(response):
 
 
 
-# Function to remember a short-term message in Redis
-# It stores the message with a timestamp and role (user/assistant)
-def remember_short(chat_id, role, content, redis_client):
+# Short-term memory lives in a Redis sorted set per chat, scored by timestamp,
+# so "older than OLDER seconds" is a range query rather than a full read.
+# Keys are namespaced per chat, so clearing one chat never touches another's.
+def short_key(chat_id) -> str:
+    return redis_key("stm", chat_id)
+
+
+def _as_text(content) -> str:
     # Extract plain text if content is a protobuf response object
     if hasattr(content, "candidates"):
-        content_text = extract_text_from_response(content)
-    else:
-        content_text = str(content)
-        logger.debug(f"chat {chat_id}  | store in Redis| | role {role} | content: {content_text[:50]}...")   
+        return extract_text_from_response(content)
+    return str(content)
 
-    redis_client.rpush(chat_id, json.dumps({
-        "ts": time.time(),
-        "role": role,
-        "content": content_text
-    }))
 
+def _entry(ts, role, content_text) -> str:
+    return json.dumps({"ts": ts, "role": role, "content": content_text})
+
+
+# Function to remember a short-term message in Redis
+# It stores the message with a timestamp and role (user/assistant)
+def remember_short(chat_id, role, content, redis_client=None, ttl=SHORT_TTL):
+    r = redis_client or get_redis()
+    content_text = _as_text(content)
+    logger.debug(f"chat {chat_id}  | store in Redis| | role {role} | content: {content_text[:50]}...")
+    ts = time.time()
+    pipe = r.pipeline(transaction=True)
+    pipe.zadd(short_key(chat_id), {_entry(ts, role, content_text): ts})
+    pipe.expire(short_key(chat_id), ttl)
+    pipe.execute()
+
+
+# Write a whole turn (user + assistant + TTL refresh + cap) in one round-trip
+def remember_turn(chat_id, user_content, assistant_content, redis_client=None, ttl=SHORT_TTL):
+    r = redis_client or get_redis()
+    key = short_key(chat_id)
+    ts = time.time()
+    pipe = r.pipeline(transaction=True)
+    pipe.zadd(key, {
+        _entry(ts, "user", _as_text(user_content)): ts,
+        # nudge the reply after the question so ordering is stable
+        _entry(ts + 1e-6, "assistant", _as_text(assistant_content)): ts + 1e-6,
+    })
+    pipe.zremrangebyrank(key, 0, -SHORT_MAX_MESSAGES - 1)
+    pipe.expire(key, ttl)
+    with span("redis.remember_turn"):
+        pipe.execute()
+    logger.debug(f"chat {chat_id} | remembered turn in Redis")
 
 
 # Function to recall short-term messages from Redis
-# It retrieves messages from the Redis list for the given chat_id
-def recall_short(chat_id):
-    history = [json.loads(m) for m in redis_client.lrange(chat_id, 0, -1)]
-    OLDER = os.getenv("OLDER")  #seconds
-    cutoff = time.time() - int(OLDER)               
-    recent, older = [m for m in history if m["ts"] >= cutoff], [m for m in history if m["ts"] < cutoff]
-    logger.debug(f"chat {chat_id} | recent {recent} | older {older} .")
+# Returns (recent, older): at most `window` messages newer than OLDER seconds, and
+# everything older than that (pending summarization). One pipelined round-trip.
+def recall_short(chat_id, redis_client=None, window=SHORT_WINDOW):
+    r = redis_client or get_redis()
+    key = short_key(chat_id)
+    cutoff = time.time() - OLDER
+    pipe = r.pipeline(transaction=False)
+    pipe.zrevrangebyscore(key, "+inf", cutoff, start=0, num=window)
+    pipe.zrangebyscore(key, "-inf", f"({cutoff}")
+    with span("redis.recall_short"):
+        newest_first, older_raw = pipe.execute()
+    recent = [json.loads(m) for m in reversed(newest_first)]
+    older = [json.loads(m) for m in older_raw]
+    logger.debug(f"chat {chat_id} | recent {len(recent)} | older {len(older)} .")
     return recent, older
 
 
-def store_long(my_gemini, chat_id, older):
+# Drop a chat's short-term memory
+def forget_short(chat_id, redis_client=None):
+    r = redis_client or get_redis()
+    r.delete(short_key(chat_id))
+
+
+# Everything this chat keeps in Redis: short-term memory and its cached summary.
+# The Firestore summary (long-term memory) is left alone.
+def forget_chat(chat_id, redis_client=None):
+    forget_short(chat_id, redis_client)
+    summary_cache.invalidate(chat_id)
+
+
+# Drop short-term messages up to and including `ts` (they now live in the summary)
+def trim_short(chat_id, ts, redis_client=None):
+    r = redis_client or get_redis()
+    removed = r.zremrangebyscore(short_key(chat_id), "-inf", ts)
+    logger.debug(f"chat {chat_id} | trimmed {removed} summarized messages from Redis")
+    return removed
+
+
+# One-shot LLM call for summaries.
+# Summaries may run on a background thread while the same chat session serves the
+# user's turn, so prefer a call on the session's model (no shared history).
+def _summarize(my_gemini, content):
+    model = getattr(my_gemini, "model", None) or getattr(my_gemini, "_model", None)
+    if model is not None and hasattr(model, "generate_content"):
+        response = model.generate_content(content)
+    else:
+        response = my_gemini.send_message(content=content,)
+    return response.text.strip() if response else ""
+
+
+# Summarize older messages into Firestore.
+# Rolling mode (default): only messages newer than the stored high-water mark are
+# folded into the previous summary, the new high-water mark is recorded, and the
+# summarized messages are trimmed from Redis, so each call costs about the same
+# no matter how long the conversation is.
+# With ROLLING_SUMMARY=0 the older messages are re-summarized from scratch.
+def store_long(my_gemini, chat_id, older, rolling=ROLLING_SUMMARY):
     if not older:
         return
 
-    prompt = "Generate a summary of the conversation between the 'user' and 'assistant'in under 2 sentences \n\n"
+    prior, hwm = "", 0.0
+    if rolling:
+        data = load_summary_doc(chat_id, fresh=True)
+        prior, hwm = data.get("summary", ""), data.get("hwm_ts", 0.0)
+        older = [m for m in older if m["ts"] > hwm]
+        if not older:
+            return
+
     # Compose text to summarize from older messages:
     content = "\n".join(f'{m["role"]}: {m["content"]}' for m in older)
     logger.debug(f"store_long: chat {chat_id} | Len of Order messages = {len(older)} ")
-    content = prompt + content
-    response = my_gemini.send_message(content=content,)        
-    summary_text = response.text.strip() if response else ""
+    if prior:
+        prompt = ("Update the running summary of the conversation between the 'user' and 'assistant' "
+                  "with the new messages below, in under 2 sentences.\n\n"
+                  f"Running summary: {prior}\n\nNew messages:\n")
+    else:
+        prompt = "Generate a summary of the conversation between the 'user' and 'assistant'in under 2 sentences \n\n"
+    with span("llm.summarize"):
+        summary_text = _summarize(my_gemini, prompt + content)
+
     #Write the summary to Firestore
-    summary_col.document(chat_id).set({"last_ts": time.time(), "summary": summary_text})
+    new_hwm = max(m["ts"] for m in older)
+    doc = {"last_ts": time.time(), "summary": summary_text, "hwm_ts": new_hwm}
+    with span("firestore.set_summary"):
+        summary_col().document(chat_id).set(doc)
+    summary_cache.put(chat_id, doc)   # write-through
     logger.debug(f"\n store_long: chat {chat_id} | Summary: {summary_text[:50]} in Firestore.")
+    if rolling:
+        trim_short(chat_id, new_hwm)
 
-    
 
 
-# Function to fetch the summary for a chat from Firestore
-# It retrieves the document for the given chat_id and returns the summary text
+
+# Function to fetch the summary for a chat
+# Served from the summary cache; Firestore is only read on a cache miss.
 def fetch_summary(chat_id):
-    doc = summary_col.document(chat_id).get()
-    if doc.exists:
+    summary = load_summary_doc(chat_id).get("summary", "")
+    if summary:
         logger.debug(f"Fetched summary for chat {chat_id} \n")
-        logger.debug(doc.to_dict()["summary"])
-        return doc.to_dict()["summary"]
+        logger.debug(summary)
     else:
         logger.warning(f"fetch_summary: No summary found for chat {chat_id}. Returning empty string.")
-        return ""
\ No newline at end of file
+    logger.debug(f"fetch_summary: cache {summary_cache.stats()}")
+    return summary
+
+
+def summary_cache_stats() -> dict:
+    return summary_cache.stats()
@@ -0,0 +1,214 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))              # 0 = no HTTP exporter
+METRICS_SAMPLES = int(os.getenv("METRICS_SAMPLES", "2048"))     # recent samples kept per span for quantiles
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import bisect, json, logging, threading, time
+from collections import deque
+
+# -----------------------------------------------------------------------------
+# Lightweight per-stage latency metrics.
+#
+#   with span("vector.search"):
+#       hits = store.search(qvec, k)
+#
+# Every span name gets a histogram (fixed buckets, for Prometheus), a window of the
+# most recent samples (for p50/p99 in the JSON export) and an error counter.
+# When METRICS_ENABLED is off, span() hands back one shared no-op object, so
+# an instrumented call costs a global lookup and two empty method calls.
+# -----------------------------------------------------------------------------
+
+# Upper bounds in seconds, 1 ms .. 30 s
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = METRICS_ENABLED
+_lock = threading.Lock()
+_histograms: dict = {}
+
+
+class Histogram:
+    def __init__(self, samples: int = METRICS_SAMPLES):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.recent = deque(maxlen=samples)
+
+    def observe(self, seconds: float, error: bool = False):
+        self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+        self.recent.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> dict:
+        ms = lambda s: round(s * 1000, 3)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": ms(self.sum / self.count) if self.count else 0.0,
+            "p50_ms": ms(self.quantile(0.50)),
+            "p90_ms": ms(self.quantile(0.90)),
+            "p99_ms": ms(self.quantile(0.99)),
+            "max_ms": ms(self.max),
+        }
+
+
+def metrics_enabled() -> bool:
+    return _enabled
+
+
+# Turn collection on/off at runtime (benchmarks, tests); the env var sets the default
+def enable_metrics(flag: bool = True):
+    global _enabled
+    _enabled = flag
+
+
+# Record one duration (seconds) under `name`
+def observe(name: str, seconds: float, error: bool = False):
+    if not _enabled:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(seconds, error)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"span {name}: {seconds * 1000:.1f} ms{' (error)' if error else ''}")
+
+
+class _Span:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # GeneratorExit = a streaming consumer stopped early, not a failure
+        observe(self.name, time.perf_counter() - self.t0,
+                exc_type is not None and not issubclass(exc_type, GeneratorExit))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+# Context manager timing the enclosed block under `name`
+def span(name: str):
+    return _Span(name) if _enabled else _NOOP
+
+
+# Token counts from a Gemini response's usage_metadata (GoogleAI and Vertex share the fields)
+def token_usage(meta) -> dict:
+    if meta is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(meta, "prompt_token_count", None),
+        "output_tokens": getattr(meta, "candidates_token_count", None),
+        "total_tokens": getattr(meta, "total_token_count", None),
+    }
+
+
+def reset_metrics():
+    with _lock:
+        _histograms.clear()
+
+
+# {span name: {count, errors, mean_ms, p50_ms, p90_ms, p99_ms, max_ms}}
+def export_json() -> dict:
+    with _lock:
+        return {name: hist.summary() for name, hist in sorted(_histograms.items())}
+
+
+# Prometheus text exposition format (one histogram family, labelled by span)
+def export_prometheus() -> str:
+    lines = [
+        "# HELP app_span_seconds Wall time per pipeline stage.",
+        "# TYPE app_span_seconds histogram",
+    ]
+    errors = ["# HELP app_span_errors_total Stage calls that raised.",
+              "# TYPE app_span_errors_total counter"]
+    with _lock:
+        for name, hist in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ("+Inf",), hist.bucket_counts):
+                cumulative += n
+                lines.append(f'app_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'app_span_seconds_sum{{span="{name}"}} {hist.sum:.6f}')
+            lines.append(f'app_span_seconds_count{{span="{name}"}} {hist.count}')
+            errors.append(f'app_span_errors_total{{span="{name}"}} {hist.errors}')
+    return "\n".join(lines + errors) + "\n"
+
+
+# -----------------------------------------------------------------------------
+# Optional scrape endpoint: GET /metrics (Prometheus text) and /metrics.json.
+# Started once per process, on a daemon thread, so it is safe to call on every
+# Streamlit rerun.
+# -----------------------------------------------------------------------------
+_server = None
+
+def start_metrics_server(port: int = METRICS_PORT):
+    global _server
+    if not port or _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, ctype = export_prometheus().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, ctype = json.dumps(export_json()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+            except OSError as e:
+                logger.warning(f"Metrics server not started on port {port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"Metrics server listening on :{port}")
+    return _server
@@ -0,0 +1,108 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+PROMPT_CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", "1200"))   # retrieved snippets
+PROMPT_SUMMARY_TOKENS = int(os.getenv("PROMPT_SUMMARY_TOKENS", "200"))    # conversation summary
+PROMPT_HISTORY_TOKENS = int(os.getenv("PROMPT_HISTORY_TOKENS", "1000"))   # recent messages
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "4"))               # estimate for Gemini/Gemma
+MIN_CHUNK_OVERLAP = int(os.getenv("MIN_CHUNK_OVERLAP", "20"))             # chars treated as a real overlap
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import math
+
+SYSTEM_TEMPLATE = "You are a helpful assistant that answers only from the document."
+
+
+# Cheap token estimate; the Gemini tokenizer is not available locally
+def count_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _truncate(text: str, budget: int) -> str:
+    limit = int(budget * CHARS_PER_TOKEN)
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + " …"
+
+
+# Length of the longest suffix of `a` that is a prefix of `b`
+def _overlap(a: str, b: str) -> int:
+    for n in range(min(len(a), len(b)), MIN_CHUNK_OVERLAP - 1, -1):
+        if a.endswith(b[:n]):
+            return n
+    return 0
+
+
+# Remove what a candidate shares with snippets already kept: drop it if it is contained
+# in one of them, otherwise cut the text it shares at either end. Any shared edge of at
+# least MIN_CHUNK_OVERLAP chars counts — in practice the CHUNK_OVERLAP region the splitter
+# repeats between neighbouring chunks, which is why the floor should stay below it.
+def _dedupe(candidate: str, kept: list[str]) -> str:
+    for k in kept:
+        if candidate in k:
+            return ""
+        n = _overlap(k, candidate)
+        if n:
+            candidate = candidate[n:]
+        n = _overlap(candidate, k)
+        if n:
+            candidate = candidate[:-n]
+    return candidate.strip()
+
+
+# Keep the highest-scoring snippets that fit in `budget` tokens (lowest scores drop first)
+def select_context(scored_snippets: list[tuple[str, float]], budget: int = PROMPT_CONTEXT_TOKENS) -> list[str]:
+    kept, used = [], 0
+    for text, _score in sorted(scored_snippets, key=lambda s: s[1], reverse=True):
+        text = _dedupe(text, kept)
+        if not text:
+            continue
+        cost = count_tokens(text)
+        if used + cost > budget:
+            continue
+        kept.append(text)
+        used += cost
+    return kept
+
+
+# Keep the newest messages that fit in `budget` tokens (oldest drop first)
+def select_history(messages: list[dict], budget: int = PROMPT_HISTORY_TOKENS) -> list[dict]:
+    kept, used = [], 0
+    for m in reversed(messages):
+        cost = count_tokens(m.get("content") or "")
+        if used + cost > budget:
+            break
+        kept.append(m)
+        used += cost
+    return list(reversed(kept))
+
+
+# -----------------------------------------------------------------------------
+# Assemble the system prompt and the history within per-section token budgets.
+# The first paragraph stays the fixed SYSTEM_TEMPLATE (backends may cache on it).
+# Returns (system_prompt, history, stats) where stats has the token estimate per section.
+# -----------------------------------------------------------------------------
+def build_prompt(scored_snippets: list[tuple[str, float]], summary: str, history: list[dict],
+                 context_budget: int = PROMPT_CONTEXT_TOKENS,
+                 summary_budget: int = PROMPT_SUMMARY_TOKENS,
+                 history_budget: int = PROMPT_HISTORY_TOKENS):
+    context = select_context(scored_snippets, context_budget)
+    summary = _truncate(summary or "", summary_budget)
+    history = select_history(history, history_budget)
+
+    system_prompt = (
+        f"{SYSTEM_TEMPLATE}\n\n"
+        f"Document context:\n• " + "\n• ".join(context) + "\n\n"
+        f"Conversation summary: {summary}"
+    )
+    stats = {
+        "context_tokens": sum(count_tokens(t) for t in context),
+        "context_snippets": f"{len(context)}/{len(scored_snippets)}",
+        "summary_tokens": count_tokens(summary),
+        "history_tokens": sum(count_tokens(m.get("content") or "") for m in history),
+        "system_tokens": count_tokens(system_prompt),
+    }
+    logger.debug(f"build_prompt: {stats}")
+    return system_prompt, history, stats
@@ -0,0 +1,144 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+RERANK_MMR = os.getenv("RERANK_MMR", "1") == "1"                     # diversify the top-k with MMR
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))                    # 1 = relevance only, 0 = diversity only
+MMR_DUP_THRESHOLD = float(os.getenv("MMR_DUP_THRESHOLD", "0.95"))     # cosine at which a chunk is a duplicate
+RERANK_FETCH = int(os.getenv("RERANK_FETCH", "4"))                    # candidates considered = k * this
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "")                      # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+RERANKER_TOP_N = int(os.getenv("RERANKER_TOP_N", "20"))               # candidates scored by the cross-encoder
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import threading
+import numpy as np
+from utils.embeddings import EMBED_CONCURRENCY
+from utils.metrics import span
+
+
+# Greedy maximal marginal relevance over unit vectors, vectorized per step:
+#   next = argmax  lam * relevance[i] - (1 - lam) * max_{j in selected} cos(i, j)
+# relevance is expected in [0, 1]. Candidates within `dup_threshold` cosine of a chunk
+# already picked are dropped outright, so fewer than k indices may come back.
+def mmr_select(vectors, relevance, k: int, lam: float = MMR_LAMBDA,
+               dup_threshold: float = MMR_DUP_THRESHOLD) -> list[int]:
+    v = np.asarray(vectors, dtype=np.float32)
+    v = v / np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+    relevance = np.asarray(relevance, dtype=np.float32)
+    sims = v @ v.T
+    redundancy = np.zeros(len(v), dtype=np.float32)
+    open_ = np.ones(len(v), dtype=bool)
+    picked = []
+    while len(picked) < k and open_.any():
+        gain = np.where(open_, lam * relevance - (1 - lam) * redundancy, -np.inf)
+        i = int(np.argmax(gain))
+        picked.append(i)
+        open_[i] = False
+        open_ &= sims[i] < dup_threshold
+        redundancy = np.maximum(redundancy, sims[i])
+    return picked
+
+
+# Scale scores to [0, 1] so cosine, RRF and cross-encoder logits mix the same way in MMR
+def _unit_range(scores) -> np.ndarray:
+    s = np.asarray(scores, dtype=np.float32)
+    span_ = float(s.max() - s.min()) if s.size else 0.0
+    return (s - s.min()) / span_ if span_ > 0 else np.ones_like(s)
+
+
+class Reranker:
+    """
+    Post-retrieval stage run on an over-fetched candidate list (k * `fetch`):
+    - optional cross-encoder (`model_name`) re-scores the first `top_n` candidates;
+    - MMR then picks up to k of them, skipping near-duplicates (e.g. CHUNK_OVERLAP
+      neighbours or the same page indexed twice).
+    The cross-encoder is loaded on first use. With neither stage enabled the
+    candidates pass through unchanged and search does not over-fetch.
+    """
+
+    def __init__(self, mmr: bool = RERANK_MMR, mmr_lambda: float = MMR_LAMBDA,
+                 dup_threshold: float = MMR_DUP_THRESHOLD, fetch: int = RERANK_FETCH,
+                 model_name: str = RERANKER_MODEL, top_n: int = RERANKER_TOP_N):
+        self.mmr = mmr
+        self.mmr_lambda = mmr_lambda
+        self.dup_threshold = dup_threshold
+        self.fetch = max(1, fetch)
+        self.model_name = model_name
+        self.top_n = top_n
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, EMBED_CONCURRENCY))
+
+    @property
+    def enabled(self) -> bool:
+        return self.mmr or bool(self.model_name)
+
+    # Candidates to retrieve for a final top-k
+    def fetch_k(self, k: int) -> int:
+        return k * self.fetch if self.enabled else k
+
+    @property
+    def model(self) -> "CrossEncoder":
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    logger.info(f"Loading re-ranker {self.model_name}")
+                    self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    # Use an already-built cross-encoder (anything with predict(pairs))
+    def set_model(self, model, model_name: str = None):
+        with self._load_lock:
+            self._model = model
+            self.model_name = model_name or self.model_name or type(model).__name__
+
+    def warm_up(self):
+        if self.model_name:
+            self.cross_scores("warm up", ["warm up"])
+
+    def cross_scores(self, query: str, texts: list[str]) -> np.ndarray:
+        model = self.model
+        with self._slots, span("rerank.cross_encoder"):
+            return np.asarray(model.predict([(query, t) for t in texts], show_progress_bar=False),
+                              dtype=np.float32).reshape(-1)
+
+    # candidates: [(text, score, vector or None)] best first -> [(text, score)], at most k
+    def select(self, query: str, candidates: list[tuple], k: int) -> list[tuple]:
+        if not self.enabled or not candidates:
+            return [(t, s) for t, s, _ in candidates[:k]]
+        if self.model_name:
+            candidates = candidates[:max(k, self.top_n)]
+            scores = self.cross_scores(query, [t for t, _, _ in candidates])
+            order = np.argsort(-scores)
+            candidates = [(candidates[i][0], float(scores[i]), candidates[i][2]) for i in order]
+        if not self.mmr or any(v is None for _, _, v in candidates):
+            return [(t, s) for t, s, _ in candidates[:k]]
+        with span("rerank.mmr"):
+            picked = mmr_select([v for _, _, v in candidates], _unit_range([s for _, s, _ in candidates]),
+                                k, self.mmr_lambda, self.dup_threshold)
+        logger.debug(f"Reranker: {len(candidates)} candidates -> {len(picked)} after MMR")
+        return [(candidates[i][0], candidates[i][1]) for i in picked]
+
+
+_reranker = None
+_reranker_lock = threading.Lock()
+
+# Return the single Reranker for this process (configured from .env)
+def get_reranker() -> Reranker:
+    global _reranker
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                _reranker = Reranker()
+    return _reranker
+
+
+# Swap in another configuration (benchmarks, A/B runs)
+def set_reranker(reranker: Reranker):
+    global _reranker
+    with _reranker_lock:
+        _reranker = reranker
@@ -0,0 +1,106 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "0") == "1"
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import json, re, subprocess, sys, threading, time
+
+# -----------------------------------------------------------------------------
+# Cold-start helpers.
+# Heavy dependencies (embedding model, vector store, Redis, Firestore) are created on
+# first use. warm_up() touches them ahead of the first user turn, e.g. right after the
+# container starts, and reports how long each one took.
+# -----------------------------------------------------------------------------
+def warm_up() -> dict:
+    from utils.embeddings import get_embedding_engine
+    from utils.vector_store import get_store, get_lexical
+    from utils.clients import redis_healthy, get_firestore
+    from utils.rerank import get_reranker
+
+    def redis_ping():
+        if not redis_healthy():
+            raise ConnectionError("Redis did not answer PING")
+
+    steps = {
+        "embedding_model": lambda: get_embedding_engine().encode_query("warm up"),
+        "vector_store": lambda: get_store().exists(),
+        "lexical_index": get_lexical,
+        "reranker": lambda: get_reranker().warm_up(),
+        "redis": redis_ping,
+        "firestore": get_firestore,
+    }
+    timings = {}
+    for name, step in steps.items():
+        t0 = time.perf_counter()
+        try:
+            step()
+            timings[name] = round((time.perf_counter() - t0) * 1000, 1)
+        except Exception as e:
+            timings[name] = f"failed: {e}"
+            logger.warning(f"warm_up: {name} failed: {e}")
+    logger.info(f"warm_up: ms {timings}")
+    return timings
+
+
+_warm_thread = None
+_warm_lock = threading.Lock()
+
+# Start warm_up() once per process on a background thread (no-op after the first call)
+def warm_up_in_background():
+    global _warm_thread
+    with _warm_lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+            _warm_thread.start()
+    return _warm_thread
+
+
+# -----------------------------------------------------------------------------
+# Import-time profile: imports `module` in a fresh interpreter with -X importtime
+# and returns the slowest imports by cumulative time, so regressions show up.
+#   python -m utils.startup               (or: python -m utils.startup <module> ...)
+# -----------------------------------------------------------------------------
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def import_profile(module: str, top: int = 15) -> dict:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if m:
+            rows.append({"module": m.group(4), "self_ms": int(m.group(1)) / 1000,
+                         "cumulative_ms": int(m.group(2)) / 1000, "depth": len(m.group(3)) // 2})
+    # importtime lists children before their parent; the target's own imports are the
+    # depth-1 rows between the previous top-level row and the target's row
+    total, children = None, []
+    for i, r in enumerate(rows):
+        if r["depth"] == 0 and r["module"] == module:
+            total = r["cumulative_ms"]
+            for c in reversed(rows[:i]):
+                if c["depth"] == 0:
+                    break
+                if c["depth"] == 1:
+                    children.append(c)
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "total_ms": total,
+        "slowest": [{"module": c["module"], "cumulative_ms": c["cumulative_ms"]}
+                    for c in sorted(children, key=lambda c: c["cumulative_ms"], reverse=True)[:top]],
+    }
+
+
+# The modules app.py imports at start-up
+APP_MODULES = ["utils.clients", "utils.vector_store", "utils.memory", "utils.chat_turn", "utils.chat_service",
+               "utils.timestamp"]
+
+if __name__ == "__main__":
+    modules = sys.argv[1:] or APP_MODULES
+    print(json.dumps([import_profile(m) for m in modules], indent=2))
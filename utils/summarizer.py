@@ -0,0 +1,59 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", "2"))
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.memory import store_long
+
+# -----------------------------------------------------------------------------
+# Background summarization.
+# store_long makes an LLM call plus a Firestore write; running it inline roughly
+# doubled the latency of the turn that triggered it. Jobs go to a small thread
+# pool instead, at most one in flight per chat_id, and the foreground turn just
+# uses whatever summary is already stored.
+# -----------------------------------------------------------------------------
+_pool = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="summarizer")
+_inflight = {}
+_lock = threading.Lock()
+
+
+def _run(my_gemini, chat_id, older):
+    try:
+        store_long(my_gemini, chat_id, older)
+    except Exception as e:
+        logger.exception(f"summarizer: store_long failed for chat {chat_id}: {e}")
+    finally:
+        with _lock:
+            _inflight.pop(chat_id, None)
+
+
+# Queue a summary of `older` for chat_id. Returns False if one is already running for it.
+def schedule_summary(my_gemini, chat_id, older) -> bool:
+    if not older:
+        return False
+    with _lock:
+        if chat_id in _inflight:
+            logger.debug(f"summarizer: chat {chat_id} already being summarized, skipping")
+            return False
+        _inflight[chat_id] = _pool.submit(_run, my_gemini, chat_id, older)
+    return True
+
+
+def pending_summaries() -> int:
+    with _lock:
+        return len(_inflight)
+
+
+# Block until chat_id's summary (if any) is written — for tests/benchmarks and shutdown
+def wait_for_summary(chat_id, timeout: float | None = None):
+    with _lock:
+        fut = _inflight.get(chat_id)
+    if fut is not None:
+        fut.result(timeout=timeout)
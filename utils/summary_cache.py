@@ -0,0 +1,103 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "4096"))      # chats kept in-process
+SUMMARY_LOCAL_TTL = float(os.getenv("SUMMARY_LOCAL_TTL", "60"))        # seconds, in-process tier
+SUMMARY_REDIS_TTL = int(os.getenv("SUMMARY_REDIS_TTL", "86400"))      # seconds, shared Redis tier
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import json, threading, time
+from collections import OrderedDict
+from utils.clients import get_redis
+from utils.metrics import span
+from utils.tenants import redis_key
+
+
+class SummaryCache:
+    """
+    Two-tier cache in front of the Firestore chat_summaries collection.
+    - Tier 1: in-process LRU with a short TTL.
+    - Tier 2: Redis (`<REDIS_NAMESPACE>:summary:<chat_id>`), shared by every instance.
+    store_long writes through both tiers, so steady-state turns never read Firestore.
+    A chat with no summary is cached too (as an empty summary).
+    """
+
+    def __init__(self, size: int = SUMMARY_CACHE_SIZE, local_ttl: float = SUMMARY_LOCAL_TTL,
+                 redis_ttl: int = SUMMARY_REDIS_TTL):
+        self.size = size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self._lock = threading.Lock()
+        self._local: OrderedDict = OrderedDict()   # chat_id -> (expires_at, doc)
+        self.counters = {"local_hits": 0, "redis_hits": 0, "misses": 0, "writes": 0}
+
+    @staticmethod
+    def _key(chat_id) -> str:
+        return redis_key("summary", chat_id)
+
+    def _put_local(self, chat_id, doc):
+        with self._lock:
+            self._local[chat_id] = (time.monotonic() + self.local_ttl, doc)
+            self._local.move_to_end(chat_id)
+            while len(self._local) > self.size:
+                self._local.popitem(last=False)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    # Return the cached summary doc ({"summary", "hwm_ts", ...}) or None on a miss
+    def get(self, chat_id):
+        with self._lock:
+            entry = self._local.get(chat_id)
+            if entry and entry[0] > time.monotonic():
+                self._local.move_to_end(chat_id)
+                self.counters["local_hits"] += 1
+                return entry[1]
+
+        try:
+            with span("redis.summary_get"):
+                raw = get_redis().get(self._key(chat_id))
+        except Exception as e:
+            logger.warning(f"SummaryCache: Redis tier unavailable: {e}")
+            raw = None
+        if raw is not None:
+            doc = json.loads(raw)
+            self._put_local(chat_id, doc)
+            self._count("redis_hits")
+            return doc
+
+        self._count("misses")
+        return None
+
+    def put(self, chat_id, doc: dict):
+        self._put_local(chat_id, doc)
+        self._count("writes")
+        try:
+            with span("redis.summary_set"):
+                get_redis().set(self._key(chat_id), json.dumps(doc), ex=self.redis_ttl)
+        except Exception as e:
+            logger.warning(f"SummaryCache: could not write Redis tier: {e}")
+
+    def invalidate(self, chat_id):
+        with self._lock:
+            self._local.pop(chat_id, None)
+        try:
+            get_redis().delete(self._key(chat_id))
+        except Exception as e:
+            logger.warning(f"SummaryCache: could not invalidate Redis tier: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            c = dict(self.counters)
+            c["size"] = len(self._local)
+        reads = c["local_hits"] + c["redis_hits"] + c["misses"]
+        c["hit_rate"] = ((c["local_hits"] + c["redis_hits"]) / reads) if reads else 0.0
+        return c
+
+
+summary_cache = SummaryCache()
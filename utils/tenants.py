@@ -0,0 +1,54 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+TENANT_SCOPE = os.getenv("TENANT_SCOPE", "chat")           # chat (documents per chat) | shared (one index)
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+REDIS_NAMESPACE = os.getenv("REDIS_NAMESPACE", "pdfrag")    # prefix of every Redis key this app writes
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import hashlib, pathlib, re
+
+# -----------------------------------------------------------------------------
+# Tenancy.
+# A tenant owns a set of documents: its chunks carry a `tenant` payload field in the
+# shared collection (filtered at search time), its BM25 index and manifests live in
+# their own files, and resetting it touches nothing else. With TENANT_SCOPE=chat
+# every chat is its own tenant; with TENANT_SCOPE=shared all chats use DEFAULT_TENANT.
+# Chat memory is always per chat, under REDIS_NAMESPACE-prefixed keys.
+# -----------------------------------------------------------------------------
+_SAFE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+# Tenant ids end up in file names and Redis keys; anything unusual is replaced by a hash
+def tenant_key(tenant: str) -> str:
+    tenant = str(tenant or DEFAULT_TENANT)
+    if _SAFE.match(tenant) and tenant not in (".", ".."):
+        return tenant
+    return "t-" + hashlib.sha256(tenant.encode()).hexdigest()[:24]
+
+
+# The tenant a chat's documents belong to: an explicit tenant wins, else TENANT_SCOPE decides
+def resolve_tenant(chat_id: str = None, tenant: str = None) -> str:
+    if tenant:
+        return tenant_key(tenant)
+    if TENANT_SCOPE == "chat" and chat_id:
+        return tenant_key(chat_id)
+    return DEFAULT_TENANT
+
+
+# Per-tenant location under `root`. The default tenant keeps the pre-tenancy layout
+# (`default_path` itself), so single-tenant deployments find their existing files.
+def tenant_path(root, tenant: str, name: str = "", default_path=None) -> pathlib.Path:
+    if tenant_key(tenant) == DEFAULT_TENANT and default_path is not None:
+        return pathlib.Path(default_path)
+    path = pathlib.Path(root) / "tenants" / tenant_key(tenant)
+    return path / name if name else path
+
+
+# Namespaced Redis key, e.g. redis_key("stm", chat_id) -> "pdfrag:stm:<chat_id>"
+def redis_key(kind: str, ident: str) -> str:
+    return f"{REDIS_NAMESPACE}:{kind}:{ident}"
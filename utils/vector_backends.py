@@ -0,0 +1,363 @@
+# Get the env at the very top before any
+import os
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv())
+QDRANT_URL = os.getenv("QDRANT_URL")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")   # qdrant | local
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR")           # set to persist the local backend
+COLLECTION_CACHE_TTL = float(os.getenv("COLLECTION_CACHE_TTL", "30"))  # seconds
+
+#get the logger done also at the top.
+from utils.logger import init_logger
+logger = init_logger(__name__)
+
+import json, pathlib, threading, time
+from abc import ABC, abstractmethod
+from typing import NamedTuple
+import numpy as np
+
+
+# Raised by search() when the collection does not exist, so callers can skip a pre-check
+class CollectionMissing(Exception):
+    pass
+
+
+class Hit(NamedTuple):
+    id: str
+    score: float
+    payload: dict
+    vector: list | np.ndarray | None = None      # list from Qdrant, a row copy from the local backend
+
+
+# -----------------------------------------------------------------------------
+# Interface used by utils/vector_store.py. A backend holds one named collection
+# of (id, vector, payload) points compared by cosine similarity.
+# `where` is a {payload field: value} dict; every pair must match (used to scope
+# search, scan and delete to one tenant / document).
+# exists(fresh=True) bypasses any cached answer; create() only creates a missing
+# collection and never touches the points of an existing one (all tenants share it).
+# -----------------------------------------------------------------------------
+class VectorBackend(ABC):
+    def __init__(self, collection: str):
+        self.collection = collection
+
+    @abstractmethod
+    def exists(self, fresh: bool = False) -> bool: ...
+    @abstractmethod
+    def create(self, dim: int): ...
+    @abstractmethod
+    def drop(self): ...
+    @abstractmethod
+    def upsert(self, ids: list, vectors, payloads: list[dict]): ...
+    @abstractmethod
+    def delete_ids(self, ids: list): ...
+    @abstractmethod
+    def delete_where(self, where: dict): ...
+    @abstractmethod
+    def scan(self, where: dict, fields: list[str]) -> list[tuple]: ...
+    @abstractmethod
+    def search(self, vector, k: int, with_vectors: bool = False, where: dict = None) -> list[Hit]: ...
+
+    def flush(self):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+# -----------------------------------------------------------------------------
+# Qdrant (remote) backend
+# Collection existence is cached for COLLECTION_CACHE_TTL seconds and updated
+# directly on create/drop, so a chat turn does not pay a get_collections()
+# round-trip. search() does not pre-check at all: an HTTP 404 from Qdrant is
+# turned into CollectionMissing.
+# -----------------------------------------------------------------------------
+class QdrantBackend(VectorBackend):
+    def __init__(self, collection: str, url: str = QDRANT_URL, api_key: str = QDRANT_API_KEY,
+                 ttl: float = COLLECTION_CACHE_TTL):
+        super().__init__(collection)
+        from qdrant_client import QdrantClient, models
+        from qdrant_client.http.exceptions import UnexpectedResponse
+        self.models = models
+        self.UnexpectedResponse = UnexpectedResponse
+        self.client = QdrantClient(url=url, api_key=api_key)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._names = None
+        self._fetched_at = 0.0
+        self.counters = {"get_collections": 0, "registry_hits": 0, "searches": 0, "missing_on_search": 0}
+
+    def _collection_names(self) -> set:
+        with self._lock:
+            if self._names is not None and time.monotonic() - self._fetched_at < self.ttl:
+                self.counters["registry_hits"] += 1
+                return self._names
+        names = {c.name for c in self.client.get_collections().collections}
+        with self._lock:
+            self.counters["get_collections"] += 1
+            self._names, self._fetched_at = names, time.monotonic()
+        return names
+
+    def _mark(self, present: bool):
+        with self._lock:
+            if self._names is None:
+                return
+            self._names = (self._names | {self.collection}) if present else (self._names - {self.collection})
+            self._fetched_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._names = None
+
+    def _filter(self, where):
+        if not where:
+            return None
+        m = self.models
+        return m.Filter(must=[m.FieldCondition(key=key, match=m.MatchValue(value=value))
+                              for key, value in where.items()])
+
+    def exists(self, fresh: bool = False) -> bool:
+        if not fresh:
+            return self.collection in self._collection_names()
+        present = self.client.collection_exists(self.collection)
+        self._mark(present)
+        return present
+
+    # Safe with several instances ingesting at once: checked against Qdrant itself (the
+    # registry may be up to `ttl` old) and a concurrent creator winning the race (409) is fine
+    def create(self, dim: int):
+        m = self.models
+        if not self.exists(fresh=True):
+            try:
+                self.client.create_collection(
+                    self.collection,
+                    vectors_config=m.VectorParams(size=dim, distance=m.Distance.COSINE),
+                )
+            except self.UnexpectedResponse as e:
+                if e.status_code != 409:
+                    raise
+                logger.info(f"Collection {self.collection} was created concurrently")
+        self.client.create_payload_index(self.collection, "doc_id", m.PayloadSchemaType.KEYWORD)
+        # tenant-aware keyword index: Qdrant co-locates each tenant's points for filtered search
+        try:
+            tenant_schema = m.KeywordIndexParams(type=m.KeywordIndexType.KEYWORD, is_tenant=True)
+        except AttributeError:      # qdrant-client < 1.11
+            tenant_schema = m.PayloadSchemaType.KEYWORD
+        self.client.create_payload_index(self.collection, "tenant", tenant_schema)
+        self._mark(True)
+
+    def drop(self):
+        if self.exists():
+            self.client.delete_collection(self.collection)
+        self._mark(False)
+
+    def upsert(self, ids, vectors, payloads):
+        points = [
+            self.models.PointStruct(id=i, vector=list(map(float, v)), payload=p)
+            for i, v, p in zip(ids, vectors, payloads)
+        ]
+        self.client.upsert(collection_name=self.collection, points=points, wait=True)
+
+    def delete_ids(self, ids):
+        self.client.delete(self.collection, points_selector=self.models.PointIdsList(points=list(ids)))
+
+    def delete_where(self, where):
+        self.client.delete(self.collection, points_selector=self.models.FilterSelector(filter=self._filter(where)))
+
+    def scan(self, where, fields):
+        out, offset = [], None
+        while True:
+            points, offset = self.client.scroll(self.collection, scroll_filter=self._filter(where), limit=1024,
+                                                offset=offset, with_payload=fields, with_vectors=False)
+            out.extend((str(p.id), p.payload) for p in points)
+            if offset is None:
+                return out
+
+    def search(self, vector, k, with_vectors=False, where=None):
+        with self._lock:
+            self.counters["searches"] += 1
+        try:
+            hits = self.client.search(self.collection, list(map(float, vector)), limit=k, with_vectors=with_vectors,
+                                      query_filter=self._filter(where))
+        except self.UnexpectedResponse as e:
+            if e.status_code == 404:
+                with self._lock:
+                    self.counters["missing_on_search"] += 1
+                self._mark(False)
+                raise CollectionMissing(self.collection) from e
+            raise
+        return [Hit(str(h.id), h.score, h.payload, h.vector if with_vectors else None) for h in hits]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+
+# -----------------------------------------------------------------------------
+# Local in-process backend
+# Vectors are L2-normalized into one float32 matrix so cosine similarity is a single
+# mat-vec product; top-k uses argpartition. With LOCAL_INDEX_DIR set the matrix is
+# saved as .npy and re-opened memory-mapped on the next start.
+# A `where` search scores only the matching rows; the row mask per filter is cached
+# until the next write, so a tenant's queries cost O(tenant points).
+# -----------------------------------------------------------------------------
+class LocalBackend(VectorBackend):
+    def __init__(self, collection: str, root: str | None = LOCAL_INDEX_DIR):
+        super().__init__(collection)
+        self.dir = pathlib.Path(root) / collection if root else None
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.dim = None
+        self.matrix = None     # (capacity, dim) float32, first `n` rows valid
+        self.n = 0
+        self.ids = []
+        self.payloads = []
+        self.row_of = {}
+        self._rows = {}        # filter -> matching row numbers, dropped on every write
+
+    def _load(self):
+        if not self.dir or not (self.dir / "meta.json").exists():
+            return
+        meta = json.loads((self.dir / "meta.json").read_text())
+        self.dim = meta["dim"]
+        self.ids = meta["ids"]
+        self.payloads = meta["payloads"]
+        self.n = len(self.ids)
+        self.row_of = {pid: r for r, pid in enumerate(self.ids)}
+        self.matrix = np.load(self.dir / "vectors.npy", mmap_mode="r")
+        logger.debug(f"LocalBackend: loaded {self.n} points from {self.dir}")
+
+    def _writable(self, needed: int):
+        # mmapped matrices are read-only; copy into RAM (and grow) before mutating
+        cap = 0 if self.matrix is None else self.matrix.shape[0]
+        if isinstance(self.matrix, np.memmap) or needed > cap:
+            new = np.zeros((max(needed, cap * 2, 256), self.dim), dtype=np.float32)
+            if self.n:
+                new[:self.n] = self.matrix[:self.n]
+            self.matrix = new
+
+    def exists(self, fresh: bool = False) -> bool:
+        return self.dim is not None
+
+    def create(self, dim: int):
+        with self._lock:
+            if self.dim is not None:
+                return
+            self._reset()
+            self.dim = dim
+            self.matrix = np.zeros((0, dim), dtype=np.float32)
+
+    def drop(self):
+        with self._lock:
+            self._reset()
+            if self.dir:
+                for name in ("meta.json", "vectors.npy"):
+                    (self.dir / name).unlink(missing_ok=True)
+
+    def _matching_rows(self, where: dict):
+        key = tuple(sorted(where.items()))
+        rows = self._rows.get(key)
+        if rows is None:
+            rows = np.fromiter((r for r, p in enumerate(self.payloads[:self.n])
+                                if all(p.get(f) == v for f, v in where.items())), dtype=np.int64)
+            if len(self._rows) >= 256:
+                self._rows.clear()
+            self._rows[key] = rows
+        return rows
+
+    def upsert(self, ids, vectors, payloads):
+        vecs = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        vecs = vecs / np.where(norms == 0, 1, norms)
+        with self._lock:
+            self._rows.clear()
+            self._writable(self.n + len(ids))
+            for pid, v, p in zip(ids, vecs, payloads):
+                row = self.row_of.get(pid)
+                if row is None:
+                    row = self.n
+                    self.n += 1
+                    self.ids.append(pid)
+                    self.payloads.append(p)
+                    self.row_of[pid] = row
+                else:
+                    self.payloads[row] = p
+                self.matrix[row] = v
+
+    def delete_ids(self, ids):
+        with self._lock:
+            self._rows.clear()
+            self._writable(self.n)
+            for pid in ids:
+                row = self.row_of.pop(pid, None)
+                if row is None:
+                    continue
+                last = self.n - 1
+                if row != last:
+                    # move the last point into the hole
+                    self.matrix[row] = self.matrix[last]
+                    self.ids[row] = self.ids[last]
+                    self.payloads[row] = self.payloads[last]
+                    self.row_of[self.ids[row]] = row
+                self.ids.pop()
+                self.payloads.pop()
+                self.n -= 1
+
+    def delete_where(self, where):
+        with self._lock:
+            self.delete_ids([self.ids[r] for r in self._matching_rows(where)])
+
+    def scan(self, where, fields):
+        with self._lock:
+            return [(self.ids[r], {f: self.payloads[r].get(f) for f in fields}) for r in self._matching_rows(where)]
+
+    def search(self, vector, k, with_vectors=False, where=None):
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        with self._lock:
+            if self.dim is None:
+                raise CollectionMissing(self.collection)
+            rows = self._matching_rows(where) if where else None
+            n = self.n if rows is None else len(rows)
+            if not n:
+                return []
+            scores = (self.matrix[:self.n] if rows is None else self.matrix[rows]) @ q
+            if k < n:
+                top = np.argpartition(-scores, k)[:k]
+                top = top[np.argsort(-scores[top])]
+            else:
+                top = np.argsort(-scores)
+            row_of = (lambda i: i) if rows is None else (lambda i: int(rows[i]))
+            return [Hit(self.ids[row_of(i)], float(scores[i]), self.payloads[row_of(i)],
+                        np.array(self.matrix[row_of(i)]) if with_vectors else None) for i in top]
+
+    def stats(self) -> dict:
+        return {"points": self.n}
+
+    def flush(self):
+        if not self.dir:
+            return
+        with self._lock:
+            if self.dim is None:
+                return
+            self.dir.mkdir(parents=True, exist_ok=True)
+            # write-then-rename: the current file may still be memory-mapped
+            with open(self.dir / "vectors.npy.tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(self.matrix[:self.n]))
+            (self.dir / "vectors.npy.tmp").replace(self.dir / "vectors.npy")
+            (self.dir / "meta.json.tmp").write_text(json.dumps({"dim": self.dim, "ids": self.ids, "payloads": self.payloads}))
+            (self.dir / "meta.json.tmp").replace(self.dir / "meta.json")
+
+
+BACKENDS = {"qdrant": QdrantBackend, "local": LocalBackend}
+
+# Build the backend selected by VECTOR_BACKEND
+def get_vector_backend(collection: str, kind: str = VECTOR_BACKEND) -> VectorBackend:
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown VECTOR_BACKEND {kind!r}, expected one of {list(BACKENDS)}")
+    logger.info(f"Using {kind} vector backend for collection {collection}")
+    return BACKENDS[kind](collection)
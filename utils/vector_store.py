@@ -2,95 +2,500 @@
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
 import os
-QDRANT_URL = os.getenv("QDRANT_URL")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY") 
-CHUNK_SIZE = os.getenv("CHUNK_SIZE")
-CHUNK_OVERLAP = os.getenv("CHUNK_OVERLAP")
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "300"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "50"))
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")           # dense | hybrid
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+HYBRID_OVERFETCH = int(os.getenv("HYBRID_OVERFETCH", "4"))       # candidates per retriever = k * this
+RRF_K = int(os.getenv("RRF_K", "60"))
+INDEX_VERSION_TTL = float(os.getenv("INDEX_VERSION_TTL", "2"))   # seconds a shared index version is trusted
+LEXICAL_CACHE_TENANTS = int(os.getenv("LEXICAL_CACHE_TENANTS", "64"))  # BM25 indexes kept loaded
 
 #get the logger done also at the top.
 from utils.logger import init_logger
 logger = init_logger(__name__)
 
 
-import os, pathlib, tempfile, json, tqdm
-from qdrant_client import QdrantClient, models
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
-from pypdf import PdfReader
+import hashlib, os, pathlib, tempfile, json, threading, time
+from collections import OrderedDict
+from utils.clients import get_redis
+from utils.embeddings import get_embedding_engine
+from utils.ingest import (iter_pages, iter_chunks, iter_batches, track,
+                          EMBED_BATCH_SIZE, UPSERT_BATCH_SIZE)
+from utils.embedding_cache import get_embedding_cache
+from utils.vector_backends import get_vector_backend, CollectionMissing
+from utils.answer_cache import answer_cache
+from utils.metrics import span
+from utils.bm25 import BM25Index, rrf_fuse, BM25_INDEX_PATH
+from utils.rerank import get_reranker
+from utils.tenants import DEFAULT_TENANT, tenant_key, tenant_path, redis_key
+from utils.manifest import (chunk_hash, point_id, document_id, document_fingerprint,
+                            load_manifest, save_manifest, delete_manifest, delete_all_manifests)
 
-EMBED_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
-assert EMBED_MODEL is not None, "Embedding model is not loaded!"
+# One embedding engine per process — loads the model on first use and caches query vectors
+ENGINE = get_embedding_engine()
 
 #---- First load them from .env-----------------------------------------
 COLLECTION = "pdf_chunks"
-qclient = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY)
+# Vector backend and lexical index are built on first use, not at import, so
+# importing this module (and app.py) stays cheap on cold start.
+# All tenants share one collection (every point carries a `tenant` payload field that
+# searches filter on); each tenant has its own BM25 index, manifests and version.
+# At most LEXICAL_CACHE_TENANTS BM25 indexes stay loaded; the least recently used
+# one is saved and dropped.
+_store = None
+_lexical: OrderedDict = OrderedDict()
+_init_lock = threading.Lock()
+_rebuild_lock = threading.Lock()
+
+# Qdrant by default; VECTOR_BACKEND=local keeps the index in-process (NumPy)
+def get_store():
+    global _store
+    if _store is None:
+        with _init_lock:
+            if _store is None:
+                _store = get_vector_backend(COLLECTION)
+    return _store
+
+
+# Swap in another backend (benchmarks, alternative deployments)
+def set_store(backend):
+    global _store
+    with _init_lock:
+        _store = backend
+
+
+def _lexical_path(tenant: str):
+    return BM25_INDEX_PATH and tenant_path(pathlib.Path(BM25_INDEX_PATH).parent, tenant,
+                                           "bm25.json", default_path=BM25_INDEX_PATH)
+
+
+# Lexical (BM25) index over one tenant's chunks, keyed by the same point ids
+def get_lexical(tenant: str = DEFAULT_TENANT) -> BM25Index:
+    tenant = tenant_key(tenant)
+    with _init_lock:
+        lexical = _lexical.get(tenant)
+        if lexical is None:
+            lexical = _lexical[tenant] = BM25Index(_lexical_path(tenant))
+            while len(_lexical) > LEXICAL_CACHE_TENANTS:
+                _, idle = _lexical.popitem(last=False)
+                idle.flush()
+        _lexical.move_to_end(tenant)
+    return lexical
+
+# -----------------------------------------------------------------------------
+# Index versions. A tenant's version is (collection epoch, tenant counter), both kept
+# in Redis so every instance sees a re-index or reset done by any other one: the
+# epoch moves when the whole collection is dropped, the counter when the tenant's
+# content changes. Cached answers are tied to a version. Reads are trusted for
+# INDEX_VERSION_TTL seconds; without Redis the counters are local to this process.
+# -----------------------------------------------------------------------------
+_versions = {}        # tenant -> (fetched at, (epoch, counter))
+_contents = {}        # tenant -> ((epoch, counter), content version)
+
+def _epoch_key() -> str:
+    return redis_key("index_epoch", COLLECTION)
+
+
+def _version_key(tenant: str) -> str:
+    return redis_key("index_version", f"{COLLECTION}:{tenant}")
+
+
+def _docs_key(tenant: str) -> str:
+    return redis_key("index_docs", f"{COLLECTION}:{tenant}")
+
+
+def _shared_version(tenant: str, fresh: bool = False) -> tuple:
+    now = time.monotonic()
+    cached = _versions.get(tenant)
+    if cached and not fresh and now - cached[0] < INDEX_VERSION_TTL:
+        return cached[1]
+    try:
+        with span("redis.index_version"):
+            epoch, counter = get_redis().mget(_epoch_key(), _version_key(tenant))
+        version = (int(epoch or 0), int(counter or 0))
+    except Exception as e:
+        logger.warning(f"index_version: shared version unavailable, using local: {e}")
+        version = cached[1] if cached else (0, 0)
+    _versions[tenant] = (now, version)
+    return version
+
+
+def index_version(tenant: str = DEFAULT_TENANT) -> str:
+    tenant = tenant_key(tenant)
+    epoch, counter = _shared_version(tenant)
+    return f"{COLLECTION}/{tenant}:{epoch}.{counter}"
+
+
+# Answer-cache version: the *content* a tenant's retrieval sees rather than the tenant.
+# Every indexed document records a fingerprint of its chunk hashes in Redis, so tenants
+# holding the same documents (e.g. every chat that uploaded the same manual under
+# TENANT_SCOPE=chat) get the same version and share cached answers. It is recomputed
+# only when the tenant's index version moves; without Redis it is the tenant's own
+# index_version, so nothing is shared.
+def content_version(tenant: str = DEFAULT_TENANT) -> str:
+    tenant = tenant_key(tenant)
+    version = _shared_version(tenant)
+    cached = _contents.get(tenant)
+    if cached and cached[0] == version:
+        return cached[1]
+    try:
+        with span("redis.content_version"):
+            prints = get_redis().hvals(_docs_key(tenant))
+    except Exception as e:
+        logger.warning(f"content_version: document fingerprints unavailable, not sharing answers: {e}")
+        return index_version(tenant)
+    prints = sorted(p.decode() if isinstance(p, bytes) else p for p in prints)
+    digest = hashlib.sha256("\n".join(prints).encode()).hexdigest()[:32]
+    content = f"{COLLECTION}:{version[0]}:{ENGINE.cache_tag}:{digest}"
+    _contents[tenant] = (version, content)
+    return content
+
+
+# Record (or with chunks=None forget) what one of the tenant's documents contains.
+# Must happen before the version bump, so an instance seeing the new version reads it.
+# True when the document was not recorded before (e.g. indexed before fingerprints).
+def _record_document(tenant: str, doc_id: str, chunks=None) -> bool:
+    try:
+        if chunks is None:
+            get_redis().hdel(_docs_key(tenant), doc_id)
+            return False
+        return bool(get_redis().hset(_docs_key(tenant), doc_id, document_fingerprint(chunks)))
+    except Exception as e:
+        logger.warning(f"_record_document: fingerprint of {doc_id} not saved: {e}")
+        return False
+
+
+# Bump the tenant's version for every instance. Cached answers need no invalidation:
+# they are keyed by content_version, which follows the tenant's documents.
+# Returns the new (epoch, counter).
+def _index_changed(tenant: str = DEFAULT_TENANT) -> tuple:
+    tenant = tenant_key(tenant)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.get(_epoch_key())
+        pipe.incr(_version_key(tenant))
+        epoch, counter = pipe.execute()
+        version = (int(epoch or 0), int(counter))
+    except Exception as e:
+        logger.warning(f"_index_changed: shared version unavailable, bumping locally: {e}")
+        epoch, counter = _shared_version(tenant)
+        version = (epoch, counter + 1)
+    _versions[tenant] = (time.monotonic(), version)
+    return version
+
+
+# BM25 hits carry their own text, so a stale lexical index would put deleted chunks
+# into prompts. The index is a copy of the tenant's points in the vector store: when its
+# version differs from the shared one (another instance re-indexed or reset the tenant,
+# or the file predates a restart) it is rebuilt from the store, O(tenant points).
+def _rebuild_lexical(tenant: str, lexical: BM25Index, version: list):
+    with _rebuild_lock:
+        if lexical.version == version:
+            return
+        store = get_store()
+        points = store.scan({"tenant": tenant}, ["text", "doc_id"]) if store.exists() else []
+        lexical.rebuild([(pid, p["text"], p["doc_id"]) for pid, p in points], version)
+        if points or (lexical.path and lexical.path.exists()):
+            lexical.flush()
+    logger.info(f"Lexical index for {tenant} rebuilt from {COLLECTION} at version {version}: {len(points)} chunks")
+
+
+def _fresh_lexical(tenant: str) -> BM25Index:
+    lexical = get_lexical(tenant)
+    version = list(_shared_version(tenant))
+    if lexical.version != version:
+        _rebuild_lexical(tenant, lexical, version)
+    return lexical
+
+
+# This process changed the tenant: bump the shared version and keep the lexical copy
+# marked in sync (or rebuild it if someone else changed the tenant in between)
+def _lexical_changed(tenant: str, lexical: BM25Index):
+    epoch, counter = _index_changed(tenant)
+    if lexical.version == [epoch, counter - 1]:
+        lexical.version = [epoch, counter]
+        lexical.flush()
+    else:
+        _rebuild_lexical(tenant, lexical, [epoch, counter])
+
+
+# The collection was dropped: new epoch for every tenant on every instance, and no
+# tenant holds documents any more
+def _collection_changed():
+    try:
+        redis_client = get_redis()
+        docs = list(redis_client.scan_iter(match=_docs_key("*")))
+        if docs:
+            redis_client.delete(*docs)
+        redis_client.incr(_epoch_key())
+        _versions.clear()
+        _contents.clear()
+    except Exception as e:
+        logger.warning(f"_collection_changed: shared epoch unavailable, bumping locally: {e}")
+        now = time.monotonic()
+        for tenant, (_, (epoch, counter)) in list(_versions.items()):
+            _versions[tenant] = (now, (epoch + 1, counter))
+    answer_cache.invalidate(prefix=f"{COLLECTION}:")
 
 def create_chunks(text, chunk_size, chunk_overlap):
-    splitter = RecursiveCharacterTextSplitter(chunk_size, chunk_overlap)
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     return splitter.split_text(text)
 
 def check_qdrant_collection():
-    if COLLECTION not in [c.name for c in qclient.get_collections().collections]:
+    if not get_store().exists():
         logger.warning(f"Collection {COLLECTION} does not exist in Qdrant")
         return False
     return True
 
 
 
+# Drops the whole collection for every tenant — an admin operation; the app resets
+# one tenant at a time with reset_tenant().
 def reset_qdrant_collection():
-    if COLLECTION in [c.name for c in qclient.get_collections().collections]:
-        qclient.delete_collection(COLLECTION)
+    store = get_store()
+    store.drop()
+    with _init_lock:
+        lexicals = list(_lexical.values())
+    for lexical in lexicals:
+        lexical.clear()
+    # every tenant's saved index, loaded here or not
+    if BM25_INDEX_PATH:
+        pathlib.Path(BM25_INDEX_PATH).unlink(missing_ok=True)
+        for path in (pathlib.Path(BM25_INDEX_PATH).parent / "tenants").glob("*/bm25.json"):
+            path.unlink(missing_ok=True)
+    delete_all_manifests()
+    _collection_changed()
     logger.warning(f"Collection {COLLECTION} has been deleted from Qdrant")
     return True
 
 
+# Remove one tenant's chunks, lexical index and manifests; other tenants are untouched
+def reset_tenant(tenant: str = DEFAULT_TENANT) -> bool:
+    tenant = tenant_key(tenant)
+    store, lexical = get_store(), get_lexical(tenant)
+    if store.exists():
+        store.delete_where({"tenant": tenant})
+        store.flush()
+    lexical.clear()
+    delete_all_manifests(tenant)
+    try:
+        get_redis().delete(_docs_key(tenant))
+    except Exception as e:
+        logger.warning(f"reset_tenant: document fingerprints of {tenant} not removed: {e}")
+    _lexical_changed(tenant, lexical)
+    logger.warning(f"Tenant {tenant} has been cleared from {COLLECTION}")
+    return True
 
-def load_pdf_to_qdrant(file) -> bool:
-    reader = PdfReader(file)
-    full_text = "\n".join(page.extract_text() or "" for page in reader.pages)
-    chunk_size=CHUNK_SIZE
-    chunk_overlap=CHUNK_OVERLAP
-    docs = create_chunks(full_text,chunk_size,chunk_overlap)
 
 
-    embeddings = EMBED_MODEL.encode(docs, show_progress_bar=True)
-    vectors = [
-        models.PointStruct(id=i, vector=vec, payload={"text": t})
-        for i, (vec, t) in enumerate(zip(embeddings, docs))
-    ]
+# Rebuild a document's {chunk hash -> point id} map from the vector store itself,
+# used when the local manifest is missing (e.g. after a container restart).
+def _scroll_document_chunks(doc_id: str, tenant: str = DEFAULT_TENANT) -> dict:
+    return {payload["hash"]: pid
+            for pid, payload in get_store().scan({"tenant": tenant_key(tenant), "doc_id": doc_id}, ["hash"])}
 
-    if COLLECTION not in [c.name for c in qclient.get_collections().collections]:
-        qclient.recreate_collection(
-            COLLECTION,
-            vectors_config=models.VectorParams(size=len(embeddings[0]), distance=models.Distance.COSINE),
-        )
-    qclient.upsert(collection_name=COLLECTION, points=vectors)
+
+# Remove one document's chunks, leaving the other documents in the collection alone
+def delete_document(doc_id: str, tenant: str = DEFAULT_TENANT) -> bool:
+    tenant = tenant_key(tenant)
+    store, lexical = get_store(), _fresh_lexical(tenant)
+    if store.exists():
+        store.delete_where({"tenant": tenant, "doc_id": doc_id})
+        store.flush()
+    lexical.remove_doc(doc_id)
+    delete_manifest(doc_id, tenant)
+    _record_document(tenant, doc_id)
+    _lexical_changed(tenant, lexical)
+    logger.warning(f"Document {doc_id} has been deleted from {COLLECTION} ({tenant})")
     return True
 
 
 
+# Embed {chunk hash: text}, consulting the on-disk embedding cache first so
+# chunks seen before (even before a restart) are read back instead of re-encoded.
+def _embed_chunks(fresh: dict, batch_size: int) -> list:
+    cache = get_embedding_cache(ENGINE.cache_tag, ENGINE.dimension)
+    cached = cache.get_many(list(fresh))
+    missing = [h for h in fresh if h not in cached]
+    if missing:
+        encoded = ENGINE.encode_documents([fresh[h] for h in missing], batch_size=batch_size)
+        cache.put_many(missing, encoded)
+        cached.update(zip(missing, encoded))
+    logger.debug(f"_embed_chunks: {len(fresh) - len(missing)} cached | {len(missing)} encoded")
+    return [cached[h] for h in fresh]
+
+
+
+# Stream a PDF into Qdrant: page extract -> chunk -> batch embed -> batched upsert.
+# Only one upsert batch of chunks/vectors is held at a time, so memory stays flat
+# regardless of page count. `progress(stage, count)` is called as each stage advances
+# (stages: "pages", "chunks", "processed", "upserted").
+#
+# Indexing is incremental: point ids are derived from (tenant, document id, chunk hash),
+# so chunks already listed in the document's manifest are neither re-embedded nor
+# re-upserted, and chunks that disappeared from the new version are deleted.
+# Several documents (and tenants) can live side by side in the collection.
+# The document is identified by `doc_id`, by default its file name (manifest.document_id):
+# uploading another file with the same name replaces it, so pass an explicit id to keep
+# same-named files from different folders apart.
+def load_pdf_to_qdrant(file, progress=None,
+                       embed_batch_size: int = EMBED_BATCH_SIZE,
+                       upsert_batch_size: int = UPSERT_BATCH_SIZE,
+                       tenant: str = DEFAULT_TENANT, doc_id: str = None) -> bool:
+    tenant = tenant_key(tenant)
+    store, lexical = get_store(), _fresh_lexical(tenant)
+    doc_id = doc_id or document_id(file)
+    pages = track(iter_pages(file), "pages", progress)
+    chunks = track(iter_chunks(pages, CHUNK_SIZE, CHUNK_OVERLAP), "chunks", progress)
+
+    # uncached: a stale "missing" would re-embed the whole document
+    collection_ready = store.exists(fresh=True)
+    old, outdated = {}, {}
+    if collection_ready:
+        manifest = load_manifest(doc_id, tenant)
+        old = manifest["chunks"] if manifest else _scroll_document_chunks(doc_id, tenant)
+        if manifest and manifest.get("model") != ENGINE.cache_tag:
+            # embedded with another model or EMBED_BACKEND: those vectors live in another
+            # space, so every chunk is re-embedded (same point ids, overwritten) and the
+            # ones no longer in the document are deleted below
+            logger.info(f"load_pdf_to_qdrant: {tenant}/{doc_id} was indexed with "
+                        f"{manifest.get('model')}, re-embedding with {ENGINE.cache_tag}")
+            old, outdated = {}, old
+
+    seen = {}      # chunk hash -> point id for this version of the document
+    upserted = 0
+    for batch in track(iter_batches(chunks, upsert_batch_size), "processed", progress):
+        fresh, lexical_missing = {}, {}
+        for text in batch:
+            h = chunk_hash(text)
+            if h in seen:
+                continue
+            seen[h] = point_id(doc_id, h, tenant)
+            if h not in old:
+                fresh[h] = text
+            elif seen[h] not in lexical:
+                lexical_missing[seen[h]] = text     # unchanged chunk, but lexical index was lost
+        if lexical_missing:
+            lexical.add(list(lexical_missing), list(lexical_missing.values()), doc_id)
+        if not fresh:
+            continue
+
+        embeddings = _embed_chunks(fresh, embed_batch_size)
+        if not collection_ready:
+            store.create(len(embeddings[0]))
+            collection_ready = True
+
+        with span("vector.upsert"):
+            store.upsert(
+                [seen[h] for h in fresh],
+                embeddings,
+                [{"text": t, "doc_id": doc_id, "hash": h, "tenant": tenant} for h, t in fresh.items()],
+            )
+        with span("bm25.add"):
+            lexical.add([seen[h] for h in fresh], list(fresh.values()), doc_id)
+        upserted += len(fresh)
+        if progress:
+            progress("upserted", upserted)
+
+    stale = [pid for h, pid in {**outdated, **old}.items() if h not in seen]
+    for ids in iter_batches(stale, upsert_batch_size):
+        store.delete_ids(ids)
+        lexical.remove(ids)
+
+    store.flush()
+    recorded = _record_document(tenant, doc_id, seen or None)
+    if upserted or stale or recorded:
+        _lexical_changed(tenant, lexical)
+    else:
+        lexical.flush()
+    get_embedding_cache(ENGINE.cache_tag, ENGINE.dimension).flush()
+    save_manifest(doc_id, ENGINE.cache_tag, seen, tenant)
+    logger.info(f"load_pdf_to_qdrant: {tenant}/{doc_id} | chunks {len(seen)} | upserted {upserted} "
+                f"| unchanged {len(seen) - upserted} | deleted {len(stale)}")
+    return len(seen) > 0
+
+
+
+
+# Vectors for candidates that came without one (BM25-only hits in hybrid mode): read
+# back from the chunk-embedding cache by content hash, encoded only if missing.
+def _fill_vectors(candidates: list) -> list:
+    missing = {chunk_hash(t): t for t, _, v in candidates if v is None}
+    if not missing:
+        return candidates
+    cache = get_embedding_cache(ENGINE.cache_tag, ENGINE.dimension)
+    vectors = cache.get_many(list(missing))
+    absent = [h for h in missing if h not in vectors]
+    if absent:
+        vectors.update(zip(absent, ENGINE.encode_documents([missing[h] for h in absent])))
+    return [(t, s, v if v is not None else vectors[chunk_hash(t)]) for t, s, v in candidates]
 
-def similarity_search(query: str, k: int = 5) -> list:
+
+# Top-k chunks for a query as (text, score) pairs, best first
+# mode: "dense" (vectors only) or "hybrid" (vectors + BM25, fused by rank)
+# Only the tenant's own chunks are searched. When the post-retrieval stage
+# (utils/rerank.py) is enabled, k * RERANK_FETCH candidates are fetched with their
+# vectors, optionally re-scored by a cross-encoder and diversified with MMR, so fewer
+# than k (near-duplicate-free) chunks may come back.
+# Scores only order results within one call and are not comparable across modes:
+#   dense  -> cosine similarity of the query and chunk vectors (-1..1)
+#   hybrid -> RRF score, sum(weight / (RRF_K + rank)), ~0.01-0.03 with the defaults
+#   RERANKER_MODEL set -> the cross-encoder's relevance logit (unbounded)
+# Do not threshold on them; use dense mode for an absolute similarity cut-off.
+def similarity_search_scored(query: str, k: int = 5, mode: str = RETRIEVAL_MODE,
+                             tenant: str = DEFAULT_TENANT) -> list:
     if query is None or query.strip() == "":
         logger.error("Query is empty")
         return [] 
     
-    if qclient is None:
-        logger.error("Qdrant client is not initialized")
+    tenant = tenant_key(tenant)
+    store, lexical = get_store(), _fresh_lexical(tenant)
+    if store is None:
+        logger.error("Vector store is not initialized")
         return []
-    
-    if COLLECTION not in [c.name for c in qclient.get_collections().collections]:
-        logger.error(f"Collection {COLLECTION} does not exist in Qdrant")
-        return []   
-    
-       
-    EMBED_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
-    if EMBED_MODEL is None:
-        assert EMBED_MODEL is not None, "Embedding model is not loaded!"
-        logger.error("Embedding model not loaded")
-        return None
+
+    reranker = get_reranker()
+    fetch = reranker.fetch_k(k)
+    hybrid = mode == "hybrid" and len(lexical) > 0
+    qvec = ENGINE.encode_query(query)
+    try:
+        with span("vector.search"):
+            hits = store.search(qvec, max(fetch, k * HYBRID_OVERFETCH) if hybrid else fetch,
+                                with_vectors=reranker.mmr, where={"tenant": tenant})
+    except CollectionMissing:
+        logger.error(f"Collection {COLLECTION} does not exist in the vector store")
+        return []
+    logger.debug(f"similarity_search: query cache {ENGINE.cache_stats()}")
+    if not hybrid:
+        candidates = [(h.payload["text"], h.score, h.vector) for h in hits]
     else:
-        qvec = EMBED_MODEL.encode(query).tolist()
-        hits = qclient.search(COLLECTION, qvec, limit=k)
-        return [h.payload["text"] for h in hits]
-    
\ No newline at end of file
+        # Hybrid: fuse the dense and BM25 rankings with reciprocal rank fusion
+        with span("bm25.search"):
+            lex_hits = lexical.search(query, max(fetch, k * HYBRID_OVERFETCH))
+        texts = {h.id: h.payload["text"] for h in hits}
+        texts.update((pid, text) for pid, text, _ in lex_hits)
+        vectors = {h.id: h.vector for h in hits}
+        fused = rrf_fuse(
+            [[h.id for h in hits], [pid for pid, _, _ in lex_hits]],
+            [HYBRID_DENSE_WEIGHT, HYBRID_LEXICAL_WEIGHT],
+            k=RRF_K,
+        )
+        candidates = [(texts[pid], score, vectors.get(pid)) for pid, score in fused[:fetch]]
+    if not reranker.enabled:
+        return [(text, score) for text, score, _ in candidates[:k]]
+    if reranker.mmr:
+        candidates = _fill_vectors(candidates)
+    return reranker.select(query, candidates, k)
+
+
+def similarity_search(query: str, k: int = 5, tenant: str = DEFAULT_TENANT) -> list:
+    return [text for text, _ in similarity_search_scored(query, k, tenant=tenant)]
+
+
+
+# Counters from the vector backend (e.g. get_collections round-trips vs registry hits)
+def vector_store_stats() -> dict:
+    return get_store().stats()
@@ -3,14 +3,66 @@
 import os
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
+VERTEX_MODEL_NAME = os.getenv("VERTEX_MODEL_NAME", "gemini-2.5-flash-lite")
+VERTEX_MODEL_CACHE_SIZE = int(os.getenv("VERTEX_MODEL_CACHE_SIZE", "16"))
+VERTEX_CONTENT_CACHE_SIZE = int(os.getenv("VERTEX_CONTENT_CACHE_SIZE", "4096"))
 
 #get the logger done also at the top.
 from utils.logger import init_logger
 logger = init_logger(__name__)
 
 # Vertex AI (Gemini on Vertex)
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 import vertexai
 from vertexai.generative_models import GenerativeModel, Content, Part, GenerationConfig
+from utils.metrics import span, token_usage
+
+
+# --- Caches ------------------------------------------------------------------
+# GenerativeModel objects are reused per (model name, system template), and each
+# converted history message is memoized, so a turn only builds Content for the
+# messages it has not seen before.
+_lock = threading.Lock()
+_models: OrderedDict = OrderedDict()
+_contents: OrderedDict = OrderedDict()
+
+
+def _lru_get(cache: OrderedDict, key, build, size: int):
+    with _lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            return value
+    value = build()
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+    return value
+
+
+def _get_model(model_name: str, system_template: str) -> GenerativeModel:
+    return _lru_get(
+        _models, (model_name, system_template),
+        lambda: GenerativeModel(model_name=model_name, system_instruction=system_template),
+        VERTEX_MODEL_CACHE_SIZE,
+    )
+
+
+@lru_cache(maxsize=32)
+def _generation_config(temperature: float, max_output_tokens: int) -> GenerationConfig:
+    return GenerationConfig(temperature=temperature, max_output_tokens=max_output_tokens)
+
+
+# The first paragraph of the system prompt is the stable instruction; whatever follows
+# (retrieved context, conversation summary) changes every turn and is sent alongside
+# the user message instead, so the model can be reused.
+def _split_system_prompt(system_prompt: str) -> tuple[str, str]:
+    template, _, dynamic = system_prompt.partition("\n\n")
+    return template.strip(), dynamic.strip()
 
 
 # --- Helpers -----------------------------------------------------------------
@@ -18,6 +70,7 @@ def _to_vertex_history(messages: list[dict]) -> list[Content]:
     """
     Convert [{'role': 'user'|'assistant', 'content': '...'}] -> Vertex Content[]
     Skips the final user message (the one we will send) — caller should slice.
+    Conversions are memoized on (role, text), so only new messages are built.
     """
     #role_map = {"user": Role.USER, "assistant": Role.MODEL}
     role_map = {"user": "user", "assistant": "model"}
@@ -28,14 +81,19 @@ def _to_vertex_history(messages: list[dict]) -> list[Content]:
         text = (m.get("content") or "").strip()
         if not role or not text:
             continue
-        history.append(Content(role=role, parts=[Part.from_text(text)]))
+        history.append(_lru_get(
+            _contents, (role, text),
+            lambda: Content(role=role, parts=[Part.from_text(text)]),
+            VERTEX_CONTENT_CACHE_SIZE,
+        ))
     return history
 
 
 # --- Public API (same signatures) --------------------------------------------
-def init_chat():
+def init_chat(model_name: str = None):
     """
-    Initialize Vertex AI and return a ChatSession.
+    Initialize Vertex AI and return a ChatSession for `model_name` (default VERTEX_MODEL_NAME).
+    The name is kept on the session, so every turn of this chat uses the same model.
     Env vars expected:
       - GOOGLE_CLOUD_PROJECT (required)
       - VERTEX_LOCATION (optional, default 'us-central1')
@@ -54,25 +112,18 @@ def init_chat():
 
     # Choose a Gemini model available on Vertex; adjust if you prefer Pro
     # See: https://cloud.google.com/vertex-ai/generative-ai/docs/learn/models
-    model = GenerativeModel(model_name=os.getenv("VERTEX_MODEL_NAME", "gemini-2.5-flash-lite")  )
+    model_name = model_name or VERTEX_MODEL_NAME
+    model = GenerativeModel(model_name=model_name)
 
     # Start an empty chat (we'll add history per-request in chat())
     chat_session = model.start_chat(response_validation=True)  
+    chat_session.model_name = model_name
     return chat_session
 
 
-def chat(
-    my_gemini,  # ChatSession from init_chat()
-    system_prompt: str,
-    messages: list[dict],
-    max_output_tokens: int = 512,
-    temperature: float = 0.8,
-) -> str:
-    """
-    Send a message using Vertex AI chat.
-    - Builds a system instruction and prior history from `messages[:-1]`
-    - Sends the final user message `messages[-1]`
-    """
+# Validate the inputs and build (chat session, message parts, generation config)
+# for one turn. Returns None (after logging why) when the turn cannot be sent.
+def _prepare_turn(my_gemini, system_prompt: str, messages: list[dict], max_output_tokens: int, temperature: float):
     if not my_gemini:
         logger.error("chat:my_gemini is not initialized. Please call init_chat() first.")
         return None
@@ -92,12 +143,10 @@ def chat(
         return None
 
 
-    # Rebuild a model with system instruction (Vertex applies system at model-level)
+    # Cached model per (model name, system template) — Vertex applies system at model-level
+    system_template, turn_context = _split_system_prompt(system_prompt)
     try:
-        model_with_system = GenerativeModel(
-            model_name = os.getenv("VERTEX_MODEL_NAME", "gemini-2.5-flash-lite"),
-            system_instruction = system_prompt,
-        )
+        model_with_system = _get_model(getattr(my_gemini, "model_name", VERTEX_MODEL_NAME), system_template)
     except Exception as e:
         logger.exception(f"Failed to prepare model with system prompt: {e}")
         return None
@@ -105,26 +154,79 @@ def chat(
     # Convert prior history (excluding the last user message)
     prior_history = _to_vertex_history(messages[:-1])
 
-    # Create a fresh chat session including history for this turn
+    # A chat session is just a history list on top of the cached model
     chat_with_history = model_with_system.start_chat(history=prior_history)
 
-
-    gen_cfg = GenerationConfig(
-        temperature=temperature,
-        max_output_tokens=max_output_tokens,
-    )
+    gen_cfg = _generation_config(temperature, max_output_tokens)
+    parts = ([Part.from_text(turn_context)] if turn_context else []) + [Part.from_text(user_message)]
 
     logger.info(
         "chat:Sending message to Vertex AI Gemini with system+history. "
         f"history_turns={len(prior_history)}, max_tokens={max_output_tokens}, temp={temperature}"
     )
+    return chat_with_history, parts, gen_cfg
+
+
+def chat(
+    my_gemini,  # ChatSession from init_chat()
+    system_prompt: str,
+    messages: list[dict],
+    max_output_tokens: int = 512,
+    temperature: float = 0.8,
+) -> str:
+    """
+    Send a message using Vertex AI chat.
+    - Builds a system instruction and prior history from `messages[:-1]`
+    - Sends the final user message `messages[-1]`
+    """
+    turn = _prepare_turn(my_gemini, system_prompt, messages, max_output_tokens, temperature)
+    if turn is None:
+        return None
+    chat_with_history, parts, gen_cfg = turn
 
     try:
-        response = chat_with_history.send_message(
-            Part.from_text(user_message),
-            generation_config=gen_cfg,
-        )
+        with span("llm.chat"):
+            response = chat_with_history.send_message(
+                parts,
+                generation_config=gen_cfg,
+            )
         return (response.text.strip() if response and hasattr(response, "text") else "")
     except Exception as e:
         logger.exception(f"Vertex AI chat send_message failed: {e}")
         return None
+
+
+def chat_stream(
+    my_gemini,
+    system_prompt: str,
+    messages: list[dict],
+    max_output_tokens: int = 512,
+    temperature: float = 0.8,
+):
+    """
+    Streaming counterpart of chat(), with the contract of
+    google_generativeai_chat.chat_stream. Errors are logged and re-raised, so a
+    half-streamed reply is never passed on as a complete one.
+    """
+    turn = _prepare_turn(my_gemini, system_prompt, messages, max_output_tokens, temperature)
+    if turn is None:
+        return
+    chat_with_history, parts, gen_cfg = turn
+
+    pieces, usage = [], {}
+    try:
+        with span("llm.chat"):
+            for chunk in chat_with_history.send_message(parts, generation_config=gen_cfg, stream=True):
+                try:
+                    text = chunk.text
+                except ValueError:      # chunk without text parts (e.g. finish/safety only)
+                    text = ""
+                if text:
+                    pieces.append(text)
+                    yield text
+                if getattr(chunk, "usage_metadata", None) is not None:
+                    usage = token_usage(chunk.usage_metadata)
+    except Exception as e:
+        logger.exception(f"Vertex AI chat streaming send_message failed: {e}")
+        raise
+    yield {"text": "".join(pieces).strip(), "usage": usage}